@@ -0,0 +1,96 @@
+#
+# Pamięć drzewa AST i szybkość przejść po nim.
+#
+# Parsuje wygenerowany program (ten sam generator co scaling.py, domyślnie
+# 100000 poleceń) i podaje liczbę węzłów, pamięć zajmowaną przez drzewo
+# (tracemalloc, po zwolnieniu parsera) i czas pełnego przejścia po drzewie:
+# przez tablicę metod z visitor.Visitor oraz - dla porównania - przez
+# wyszukiwanie metody getattr po nazwie klasy w każdym węźle. Ostatnia
+# kolumna to czas copy.deepcopy drzewa (kompilator kopiuje AST przed
+# generowaniem kodu).
+#
+# Sposób użycia: python benchmarks/ast_memory.py [liczba poleceń ...]
+#
+import copy
+import gc
+import sys
+import time
+import tracemalloc
+
+import cases  # ścieżki do compiler/ i virtual_machine/
+
+from ast_tree import ASTNode, fields
+from kompilator import parse_source
+from scaling import program
+from visitor import Visitor
+
+SIZES = [100000]
+REPEATS = 5
+
+
+class Counter(Visitor):
+    # liczy węzły; każda klasa węzła ma tę samą metodę (przez ASTNode)
+    def __init__(self):
+        self.count = 0
+
+    def visit_astnode(self, node):
+        self.count += 1
+        for name in fields(type(node)):
+            self.children(getattr(node, name))
+
+    def children(self, value):
+        if isinstance(value, ASTNode):
+            self.dispatch(value)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self.children(item)
+
+    def walk(self, node):
+        self.dispatch(node)
+        return self.count
+
+
+class NamedCounter(Counter):
+    # to samo przejście z wyszukiwaniem metody po nazwie klasy
+    def children(self, value):
+        if isinstance(value, ASTNode):
+            method = getattr(self, "visit_" + type(value).__name__.lower(), None) or self.visit_astnode
+            method(value)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self.children(item)
+
+
+def tree_memory(source):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    ast = parse_source(source)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return ast, size
+
+
+def timed(walk):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = walk()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(100000)
+    sizes = [int(argument) for argument in sys.argv[1:]] or SIZES
+    print(f"{'polecenia':>10} {'węzły':>9} {'pamięć [MB]':>12} {'B na węzeł':>11} "
+          f"{'tablica [s]':>12} {'getattr [s]':>12} {'deepcopy [s]':>13}")
+    for size in sizes:
+        ast, memory = tree_memory(program(size))
+        nodes, table = timed(lambda: Counter().walk(ast.root))
+        _, named = timed(lambda: NamedCounter().walk(ast.root))
+        _, copied = timed(lambda: copy.deepcopy(ast))
+        print(f"{size:>10} {nodes:>9} {memory / 2 ** 20:>12.2f} {memory / nodes:>11.1f} "
+              f"{table:>12.3f} {named:>12.3f} {copied:>13.3f}")
@@ -0,0 +1,40 @@
+#
+# Przykładowe programy z danymi wejściowymi używane w pomiarach kosztu.
+#
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler"), os.path.join(ROOT, "virtual_machine")]
+
+CASES = [
+    ("tests/example1.imp", [1234567890, 987654321]),
+    ("tests/example1.imp", [28, 18]),
+    ("tests/example2.imp", [0, 1]),
+    ("tests/example3.imp", [1]),
+    ("tests/example4.imp", [20, 9]),
+    ("tests/example5.imp", [1234567890, 1234567890987654321, 987654321]),
+    ("tests/example6.imp", [20]),
+    ("tests/example7.imp", [0, 0, 0]),
+    ("tests/example7.imp", [1, 0, 2]),
+    ("tests/example9.imp", [20, 9]),
+    ("tests/exampleA.imp", []),
+    ("tests/exampleA-n.imp", []),
+    ("programs/program0.imp", [13]),
+    ("programs/program1.imp", [12, 18, 30, 45]),
+    ("programs/program2.imp", []),
+    ("programs/program3.imp", [340]),
+    ("programs/program3.imp", [1234567]),
+]
+
+
+def source(path):
+    with open(os.path.join(ROOT, path)) as file:
+        return file.read()
+
+
+def label(path, inputs):
+    text = " ".join(map(str, inputs))
+    if len(text) > 24:
+        text = text[:21] + "..."
+    return f"{os.path.basename(path)} [{text}]"
@@ -0,0 +1,39 @@
+#
+# Liczba komórek pamięci zajmowanych przez skompilowane programy.
+#
+# Dla każdego przykładu podaje liczbę komórek przydzielonych przez
+# memory.py (ramki procedur, iteratory FOR i zmienne o rozłącznych czasach
+# życia we wspólnych komórkach) i liczbę, którą zajmowałby program, gdyby
+# każdy symbol miał własne komórki. Druga
+# para kolumn dotyczy kompilacji bez wstawiania procedur (inline), gdy
+# procedury zachowują własne ramki.
+#
+# Sposób użycia: python benchmarks/memory.py
+#
+import os
+import sys
+
+from cases import CASES, source
+
+from kompilator import assemble_source
+
+
+def cells(code, disabled=()):
+    memory = assemble_source(code, disabled).memory
+    extra = len(memory.symbol_table.temporaries) + len(memory.symbol_table.consts)
+    return memory.size, 1 + memory.unshared + extra
+
+
+if __name__ == '__main__':
+    print(f"{'program':<20} {'komórki':>9} {'osobno':>8} {'bez inline':>11} {'osobno':>8}")
+    totals = [0, 0, 0, 0]
+    for path in sorted({path for path, _ in CASES}):
+        try:
+            code = source(path)
+            row = cells(code) + cells(code, ("inline",))
+        except Exception as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f"{os.path.basename(path):<20} {row[0]:>9} {row[1]:>8} {row[2]:>11} {row[3]:>8}")
+    print(f"{'razem':<20} {totals[0]:>9} {totals[1]:>8} {totals[2]:>11} {totals[3]:>8}")
@@ -0,0 +1,58 @@
+#
+# Oszczędność kosztu maszyny wirtualnej dzięki optymalizacjom kompilatora.
+#
+# Każdy przykład kompilowany jest dwukrotnie: z wyłączonymi wybranymi
+# optymalizacjami i ze wszystkimi, a następnie uruchamiany w symulatorze.
+#
+# Sposób użycia: python benchmarks/optimizations.py [nazwa ...]
+# (domyślnie porównywane są wszystkie optymalizacje z kompilator.OPTIMIZATIONS,
+# kompilator.IR_OPTIMIZATIONS i kompilator.CODE_OPTIMIZATIONS)
+#
+import sys
+
+from cases import CASES, source, label
+
+from kompilator import OPTIMIZATIONS, IR_OPTIMIZATIONS, CODE_OPTIMIZATIONS, compile_source
+from mw import parse_program
+from mw_blocks import BlockMachine
+
+
+def cost(text, inputs):
+    program, _ = parse_program(text)
+    return BlockMachine(program).run(inputs).cost
+
+
+def compare(disabled):
+    rows = []
+    for path, inputs in CASES:
+        try:
+            code = source(path)
+            before = cost(compile_source(code, disabled), inputs)
+            after = cost(compile_source(code), inputs)
+        except Exception as e:
+            print(f"{label(path, inputs)}: {e}", file=sys.stderr)
+            continue
+        rows.append((label(path, inputs), before, after))
+    return rows
+
+
+def report(rows, disabled):
+    print(f"Optymalizacje: {', '.join(disabled)}")
+    print(f"{'przykład':<40} {'bez':>12} {'z':>12} {'oszczędność':>12} {'%':>6}")
+    for name, before, after in rows:
+        saved = before - after
+        print(f"{name:<40} {before:>12,} {after:>12,} {saved:>12,} {100 * saved / (before or 1):>5.1f}%")
+    before = sum(row[1] for row in rows)
+    after = sum(row[2] for row in rows)
+    print(f"{'razem':<40} {before:>12,} {after:>12,} {before - after:>12,} {100 * (before - after) / (before or 1):>5.1f}%")
+
+
+if __name__ == '__main__':
+    # nazwa może wystąpić kilka razy (np. propagacja stałych po rozwinięciu pętli)
+    known = list(dict.fromkeys(name for name, _ in OPTIMIZATIONS + IR_OPTIMIZATIONS + CODE_OPTIMIZATIONS))
+    names = sys.argv[1:] or known
+    unknown = set(names) - set(known)
+    if unknown:
+        print(f"Nieznane optymalizacje: {', '.join(sorted(unknown))}", file=sys.stderr)
+        sys.exit(-1)
+    report(compare(names), names)
@@ -0,0 +1,27 @@
+#
+# Statystyki optymalizatora peephole: liczba rozkazów przed i po oraz
+# liczba zastosowań każdej reguły dla przykładowych programów.
+#
+# Sposób użycia: python benchmarks/peephole.py
+#
+from cases import CASES, source
+
+from kompilator import assemble_source
+from peephole import Peephole
+
+
+if __name__ == '__main__':
+    totals = {rule: 0 for rule in Peephole.RULES}
+    print(f"{'przykład':<20} {'przed':>7} {'po':>7}  reguły")
+    for path in dict.fromkeys(path for path, _ in CASES):
+        code = source(path)
+        before = len(assemble_source(code, ("peephole",)).instructions())
+        assembly = assemble_source(code)
+        statistics = assembly.statistics["peephole"]
+        for rule, count in statistics.items():
+            totals[rule] += count
+        rules = ", ".join(f"{rule} {count}" for rule, count in statistics.items() if count)
+        print(f"{path.split('/')[-1]:<20} {before:>7} {len(assembly.instructions()):>7}  {rules}")
+    print()
+    for rule, count in totals.items():
+        print(f"{rule:<22} {count:>5}")
@@ -0,0 +1,70 @@
+#
+# Czas kompilacji programów z wieloma procedurami i zmiennymi.
+#
+# Generuje program z zadaną liczbą procedur (domyślnie 100, 1000 i 3000);
+# każda ma kilka zmiennych lokalnych, tablicę, pętlę FOR i wywołuje dwie
+# wcześniejsze procedury. Mierzy czas całej kompilacji (z optymalizacjami)
+# i czas na jedną procedurę: przy liniowej złożoności tablicy symboli i
+# analizy semantycznej pozostaje on w przybliżeniu stały.
+#
+# Sposób użycia: python benchmarks/procedures.py [liczba procedur ...]
+#
+import random
+import sys
+import time
+
+import cases  # ścieżki do compiler/ i virtual_machine/
+
+from kompilator import compile_source
+
+SIZES = [100, 1000, 3000]
+LOCALS = ["a", "b", "c", "d"]
+
+
+def name(number):
+    # identyfikatory to same małe litery i podkreślenia
+    letters = ""
+    while True:
+        number, digit = divmod(number, 26)
+        letters = chr(ord("a") + digit) + letters
+        if number == 0:
+            return "p_" + letters
+
+
+def procedure(number, generator):
+    lines = [f"PROCEDURE {name(number)}(T t, n) IS {', '.join(LOCALS)}, u[1:4] BEGIN"]
+    lines += [f"  {local} := n + {value};" for value, local in enumerate(LOCALS)]
+    lines.append("  FOR i FROM 1 TO 4 DO")
+    lines.append(f"    u[i] := {generator.choice(LOCALS)} + i;")
+    lines.append("  ENDFOR")
+    if number > 0:
+        for callee in {number - 1, generator.randrange(number)}:
+            lines.append(f"  {name(callee)}(t, {generator.choice(LOCALS)});")
+    lines.append(f"  t[1] := u[2] + {generator.choice(LOCALS)};")
+    lines.append("END")
+    return lines
+
+
+def program(size, seed=0):
+    generator = random.Random(seed)
+    lines = []
+    for number in range(size):
+        lines += procedure(number, generator)
+    lines.append("PROGRAM IS t[1:1], n BEGIN")
+    lines.append("  READ n;")
+    lines.append(f"  {name(size - 1)}(t, n);")
+    lines.append("  WRITE t[1];")
+    lines.append("END")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(100000)
+    sizes = [int(argument) for argument in sys.argv[1:]] or SIZES
+    print(f"{'procedury':>10} {'razem [s]':>11} {'na procedurę [ms]':>18}")
+    for size in sizes:
+        source = program(size)
+        start = time.perf_counter()
+        compile_source(source)
+        total = time.perf_counter() - start
+        print(f"{size:>10} {total:>11.3f} {1000 * total / size:>18.3f}")
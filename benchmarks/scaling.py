@@ -0,0 +1,103 @@
+#
+# Czas kompilacji w zależności od długości programu.
+#
+# Generuje programy .imp z zadaną liczbą poleceń (domyślnie 1000, 10000
+# i 100000) - długie bloki przypisań, przeplatane pętlami i warunkami z
+# własnymi blokami - i mierzy czas leksera, parsera i całej kompilacji
+# (z optymalizacjami). Kolumny "na 1000" pokazują czas na tysiąc poleceń:
+# przy liniowej złożoności pozostają w przybliżeniu stałe.
+#
+# Sposób użycia: python benchmarks/scaling.py [liczba poleceń ...]
+#
+import random
+import sys
+import time
+
+import cases  # ścieżki do compiler/ i virtual_machine/
+
+from kompilator import compile_source
+from lexer import MyLexer
+from parser import MyParser
+
+SIZES = [1000, 10000, 100000]
+VARIABLES = ["a", "b", "c", "d", "e", "f", "g", "h"]
+OPERATORS = ["+", "-", "*", "/", "%"]
+
+
+class Generator:
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.count = 0
+
+    def value(self):
+        if self.random.random() < 0.3:
+            return str(self.random.randint(0, 100))
+        return self.random.choice(VARIABLES)
+
+    def assign(self, indent):
+        self.count += 1
+        target = self.random.choice(VARIABLES)
+        if self.random.random() < 0.7:
+            return f"{indent}{target} := {self.value()} {self.random.choice(OPERATORS)} {self.value()};"
+        return f"{indent}{target} := {self.value()};"
+
+    def block(self, size, indent):
+        # size poleceń, co pewien czas zagnieżdżonych w pętli lub warunku
+        lines = []
+        start = self.count
+        while self.count - start < size:
+            remaining = size - (self.count - start)
+            if remaining > 20 and self.random.random() < 0.01:
+                inner = self.random.randint(5, min(remaining // 2, 50))
+                self.count += 1
+                kind = self.random.choice(["if", "while", "for"])
+                if kind == "if":
+                    lines.append(f"{indent}IF {self.value()} < {self.value()} THEN")
+                    lines += self.block(inner, indent + "  ")
+                    lines.append(f"{indent}ENDIF")
+                elif kind == "while":
+                    lines.append(f"{indent}WHILE {self.random.choice(VARIABLES)} > 0 DO")
+                    lines += self.block(inner, indent + "  ")
+                    lines.append(f"{indent}ENDWHILE")
+                else:
+                    # iterator pętli zagnieżdżonej nie może przesłaniać zewnętrznego
+                    iterator = "i" * (len(indent) // 2)
+                    lines.append(f"{indent}FOR {iterator} FROM 1 TO {self.value()} DO")
+                    lines += self.block(inner, indent + "  ")
+                    lines.append(f"{indent}ENDFOR")
+            elif self.random.random() < 0.02:
+                self.count += 1
+                lines.append(f"{indent}WRITE {self.value()};")
+            else:
+                lines.append(self.assign(indent))
+        return lines
+
+
+def program(size, seed=0):
+    generator = Generator(seed)
+    lines = [f"PROGRAM IS {', '.join(VARIABLES)} BEGIN"]
+    lines += [f"  READ {name};" for name in VARIABLES]
+    lines += generator.block(size - len(VARIABLES), "  ")
+    lines.append("END")
+    return "\n".join(lines) + "\n"
+
+
+def measure(source):
+    start = time.perf_counter()
+    tokens = list(MyLexer().tokenize(source))
+    lexed = time.perf_counter()
+    MyParser().parse(iter(tokens))
+    parsed = time.perf_counter()
+    compile_source(source)
+    compiled = time.perf_counter()
+    return lexed - start, parsed - lexed, compiled - parsed
+
+
+if __name__ == '__main__':
+    sizes = [int(argument) for argument in sys.argv[1:]] or SIZES
+    print(f"{'polecenia':>10} {'lekser [s]':>11} {'parser [s]':>11} {'razem [s]':>11} "
+          f"{'parser na 1000':>15} {'razem na 1000':>14}")
+    for size in sizes:
+        lex, parse, total = measure(program(size))
+        print(f"{size:>10} {lex:>11.3f} {parse:>11.3f} {total:>11.3f} "
+              f"{1000 * parse / size:>15.4f} {1000 * total / size:>14.4f}")
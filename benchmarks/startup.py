@@ -0,0 +1,54 @@
+#
+# Czas uruchomienia kompilatora: zimny i ciepły start.
+#
+# Każdy pomiar to osobny proces "python compiler/kompilator.py wejście
+# wyjście" (tak jak w budowaniu wielu małych plików .imp). Zimny start -
+# bez zapisanych tablic parsera i leksera (tables.py), które trzeba wtedy
+# zbudować; ciepły - z tablicami wczytanymi z pliku. Podawana jest mediana
+# z kilku uruchomień. Program z błędem kończy kompilację przed
+# optymalizacjami, więc ich moduły nie są wtedy importowane.
+#
+# Sposób użycia: python benchmarks/startup.py [liczba uruchomień]
+#
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from cases import ROOT
+
+from tables import DIRECTORY
+
+PROGRAMS = ["tests/example1.imp", "programs/program2.imp", "tests/error1.imp"]
+REPEATS = 10
+COMPILER = os.path.join(ROOT, "compiler", "kompilator.py")
+
+
+def clear():
+    if os.path.isdir(DIRECTORY):
+        for name in os.listdir(DIRECTORY):
+            if name.endswith(".tables"):
+                os.remove(os.path.join(DIRECTORY, name))
+
+
+def run(program, output, cold):
+    if cold:
+        clear()
+    start = time.perf_counter()
+    subprocess.run([sys.executable, COMPILER, os.path.join(ROOT, program), output],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else REPEATS
+    print(f"{'program':<20} {'zimny [ms]':>11} {'ciepły [ms]':>12} {'różnica':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "out.mr")
+        for program in PROGRAMS:
+            cold = statistics.median(run(program, output, True) for _ in range(repeats))
+            warm = statistics.median(run(program, output, False) for _ in range(repeats))
+            print(f"{os.path.basename(program):<20} {1000 * cold:>11.1f} {1000 * warm:>12.1f} "
+                  f"{100 * (cold - warm) / cold:>8.1f}%")
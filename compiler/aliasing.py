@@ -0,0 +1,101 @@
+#
+# Przekazywanie parametrów skalarnych przez kopię (copy-in/copy-out).
+#
+# Parametry przekazywane są przez referencję, więc każde użycie parametru to
+# LOADI/STOREI. Jeśli parametr nie może wskazywać tej samej komórki co inny
+# parametr procedury, wynik jest taki sam, gdy procedura na wejściu skopiuje
+# wartość do własnej komórki, działa na niej zwykłymi LOAD/STORE, a przy
+# powrocie (tylko jeśli parametr mógł się zmienić) zapisze ją z powrotem.
+# Wywołujący nic nie zmieniają: w komórce parametru nadal jest adres.
+#
+# Dwa parametry mogą wskazywać tę samą komórkę, gdy w którymś wywołaniu
+# dostają tę samą zmienną albo parametry wywołującego, które same mogą się
+# pokrywać. Wywołujący są zdefiniowani po procedurze, więc wystarczy przejść
+# procedury od końca, zaczynając od PROGRAM. Kopię robimy tylko wtedy, gdy
+# zysk na użyciach (ważonych pętlami) przewyższa koszt kopiowania.
+#
+from ast_tree import *
+from constant_propagation import written_names
+from inliner import bodies, expressions, identifiers
+from usage import LOOP_WEIGHT
+
+# LOAD/STORE (10) zamiast LOADI/STOREI (20)
+USE_SAVING = 20 - 10
+# przekazanie kopii dalej: SET adresu kopii (50) zamiast LOAD parametru (10)
+PASS_COST = 50 - 10
+# LOADI parametru i STORE kopii na wejściu, LOAD kopii i STOREI przy powrocie
+COPY_COST = 20 + 10
+
+
+def scalar_parameters(procedure):
+    return [parameter for parameter in procedure.parameters if not isinstance(parameter, tuple)]
+
+
+def may_alias(program):
+    # procedura -> pary parametrów skalarnych, które mogą wskazywać tę samą komórkę
+    procedures = {procedure.name: procedure for procedure in program.procedures.procedures}
+    aliases = {name: set() for name in procedures}
+    calls(program.main.commands, set(), procedures, aliases)
+    for procedure in reversed(program.procedures.procedures):
+        calls(procedure.commands, aliases[procedure.name], procedures, aliases)
+    return aliases
+
+
+def calls(commands, caller_aliases, procedures, aliases):
+    for command in commands.commands:
+        if isinstance(command, ProcCall) and command.name in procedures:
+            callee = procedures[command.name]
+            actuals = [(parameter, arg) for parameter, arg in zip(callee.parameters, command.args)
+                       if not isinstance(parameter, tuple)]
+            for i, (first, first_arg) in enumerate(actuals):
+                for second, second_arg in actuals[i + 1:]:
+                    if first_arg == second_arg or frozenset((first_arg, second_arg)) in caller_aliases:
+                        aliases[callee.name].add(frozenset((first, second)))
+        for body in bodies(command):
+            calls(body, caller_aliases, procedures, aliases)
+
+
+def weighted_uses(commands, name, weight=1):
+    # (ważona liczba użyć parametru, ważona liczba przekazań dalej)
+    uses = passes = 0
+    for command in commands.commands:
+        for expression in expressions(command):
+            uses += weight * sum(1 for identifier in identifiers(expression) if identifier.name == name)
+        if isinstance(command, ProcCall):
+            passes += weight * command.args.count(name)
+        inner = weight * LOOP_WEIGHT if isinstance(command, (While, RepeatUntil, For)) else weight
+        for body in bodies(command):
+            body_uses, body_passes = weighted_uses(body, name, inner)
+            uses += body_uses
+            passes += body_passes
+    return uses, passes
+
+
+def assigned_first(commands, name):
+    # czy parametr jest przypisywany, zanim procedura go odczyta (wtedy nie
+    # trzeba kopiować wartości na wejściu)
+    for command in commands.commands:
+        if isinstance(command, Assign) and command.identifier.name == name and command.identifier.index is None:
+            return weighted_uses(Commands([Write(command.expression)]), name) == (0, 0)
+        if weighted_uses(Commands([command]), name) != (0, 0):
+            return False
+    return False
+
+
+def copied_parameters(program):
+    # procedura -> {parametr: (kopiować na wejściu, zapisać przy powrocie)}
+    aliases = may_alias(program)
+    copied = {}
+    for procedure in program.procedures.procedures:
+        written = written_names(procedure.commands)
+        chosen = {}
+        for name in scalar_parameters(procedure):
+            if any(name in pair for pair in aliases[procedure.name]):
+                continue
+            uses, passes = weighted_uses(procedure.commands, name)
+            copy_in = not assigned_first(procedure.commands, name)
+            copy_out = name in written
+            if USE_SAVING * uses - PASS_COST * passes > COPY_COST * (copy_in + copy_out):
+                chosen[name] = (copy_in, copy_out)
+        copied[procedure.name] = chosen
+    return copied
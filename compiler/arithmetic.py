@@ -0,0 +1,237 @@
+#
+# Procedury mnożenia, dzielenia i reszty dla maszyny bez tych rozkazów.
+#
+# Obie działają w O(log n) krokach: mnożenie metodą "dodaj i przesuń"
+# (HALF mnożnika, podwajanie mnożnej), dzielenie metodą "przesuń i odejmij"
+# (podwajanie dzielnika, potem połowienie z odejmowaniem). Wynik dzielenia
+# to podłoga ilorazu, a reszta ma znak dzielnika; x/0 = x%0 = 0.
+#
+# Procedury zapisują kod do podanego bufora Assembly i korzystają wyłącznie
+# z komórek przekazanych w cells, więc ten sam kod może być wstawiony w
+# miejscu użycia albo wygenerowany raz jako wspólny podprogram.
+#
+
+# operator -> rodzaj procedury
+ROUTINES = {'*': "mul", '/': "div", '%': "div"}
+
+MULTIPLY_CELLS = ("left", "right", "result", "half")
+DIVIDE_CELLS = ("left", "right", "quotient", "remainder", "divisor", "power")
+
+# przybliżona liczba rozkazów procedur (do decyzji o wstawianiu)
+MULTIPLY_SIZE = 48
+DIVIDE_SIZE = 60
+
+
+def negate(code, cell):
+    # acc = -p[cell] bez stałych: x - x - x
+    code.emit("LOAD", cell)
+    code.emit("SUB", cell)
+    code.emit("SUB", cell)
+
+
+def emit_multiply(code, cells, variant=()):
+    # wejście: left, right; wynik: akumulator
+    # variant (ranges.py): "unsigned" - oba argumenty nieujemne
+    a, b, r, t = (cells[name] for name in MULTIPLY_CELLS)
+    b_positive = code.new_label("mul_bpos")
+    a_positive = code.new_label("mul_apos")
+    swap_negative = code.new_label("mul_swapneg")
+    swap = code.new_label("mul_swap")
+    start = code.new_label("mul_start")
+    loop = code.new_label("mul_loop")
+    even = code.new_label("mul_even")
+    zero = code.new_label("mul_zero")
+
+    if "unsigned" in variant:
+        # mnożnikiem (right) zostaje mniejszy z argumentów
+        code.emit("LOAD", a)
+        code.emit("SUB", b)
+        code.jump("JPOS", start)
+        code.jump("JZERO", start)
+    else:
+        # mnożnik (right) musi być dodatni i nie większy od |mnożnej|
+        code.emit("LOAD", b)
+        code.jump("JPOS", b_positive)
+        code.jump("JZERO", zero)
+        negate(code, a)
+        code.emit("STORE", a)
+        negate(code, b)
+        code.emit("STORE", b)
+        code.place(b_positive)
+        code.emit("LOAD", a)
+        code.jump("JPOS", a_positive)
+        code.jump("JZERO", zero)
+        code.emit("ADD", b)
+        code.jump("JPOS", swap_negative)
+        code.jump("JUMP", start)
+        code.place(swap_negative)
+        # |a| < b: (a, b) := (-b, -a)
+        negate(code, a)
+        code.emit("STORE", t)
+        negate(code, b)
+        code.emit("STORE", a)
+        code.emit("LOAD", t)
+        code.emit("STORE", b)
+        code.jump("JUMP", start)
+        code.place(a_positive)
+        code.emit("SUB", b)
+        code.jump("JNEG", swap)
+        code.jump("JUMP", start)
+        code.place(swap)
+    code.emit("LOAD", a)
+    code.emit("STORE", t)
+    code.emit("LOAD", b)
+    code.emit("STORE", a)
+    code.emit("LOAD", t)
+    code.emit("STORE", b)
+
+    code.place(start)
+    code.emit("LOAD", b)
+    code.emit("SUB", b)
+    code.emit("STORE", r)
+    code.place(loop)
+    code.emit("LOAD", b)
+    code.emit("HALF")
+    code.emit("STORE", t)
+    code.emit("ADD", t)
+    code.emit("SUB", b)
+    code.jump("JZERO", even)
+    code.emit("LOAD", r)
+    code.emit("ADD", a)
+    code.emit("STORE", r)
+    code.place(even)
+    code.emit("LOAD", a)
+    code.emit("ADD", a)
+    code.emit("STORE", a)
+    code.emit("LOAD", t)
+    code.emit("STORE", b)
+    code.jump("JPOS", loop)
+    code.emit("LOAD", r)
+    if "unsigned" not in variant:
+        code.place(zero)
+
+
+def emit_divide(code, cells, variant=()):
+    # wejście: left, right; wynik: quotient i remainder w pamięci
+    # (opcjonalna komórka "one" przechowuje stałą 1)
+    # variant (ranges.py): "unsigned" - oba argumenty nieujemne,
+    # "nonzero" - dzielnik różny od zera
+    unsigned = "unsigned" in variant
+    a, b, q, r, d, p = (cells[name] for name in DIVIDE_CELLS)
+    a_positive = code.new_label("div_apos")
+    b_positive = code.new_label("div_bpos")
+    scale = code.new_label("div_scale")
+    down = code.new_label("div_down")
+    signs = code.new_label("div_signs")
+    a_negative = code.new_label("div_aneg")
+    both_negative = code.new_label("div_bneg")
+    negate_minus_one = code.new_label("div_negq1")
+    negate_quotient = code.new_label("div_negq")
+    zero = code.new_label("div_zero")
+    end = code.new_label("div_end")
+
+    # remainder = |a|, divisor = |b|
+    code.emit("LOAD", a)
+    if not unsigned:
+        code.jump("JPOS", a_positive)
+        code.jump("JZERO", zero)
+        code.emit("SUB", a)
+        code.emit("SUB", a)
+        code.place(a_positive)
+    code.emit("STORE", r)
+    code.emit("LOAD", b)
+    if unsigned:
+        if "nonzero" not in variant:
+            code.jump("JZERO", zero)
+    else:
+        code.jump("JPOS", b_positive)
+        if "nonzero" not in variant:
+            code.jump("JZERO", zero)
+        code.emit("SUB", b)
+        code.emit("SUB", b)
+        code.place(b_positive)
+    code.emit("STORE", d)
+    if "one" in cells:
+        code.emit("LOAD", cells["one"])
+    else:
+        code.emit("SET", 1)
+    code.emit("STORE", p)
+    code.emit("SUB", p)
+    code.emit("STORE", q)
+
+    # podwajanie dzielnika, aż przekroczy dzielną
+    code.place(scale)
+    code.emit("LOAD", d)
+    code.emit("SUB", r)
+    code.jump("JPOS", down)
+    code.emit("LOAD", d)
+    code.emit("ADD", d)
+    code.emit("STORE", d)
+    code.emit("LOAD", p)
+    code.emit("ADD", p)
+    code.emit("STORE", p)
+    code.jump("JUMP", scale)
+
+    # połowienie z odejmowaniem; po wyjściu power = 1
+    code.place(down)
+    code.emit("LOAD", p)
+    code.emit("HALF")
+    code.jump("JZERO", end if unsigned else signs)
+    code.emit("STORE", p)
+    code.emit("LOAD", d)
+    code.emit("HALF")
+    code.emit("STORE", d)
+    code.emit("LOAD", r)
+    code.emit("SUB", d)
+    code.jump("JNEG", down)
+    code.emit("STORE", r)
+    code.emit("LOAD", q)
+    code.emit("ADD", p)
+    code.emit("STORE", q)
+    code.jump("JUMP", down)
+
+    if unsigned:
+        if "nonzero" not in variant:
+            code.place(zero)
+            code.emit("STORE", q)
+            code.emit("STORE", r)
+        code.place(end)
+        return
+
+    # poprawka znaków (podłoga ilorazu, reszta ze znakiem dzielnika)
+    code.place(signs)
+    code.emit("LOAD", a)
+    code.jump("JNEG", a_negative)
+    code.emit("LOAD", b)
+    code.jump("JPOS", end)
+    code.emit("LOAD", r)
+    code.jump("JZERO", negate_quotient)
+    code.emit("ADD", b)
+    code.emit("STORE", r)
+    code.jump("JUMP", negate_minus_one)
+    code.place(a_negative)
+    code.emit("LOAD", b)
+    code.jump("JNEG", both_negative)
+    code.emit("LOAD", r)
+    code.jump("JZERO", negate_quotient)
+    code.emit("LOAD", b)
+    code.emit("SUB", r)
+    code.emit("STORE", r)
+    code.jump("JUMP", negate_minus_one)
+    code.place(both_negative)
+    negate(code, r)
+    code.emit("STORE", r)
+    code.jump("JUMP", end)
+    code.place(negate_minus_one)
+    negate(code, q)
+    code.emit("SUB", p)
+    code.emit("STORE", q)
+    code.jump("JUMP", end)
+    code.place(negate_quotient)
+    negate(code, q)
+    code.emit("STORE", q)
+    code.jump("JUMP", end)
+    code.place(zero)
+    code.emit("STORE", q)
+    code.emit("STORE", r)
+    code.place(end)
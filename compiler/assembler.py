@@ -0,0 +1,220 @@
+#
+# Bufor rozkazów maszyny wirtualnej z etykietami.
+#
+# Skoki odwołują się do etykiet, a nie do przesunięć, więc rozkazy można
+# dopisywać i usuwać dowolnie - przesunięcia liczone są dopiero w resolve().
+# Każdy rozkaz pamięta zakres (procedurę lub PROGRAM) i linię źródła, z której
+# powstał; to_text() zapisuje je w komentarzu "# @zakres:linia".
+#
+JUMPS = {"JUMP", "JPOS", "JZERO", "JNEG"}
+NO_ARGUMENT = {"HALF", "HALT"}
+# rozkazy, po których akumulator ma tę samą wartość (GET 0 obsługiwany osobno)
+KEEPS_ACCUMULATOR = {"STORE", "STOREI", "PUT", "GET", "JUMP", "JPOS", "JZERO", "JNEG", "RTRN", "HALT"}
+# rozkazy, za którymi do następnej etykiety nie da się dojść
+TERMINATORS = {"JUMP", "RTRN", "HALT"}
+MAIN_SCOPE = "PROGRAM"
+# koszt wykonania rozkazu w maszynie wirtualnej
+COSTS = {"GET": 100, "PUT": 100, "LOAD": 10, "STORE": 10, "LOADI": 20, "STOREI": 20, "ADD": 10, "SUB": 10,
+         "ADDI": 20, "SUBI": 12, "SET": 50, "HALF": 5, "JUMP": 1, "JPOS": 1, "JZERO": 1, "JNEG": 1,
+         "RTRN": 10, "HALT": 0}
+
+
+class Label:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class Instruction:
+    def __init__(self, op, arg=None, target=None, scope=None, line=None):
+        self.op = op
+        self.arg = arg
+        # etykieta celu skoku lub (dla SET) etykieta, której adres ładujemy
+        self.target = target
+        self.scope = scope
+        self.line = line
+
+    def annotation(self):
+        line = "-" if self.line is None else self.line
+        return f"@{self.scope}:{line}"
+
+    def __str__(self):
+        if self.op in NO_ARGUMENT:
+            return self.op
+        return f"{self.op} {self.target if self.arg is None else self.arg}"
+
+
+class Accumulator:
+    # co wiadomo o akumulatorze: opis wartości i komórki o tej samej wartości
+    def __init__(self, value=None, mirrors=(), reachable=True):
+        # ("const", v) - stała, ("indirect", x) - wartość p[p[x]], None - nieznana
+        self.value = value
+        self.mirrors = set(mirrors)
+        self.reachable = reachable
+
+    def copy(self):
+        return Accumulator(self.value, self.mirrors, self.reachable)
+
+    def meet(self, other):
+        if not self.reachable:
+            return other.copy()
+        if not other.reachable:
+            return self.copy()
+        return Accumulator(self.value if self.value == other.value else None, self.mirrors & other.mirrors)
+
+    def update(self, op, arg):
+        if op == "SET":
+            self.value, self.mirrors = ("const", arg), set()
+        elif op == "LOAD":
+            if arg != 0:
+                self.value, self.mirrors = None, {arg}
+        elif op == "STORE":
+            if self.value == ("indirect", arg):
+                self.value = None
+            if arg != 0:
+                self.mirrors.add(arg)
+        elif op == "STOREI":
+            # zapisana komórka dostaje wartość akumulatora, więc kopie pozostają
+            # aktualne; zmienić się mogła jedynie wartość innego p[p[x]]
+            if self.value is None or self.value[0] == "indirect":
+                self.value = ("indirect", arg)
+        elif op == "LOADI":
+            self.value, self.mirrors = (("indirect", arg) if arg != 0 else None), set()
+        elif op == "GET":
+            if arg == 0:
+                self.value, self.mirrors = None, set()
+            else:
+                self.mirrors.discard(arg)
+                if self.value and self.value[0] == "indirect":
+                    self.value = None
+        elif op in TERMINATORS:
+            self.value, self.mirrors, self.reachable = None, set(), False
+        elif op not in KEEPS_ACCUMULATOR:
+            self.value, self.mirrors = None, set()
+
+
+class Assembly:
+    def __init__(self):
+        self.items = []
+        self.scope = MAIN_SCOPE
+        self.line = None
+        self.label_count = 0
+        # stan akumulatora w bieżącym miejscu kodu
+        self.state = Accumulator()
+        # etykieta -> stany akumulatora w skokach do niej (dla punktów złączenia)
+        self.incoming = {}
+        self.joined = set()
+        # statystyki optymalizacji kodu (nazwa -> {reguła: liczba})
+        self.statistics = {}
+        # przydział pamięci programu (memory.MemoryMap)
+        self.memory = None
+
+    @property
+    def accumulator(self):
+        return self.state.value
+
+    @accumulator.setter
+    def accumulator(self, value):
+        self.state.value = value
+
+    def holds(self, cell):
+        # czy komórka ma tę samą wartość co akumulator
+        return cell in self.state.mirrors
+
+    def new_label(self, hint="L"):
+        self.label_count += 1
+        return Label(f"{hint}{self.label_count}")
+
+    def emit(self, op, arg=None):
+        instruction = Instruction(op, arg, scope=self.scope, line=self.line)
+        self.items.append(instruction)
+        self.state.update(op, arg)
+        return instruction
+
+    def jump(self, op, label):
+        if label in self.joined:
+            raise Exception(f"Internal error: jump to join label {label} after it was placed.")
+        instruction = Instruction(op, target=label, scope=self.scope, line=self.line)
+        self.items.append(instruction)
+        self.incoming.setdefault(label, []).append(self.state.copy())
+        self.state.update(op, None)
+        return instruction
+
+    def set_address(self, label):
+        # SET z bezwzględnym adresem etykiety (adres powrotu z procedury)
+        instruction = Instruction("SET", target=label, scope=self.scope, line=self.line)
+        self.items.append(instruction)
+        self.state.update("LOADI", None)
+        return instruction
+
+    def place(self, label):
+        # do etykiety można doskoczyć z dowolnym akumulatorem
+        self.items.append(label)
+        self.state = Accumulator()
+        return label
+
+    def assume(self, value=None, mirrors=()):
+        # stan akumulatora zapewniony przez generator (np. na początku pętli)
+        self.state = Accumulator(value, mirrors)
+
+    def place_join(self, label):
+        # etykieta, do której wszystkie skoki zostały już wygenerowane: stan
+        # akumulatora to część wspólna stanów ze skoków i z poprzedniego rozkazu
+        self.items.append(label)
+        state = self.state
+        for incoming in self.incoming.pop(label, []):
+            state = state.meet(incoming)
+        self.state = state if state.reachable else Accumulator()
+        self.joined.add(label)
+        return label
+
+    def checkpoint(self):
+        # punkt, do którego można wycofać próbnie wygenerowany kod bez skoków
+        return len(self.items), self.state.copy()
+
+    def cost_since(self, checkpoint):
+        return sum(COSTS[item.op] for item in self.items[checkpoint[0]:] if isinstance(item, Instruction))
+
+    def rollback(self, checkpoint):
+        position, state = checkpoint
+        del self.items[position:]
+        self.state = state
+
+    def instructions(self):
+        return [item for item in self.items if isinstance(item, Instruction)]
+
+    def addresses(self):
+        positions = {}
+        address = 0
+        for item in self.items:
+            if isinstance(item, Label):
+                positions[item] = address
+            else:
+                address += 1
+        return positions
+
+    def resolve(self):
+        positions = self.addresses()
+        resolved = []
+        for item in self.items:
+            if isinstance(item, Label):
+                continue
+            arg = item.arg
+            if item.target is not None:
+                target = positions[item.target]
+                arg = target - len(resolved) if item.op in JUMPS else target
+            elif item.op in NO_ARGUMENT:
+                arg = 0
+            resolved.append(Instruction(item.op, arg, scope=item.scope, line=item.line))
+        return resolved
+
+    def to_text(self, annotate=True):
+        lines = []
+        for instruction in self.resolve():
+            text = str(instruction)
+            if annotate:
+                text += f"\t# {instruction.annotation()}"
+            lines.append(text)
+        return "\n".join(lines) + "\n"
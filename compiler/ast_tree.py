@@ -1,4 +1,13 @@
+from copy import deepcopy
+
+# typy wartości kopiowane przez deepcopy bez zmian
+ATOMIC = (int, str, bool, type(None))
+# klasa węzła -> nazwy jej pól (fields)
+FIELDS = {}
+
 class AST:
+    __slots__ = ("root",)
+
     def __init__(self, program):
         self.root = program
 
@@ -6,9 +15,40 @@ class AST:
         return f"AST:\n{self.root}"
 
 class ASTNode:
-    pass
+    # Węzły mają stałe zestawy pól (__slots__), bez słownika atrybutów.
+    # lineno i column to pozycja w pliku źródłowym (kolumny od 1), ustawiana
+    # przez parser; w węzłach tworzonych przez optymalizacje może jej nie być.
+    __slots__ = ("lineno", "column")
+
+    def __getattr__(self, name):
+        # wywoływane tylko dla pól bez wartości
+        if name in ("lineno", "column", "origin"):
+            return None
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __deepcopy__(self, memo):
+        node_class = type(self)
+        copied = node_class.__new__(node_class)
+        memo[id(self)] = copied
+        for name in fields(node_class):
+            value = getattr(self, name)
+            setattr(copied, name, value if type(value) in ATOMIC else deepcopy(value, memo))
+        return copied
+
+    def located(self, node):
+        # pozycja taka jak węzła node
+        self.lineno, self.column = node.lineno, node.column
+        return self
+
+def fields(node_class):
+    # wszystkie pola węzłów klasy node_class (z klasami bazowymi)
+    if node_class not in FIELDS:
+        FIELDS[node_class] = [name for base in node_class.__mro__ for name in base.__dict__.get("__slots__", ())]
+    return FIELDS[node_class]
 
 class Program(ASTNode):
+    __slots__ = ("procedures", "main")
+
     def __init__(self, procedures, main):
         self.procedures = procedures
         self.main = main
@@ -17,6 +57,8 @@ class Program(ASTNode):
         return f"Program:\nProcedures:\n{self.procedures}\nMain:\n{self.main}"
 
 class Procedures(ASTNode):
+    __slots__ = ("procedures",)
+
     def __init__(self, procedures=None):
         self.procedures = procedures or []
 
@@ -24,6 +66,8 @@ class Procedures(ASTNode):
         return "\n".join([str(proc) for proc in self.procedures])
 
 class Procedure(ASTNode):
+    __slots__ = ("name", "parameters", "declarations", "commands")
+
     def __init__(self, name, parameters, declarations, commands):
         self.name = name
         self.parameters = parameters
@@ -36,6 +80,8 @@ class Procedure(ASTNode):
         return f"Procedure {self.name}({params}):\nDeclarations:\n{decls}\nCommands:\n{self.commands}"
 
 class Main(ASTNode):
+    __slots__ = ("declarations", "commands")
+
     def __init__(self, declarations, commands):
         self.declarations = declarations
         self.commands = commands
@@ -45,6 +91,8 @@ class Main(ASTNode):
         return f"Main:\nDeclarations:\n{decls}\nCommands:\n{self.commands}"
 
 class Commands(ASTNode):
+    __slots__ = ("commands",)
+
     def __init__(self, commands):
         self.commands = commands
 
@@ -52,9 +100,19 @@ class Commands(ASTNode):
         return "\n".join(str(command) for command in self.commands)
 
 class Command(ASTNode):
-    pass
+    # origin - nazwa procedury, z której ciała polecenie wstawiono (inliner.py);
+    # None dla poleceń zakresu, w którym leżą
+    __slots__ = ("origin",)
+
+    def located(self, node):
+        # pozycja i pochodzenie takie jak węzła node
+        super().located(node)
+        self.origin = node.origin
+        return self
 
 class Assign(Command):
+    __slots__ = ("identifier", "expression")
+
     def __init__(self, identifier, expression):
         self.identifier = identifier
         self.expression = expression
@@ -63,6 +121,8 @@ class Assign(Command):
         return f"Assign {self.identifier} = {self.expression}"
 
 class If(Command):
+    __slots__ = ("condition", "true_commands", "false_commands")
+
     def __init__(self, condition, true_commands, false_commands=None):
         self.condition = condition
         self.true_commands = true_commands
@@ -73,6 +133,8 @@ class If(Command):
         return f"If {self.condition} Then:\n{self.true_commands}\n{false_part}"
 
 class While(Command):
+    __slots__ = ("condition", "commands")
+
     def __init__(self, condition, commands):
         self.condition = condition
         self.commands = commands
@@ -81,6 +143,8 @@ class While(Command):
         return f"While {self.condition} Do:\n{self.commands}"
 
 class RepeatUntil(Command):
+    __slots__ = ("commands", "condition")
+
     def __init__(self, commands, condition):
         self.commands = commands
         self.condition = condition
@@ -89,17 +153,23 @@ class RepeatUntil(Command):
         return f"Repeat:\n{self.commands}\nUntil {self.condition}"
 
 class For(Command):
+    __slots__ = ("iterator", "start_value", "end_value", "direction", "commands", "symbol")
+
     def __init__(self, iterator, start_value, end_value, direction, commands):
         self.iterator = iterator
         self.start_value = start_value
         self.end_value = end_value
         self.direction = direction
         self.commands = commands
+        # symbol_table.Iterator, ustawiany przez analizę semantyczną (semantics.py)
+        self.symbol = None
 
     def __str__(self):
         return f"For {self.iterator} From {self.start_value} {self.direction} {self.end_value} Do:\n{self.commands}"
 
 class Read(Command):
+    __slots__ = ("identifier",)
+
     def __init__(self, identifier):
         self.identifier = identifier
 
@@ -107,6 +177,8 @@ class Read(Command):
         return f"Read {self.identifier}"
 
 class Write(Command):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -114,15 +186,22 @@ class Write(Command):
         return f"Write {self.value}"
 
 class ProcCall(Command):
+    __slots__ = ("name", "args", "procedure", "arguments")
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
+        # symbole wywoływanej procedury i argumentów (semantics.py)
+        self.procedure = None
+        self.arguments = None
 
     def __str__(self):
         args_str = ", ".join(str(arg) for arg in self.args)
         return f"Call {self.name}({args_str})"
 
 class Declaration(ASTNode):
+    __slots__ = ("name", "array_bounds")
+
     def __init__(self, name, array_bounds=None):
         self.name = name
         self.array_bounds = array_bounds
@@ -133,6 +212,8 @@ class Declaration(ASTNode):
         return f"Variable {self.name}"
 
 class Condition(ASTNode):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -142,9 +223,11 @@ class Condition(ASTNode):
         return f"{self.left} {self.operator} {self.right}"
 
 class Expression(ASTNode):
-    pass
+    __slots__ = ()
 
 class Operation(Expression):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -154,17 +237,23 @@ class Operation(Expression):
         return f"({self.left} {self.operator} {self.right})"
 
 class Value(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
     def __str__(self):
         return str(self.value)
 
-class Identifier:
+class Identifier(Expression):
+    __slots__ = ("name", "index", "scope", "symbol")
+
     def __init__(self, name, index=None, scope="global"):
         self.name = name
         self.index = index
         self.scope = scope
+        # symbol nazwy (symbol_table), ustawiany przez analizę semantyczną (semantics.py)
+        self.symbol = None
 
     def __str__(self):
         if self.index:
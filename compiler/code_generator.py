@@ -0,0 +1,659 @@
+from ast_tree import *
+from symbol_table import SymbolTable, Array, Variable, Iterator, Parameter
+from assembler import Assembly, MAIN_SCOPE
+from conditions import MIRRORED, jumps
+from ir import Jump, Branch, ForTest, Element, Reduction, Routine, lower
+from fusion import fused_divisions
+from aliasing import copied_parameters
+from arithmetic import ROUTINES, MULTIPLY_CELLS, DIVIDE_CELLS, MULTIPLY_SIZE, DIVIDE_SIZE, emit_multiply, emit_divide
+from usage import Usage
+from semantics import CompilerError, Semantics
+from memory import allocate
+
+ROUTINE_CELLS = {"mul": MULTIPLY_CELLS, "div": DIVIDE_CELLS}
+ROUTINE_SIZES = {"mul": MULTIPLY_SIZE, "div": DIVIDE_SIZE}
+ROUTINE_EMITTERS = {"mul": emit_multiply, "div": emit_divide}
+
+# koszt wywołania wspólnej procedury: SET powrotu, STORE, JUMP i RTRN
+CALL_COST = 50 + 10 + 1 + 10
+# koszt jednego dodatkowego rozkazu wstawionej procedury (w jednostkach kosztu)
+SIZE_COST = 2
+# górna granica łącznej liczby rozkazów wstawionych procedur
+INLINE_BUDGET = 600
+
+# stała w pamięci: LOAD (10) zamiast SET (50) przy każdym użyciu,
+# za jednorazowe SET i STORE na początku programu
+POOL_SAVING = 50 - 10
+POOL_COST = 50 + 10
+
+
+class CodeGenerator:
+    def __init__(self, ast, symbol_table=None, validated=False, passes=()):
+        self.ast = ast
+        # drzewo po optymalizacjach: kontrola inicjalizacji odbyła się na oryginale
+        self.validated = validated
+        # optymalizacje grafu przepływu sterowania (ir.CFG) przed wyborem rozkazów
+        self.passes = passes
+        self.symbol_table = symbol_table or SymbolTable()
+        self.code = Assembly()
+        self.scope = None  # bieżąca procedura (symbol_table.Procedure) lub None dla PROGRAM
+        # szacowana liczba wykonań bieżącego polecenia (usage.py)
+        self.weight = 1
+        self.routine_sites = {kind: 0 for kind in ROUTINE_CELLS}
+        self.procedure_weights = {}
+        self.pooled = {}  # stała -> komórka zainicjowana na początku programu
+        self.routine_labels = {}
+        self.inlined_size = 0
+        self.fused = set()
+        self.copied = {}
+        self.for_modes = {}  # pętla For -> ir.ForTest.mode
+
+    def generate(self):
+        return self.assemble().to_text()
+
+    def assemble(self):
+        self.generate_program(self.ast.root)
+        return self.code
+
+    def check(self):
+        # sama analiza semantyczna (deklaracje i semantics.py), bez kodu
+        program = self.ast.root
+        for procedure in program.procedures.procedures:
+            self.declare_procedure(procedure, lower(procedure))
+        self.scope = None
+        self.declare(program.main.declarations)
+        Semantics(self.symbol_table, None, self.validated).run(lower(program.main))
+
+    def generate_program(self, program):
+        # grafy przepływu sterowania po optymalizacjach, zanim powstanie kod
+        cfgs = [self.lower(procedure) for procedure in program.procedures.procedures]
+        main_cfg = self.lower(program.main)
+        for cfg in cfgs + [main_cfg]:
+            self.fused |= fused_divisions(cfg)
+        self.copied = copied_parameters(program)
+        usage = Usage(program, self.fused)
+        self.routine_sites = usage.routine_sites
+        self.procedure_weights = usage.procedure_weights
+        # symbole całego programu, a gdy znany jest już graf wywołań - ich adresy
+        symbols = [self.declare_procedure(procedure, cfg) for procedure, cfg in zip(program.procedures.procedures, cfgs)]
+        self.scope = None
+        self.declare(program.main.declarations)
+        Semantics(self.symbol_table, None, self.validated).run(main_cfg)
+        self.code.memory = allocate(self.symbol_table, list(zip(symbols, cfgs)), main_cfg, self.copied)
+        self.pool_constants(usage.constants)
+        main_label = self.code.new_label("main")
+        if program.procedures.procedures:
+            self.code.jump("JUMP", main_label)
+        for procedure, symbol, cfg in zip(program.procedures.procedures, symbols, cfgs):
+            self.generate_procedure(procedure, symbol, cfg)
+
+        self.weight = 1
+        self.code.scope = MAIN_SCOPE
+        self.code.line = program.main.lineno
+        self.code.place(main_label)
+        self.generate_cfg(main_cfg)
+        self.code.line = None
+        self.code.emit("HALT")
+        self.generate_routines()
+        self.generate_constants()
+
+    def declare_procedure(self, procedure, cfg):
+        try:
+            symbol = self.symbol_table.add_procedure(procedure.name, procedure.parameters)
+        except Exception as e:
+            raise CompilerError(f"{e} Line {procedure.lineno}.")
+        self.scope = symbol
+        self.declare(procedure.declarations)
+        symbol.label = self.code.new_label(procedure.name)
+        # parametry przekazywane przez kopię
+        for name in self.copied.get(procedure.name, {}):
+            self.symbol_table.add_parameter_copy(name, symbol)
+        Semantics(self.symbol_table, symbol, self.validated).run(cfg)
+        return symbol
+
+    def generate_procedure(self, procedure, symbol, cfg):
+        self.code.scope = procedure.name
+        self.code.line = procedure.lineno
+        self.weight = self.procedure_weights.get(procedure.name, 0)
+        self.code.place(symbol.label)
+        copied = self.copied.get(procedure.name, {})
+        for name, (copy_in, _) in copied.items():
+            copy = symbol.copies[name]
+            if copy_in:
+                self.code.emit("LOADI", symbol.parameters[name].memory_index)
+                self.code.emit("STORE", copy.memory_index)
+        self.generate_cfg(cfg)
+        self.code.line = None
+        for name, (_, copy_out) in copied.items():
+            if copy_out:
+                self.code.emit("LOAD", symbol.copies[name].memory_index)
+                self.code.emit("STOREI", symbol.parameters[name].memory_index)
+        self.code.emit("RTRN", symbol.return_address)
+        symbol.commands = procedure.commands
+
+    def declare(self, declarations):
+        for declaration in declarations:
+            try:
+                if declaration.array_bounds:
+                    self.symbol_table.add_array(declaration.name, *declaration.array_bounds, self.scope)
+                else:
+                    self.symbol_table.add_variable(declaration.name, self.scope)
+            except Exception as e:
+                raise CompilerError(f"{e} Line {declaration.lineno}.")
+
+    def temporary(self, name):
+        return self.symbol_table.add_temporary(name)
+
+    def pool_constants(self, weights):
+        # stałe używane na tyle często, że opłaca się je trzymać w pamięci
+        for value in sorted(weights):
+            if POOL_SAVING * weights[value] > POOL_COST:
+                self.pooled[value] = self.symbol_table.add_const(value)
+
+    def generate_constants(self):
+        # Inicjalizacja stałych na początku programu. Dopisywana na końcu
+        # generowania, bo bazy tablic trafiają do pamięci dopiero przy
+        # pierwszym odwołaniu (array_base).
+        prologue = Assembly()
+        for value, cell in sorted(self.pooled.items()):
+            prologue.emit("SET", value)
+            prologue.emit("STORE", cell)
+        self.code.items[:0] = prologue.items
+
+    def load_constant(self, value):
+        if self.code.accumulator == ("const", value):
+            return
+        if value in self.pooled:
+            self.code.emit("LOAD", self.pooled[value])
+            self.code.accumulator = ("const", value)
+        else:
+            self.code.emit("SET", value)
+
+
+    # Runtime routines
+    def routine_cells(self, kind):
+        cells = {name: self.temporary(f"{kind}_{name}") for name in ROUTINE_CELLS[kind] + ("return",)}
+        if 1 in self.pooled:
+            cells["one"] = self.pooled[1]
+        return cells
+
+    def inline_routine(self, kind):
+        # wstawiamy procedurę, gdy oszczędność na wywołaniach (ważona
+        # szacowaną liczbą wykonań) przewyższa koszt powielenia kodu
+        size = ROUTINE_SIZES[kind]
+        if self.inlined_size + size > INLINE_BUDGET:
+            return False
+        if self.routine_sites[kind] > 1 and CALL_COST * self.weight < SIZE_COST * size:
+            return False
+        self.inlined_size += size
+        return True
+
+    def call_routine(self, kind, cells, variant=()):
+        # variant: wariant procedury z ir.Routine (każdy ma osobną kopię)
+        if self.inline_routine(kind):
+            ROUTINE_EMITTERS[kind](self.code, cells, variant)
+            return
+        if (kind, variant) not in self.routine_labels:
+            self.routine_labels[(kind, variant)] = self.code.new_label("_".join((kind,) + variant))
+        return_label = self.code.new_label("return")
+        self.code.set_address(return_label)
+        self.code.emit("STORE", cells["return"])
+        self.code.jump("JUMP", self.routine_labels[(kind, variant)])
+        self.code.place(return_label)
+
+    def generate_routines(self):
+        # wspólne procedury arytmetyczne za HALT, każda we własnym zakresie
+        for (kind, variant), label in self.routine_labels.items():
+            cells = self.routine_cells(kind)
+            self.code.scope = kind.upper()
+            self.code.place(label)
+            ROUTINE_EMITTERS[kind](self.code, cells, variant)
+            self.code.emit("RTRN", cells["return"])
+
+
+    # Control flow graph
+    def lower(self, scope):
+        cfg = lower(scope)
+        for optimization in self.passes:
+            optimization(cfg)
+        return cfg
+
+    def generate_cfg(self, cfg):
+        # Bloki w kolejności z ir.py, więc przejście do następnego bloku nie
+        # wymaga skoku. Blok, do którego prowadzą tylko wcześniejsze bloki, dostaje
+        # stan akumulatora z ich skoków (place_join); do pozostałych wraca pętla.
+        base_weight = self.weight
+        predecessors = cfg.predecessors()
+        positions = {block: position for position, block in enumerate(cfg.blocks)}
+        labels = {block: self.code.new_label(block.name) for block in cfg.blocks}
+        self.for_modes.update((block.terminator.command, block.terminator.mode)
+                              for block in cfg.blocks if isinstance(block.terminator, ForTest))
+        for position, block in enumerate(cfg.blocks):
+            following = cfg.blocks[position + 1] if position + 1 < len(cfg.blocks) else None
+            self.weight = base_weight * block.weight
+            if block.resident is not None:
+                self.place_loop(labels[block], block.resident)
+            elif any(positions[predecessor] >= position for predecessor in predecessors[block]):
+                self.code.place(labels[block])
+            elif position > 0:
+                self.code.place_join(labels[block])
+            for statement in block.statements:
+                self.generate_at(statement, getattr(self, "generate_" + statement.kind), statement.command)
+            if block.terminator:
+                self.generate_at(block.terminator, self.generate_terminator, block.terminator, following, labels)
+        self.weight = base_weight
+
+    def generate_at(self, item, generate, *args):
+        # rozkazy opisane linią polecenia item i procedurą, z której pochodzi
+        saved = self.code.scope, self.code.line
+        self.code.scope = item.origin or self.code.scope
+        self.code.line = item.line
+        try:
+            generate(*args)
+        except CompilerError:
+            raise
+        except Exception as e:
+            raise CompilerError(f"{e} Line {item.line}.")
+        finally:
+            self.code.scope, self.code.line = saved
+
+    def generate_terminator(self, terminator, following, labels):
+        if isinstance(terminator, Jump):
+            target = terminator.target
+            if target is not following:
+                self.jump_back(labels[target], target.resident)
+        elif isinstance(terminator, Branch):
+            if terminator.false_target is following:
+                self.branch(terminator.condition, labels[terminator.true_target], True)
+            elif terminator.true_target is following:
+                self.branch(terminator.condition, labels[terminator.false_target], False)
+            else:
+                self.branch(terminator.condition, labels[terminator.true_target], True)
+                self.code.jump("JUMP", labels[terminator.false_target])
+        else:
+            self.generate_for_test(terminator.command, labels[terminator.exit])
+            if terminator.body is not following:
+                self.code.jump("JUMP", labels[terminator.body])
+
+    # Commands
+    def place_loop(self, label, resident):
+        # Początek pętli zakłada, że resident jest już w akumulatorze: wczytujemy
+        # go przed pętlą i (jeśli trzeba) przed skokiem powrotnym, dzięki czemu
+        # warunek pętli nie musi go ładować w każdym obrocie.
+        if resident is None:
+            return self.code.place(label)
+        self.load(resident)
+        self.code.place(label)
+        symbol = resident.symbol
+        if isinstance(symbol, Parameter):
+            self.code.assume(("indirect", symbol.memory_index))
+        else:
+            self.code.assume(mirrors={symbol.memory_index})
+        return label
+
+    def jump_back(self, label, resident):
+        if resident is not None:
+            self.load(resident)
+        self.code.jump("JUMP", label)
+
+    def generate_assign(self, command):
+        target = command.identifier
+        symbol = target.symbol
+        cell = self.element_cell(target, symbol)
+        if target.index is None:
+            self.evaluate(command.expression)
+            self.store(symbol)
+        elif isinstance(target, Element) or self.pointer_cell(target, symbol) is not None:
+            self.evaluate(command.expression)
+            self.code.emit("STOREI", self.address_cell(target))
+        elif cell is not None:
+            self.evaluate(command.expression)
+            self.code.emit("STORE", cell)
+        else:
+            address = self.temporary("address")
+            self.load_address(target, symbol)
+            self.code.emit("STORE", address)
+            self.evaluate(command.expression)
+            self.code.emit("STOREI", address)
+
+    def generate_address(self, command):
+        element = command.element
+        self.load_address(element, element.symbol)
+        self.store(command.identifier.symbol)
+
+    def generate_for_start(self, command):
+        # iterator (i jego przesunięcie dla iteratora-wskaźnika) ustaliła semantics.py
+        iterator = command.symbol
+        mode = self.for_modes.get(command)
+        start, end = command.start_value, command.end_value
+        if mode == "countdown":
+            # obroty do wykonania minus jeden; ujemna liczba - pusta pętla
+            self.evaluate(Operation(end, '-', start) if command.direction == "to" else Operation(start, '-', end))
+        else:
+            if not self.zero_limit(command, iterator):
+                self.load_offset(end, iterator.offset)
+                self.code.emit("STORE", iterator.limit_index)
+            self.load_offset(start, iterator.offset)
+        self.code.emit("STORE", iterator.memory_index)
+
+    def zero_limit(self, command, iterator):
+        # granica w komórce iteratora równa zeru: wystarczy sprawdzić znak
+        return isinstance(command.end_value, Value) and command.end_value.value + iterator.offset == 0
+
+    def load_offset(self, value, offset):
+        if offset == 0:
+            self.load(value)
+        elif isinstance(value, Value):
+            self.load_constant(value.value + offset)
+        else:
+            self.evaluate(Operation(value, '+', Value(offset)))
+
+    def generate_for_test(self, command, exit_label):
+        iterator = command.symbol
+        self.load(self.iterator(command))
+        if self.for_modes.get(command) == "countdown":
+            self.code.jump("JNEG", exit_label)
+            return
+        if not self.zero_limit(command, iterator):
+            self.code.emit("SUB", iterator.limit_index)
+        self.code.jump("JPOS" if command.direction == "to" else "JNEG", exit_label)
+
+    def generate_for_step(self, command):
+        iterator = command.symbol
+        step = 1 if command.direction == "to" else -1
+        if self.for_modes.get(command) == "countdown":
+            step = -1
+        self.add_constant(self.iterator(command), step)
+        self.code.emit("STORE", iterator.memory_index)
+
+    def generate_for_end(self, command):
+        pass
+
+    def iterator(self, command):
+        identifier = Identifier(command.iterator)
+        identifier.symbol = command.symbol
+        return identifier
+
+    def generate_read(self, command):
+        target = command.identifier
+        symbol = target.symbol
+        cell = self.element_cell(target, symbol)
+        if cell is not None:
+            self.code.emit("GET", cell)
+        elif isinstance(target, Element) or self.pointer_cell(target, symbol) is not None:
+            self.code.emit("GET", 0)
+            self.code.emit("STOREI", self.address_cell(target))
+        elif target.index is not None:
+            address = self.temporary("address")
+            self.load_address(target, symbol)
+            self.code.emit("STORE", address)
+            self.code.emit("GET", 0)
+            self.code.emit("STOREI", address)
+        elif isinstance(symbol, Parameter):
+            self.code.emit("GET", 0)
+            self.code.emit("STOREI", symbol.memory_index)
+        else:
+            self.code.emit("GET", symbol.memory_index)
+
+    def generate_write(self, command):
+        value = command.value
+        if isinstance(value, Identifier) and value.index is None:
+            symbol = value.symbol
+            if isinstance(symbol, (Variable, Iterator)):
+                self.code.emit("PUT", symbol.memory_index)
+                return
+        elif isinstance(value, Identifier):
+            cell = self.element_cell(value, value.symbol)
+            if cell is not None:
+                self.code.emit("PUT", cell)
+                return
+        self.load(value)
+        self.code.emit("PUT", 0)
+
+    def generate_proccall(self, command):
+        callee = command.procedure
+        for symbol, param_name in zip(command.arguments, callee.parameter_names):
+            param = callee.parameters[param_name]
+            if isinstance(symbol, Parameter):
+                self.code.emit("LOAD", symbol.memory_index)
+            elif isinstance(symbol, Array):
+                self.code.emit("SET", symbol.base)
+            else:
+                self.code.emit("SET", symbol.memory_index)
+            self.code.emit("STORE", param.memory_index)
+        return_label = self.code.new_label("return")
+        self.code.set_address(return_label)
+        self.code.emit("STORE", callee.return_address)
+        self.code.jump("JUMP", callee.label)
+        self.code.place(return_label)
+
+
+    # Conditions
+    def branch(self, condition, label, when):
+        # skok do label, gdy warunek ma wartość when (conditions.py)
+        operator = self.evaluate_difference(condition)
+        for jump in jumps(operator, when):
+            self.code.jump(jump, label)
+
+    def evaluate_difference(self, condition):
+        # left - right albo right - left z lustrzanym operatorem, zależnie
+        # od tego, co jest tańsze w bieżącym stanie akumulatora
+        orders = [(condition.left, condition.operator, condition.right),
+                  (condition.right, MIRRORED[condition.operator], condition.left)]
+        costs = []
+        for left, operator, right in orders:
+            checkpoint = self.code.checkpoint()
+            pooled = dict(self.pooled)
+            self.evaluate(Operation(left, '-', right))
+            costs.append(self.code.cost_since(checkpoint))
+            self.code.rollback(checkpoint)
+            self.pooled = pooled
+        left, operator, right = orders[costs[1] < costs[0]]
+        self.evaluate(Operation(left, '-', right))
+        return operator
+
+
+    # Expressions
+    def evaluate(self, expression):
+        if not isinstance(expression, Operation):
+            self.load(expression)
+            return
+        if isinstance(expression, Reduction):
+            self.evaluate_reduction(expression)
+            return
+        if expression.operator in ROUTINES:
+            self.evaluate_routine(expression)
+            return
+        instruction = "ADD" if expression.operator == '+' else "SUB"
+        left, right = expression.left, expression.right
+        if instruction == "ADD" and self.resident(right) and not self.resident(left):
+            # dodawanie jest przemienne: zaczynamy od wartości już w akumulatorze
+            left, right = right, left
+        if isinstance(right, Value) and self.add_constant(left, right.value if instruction == "ADD" else -right.value):
+            return
+        if isinstance(right, Identifier) and self.address_cell(right) is not None:
+            self.load(left)
+            self.code.emit(instruction + "I", self.address_cell(right))
+            return
+        if isinstance(right, Identifier) and right.index is None:
+            symbol = right.symbol
+            self.load(left)
+            if isinstance(symbol, Parameter):
+                self.code.emit(instruction + "I", symbol.memory_index)
+            else:
+                self.code.emit(instruction, symbol.memory_index)
+            return
+        operand = self.temporary("operand")
+        self.load(right)
+        self.code.emit("STORE", operand)
+        self.load(left)
+        self.code.emit(instruction, operand)
+
+    def add_constant(self, left, value):
+        # left + value bez komórki pomocniczej, jeśli to możliwe:
+        # LOAD left; ADD stała (20) albo SET value; ADD left (60)
+        if value == 0:
+            self.load(left)
+            return True
+        if value in self.pooled:
+            self.load(left)
+            self.code.emit("ADD", self.pooled[value])
+            return True
+        if -value in self.pooled:
+            self.load(left)
+            self.code.emit("SUB", self.pooled[-value])
+            return True
+        if isinstance(left, Identifier) and left.index is None:
+            symbol = left.symbol
+            self.load_constant(value)
+            self.code.emit("ADDI" if isinstance(symbol, Parameter) else "ADD", symbol.memory_index)
+            return True
+        return False
+
+    def evaluate_reduction(self, expression):
+        # działanie ze stałą krokami z strength_reduction.py; argument, który
+        # nie jest zwykłą zmienną, trafia do komórki pomocniczej
+        operand = expression.operand
+        steps = expression.steps
+        cell = None
+        if isinstance(operand, Identifier) and operand.index is None and "store" not in steps:
+            symbol = operand.symbol
+            if not isinstance(symbol, Parameter):
+                cell = symbol.memory_index
+        self.load(operand)
+        if cell is None and any(step in ("add", "sub", "store", "rsub") for step in steps):
+            cell = self.temporary("operand")
+            if "store" not in steps:
+                self.code.emit("STORE", cell)
+        scratch = self.temporary("scratch")
+        for step in steps:
+            if step in ("add", "sub"):
+                self.code.emit(step.upper(), cell)
+            elif step == "double":
+                self.code.emit("STORE", scratch)
+                self.code.emit("ADD", scratch)
+            elif step == "half":
+                self.code.emit("HALF")
+            elif step == "negate":
+                self.code.emit("STORE", scratch)
+                self.code.emit("SUB", scratch)
+                self.code.emit("SUB", scratch)
+            elif step == "store":
+                self.code.emit("STORE", cell)
+            else:
+                # rsub: acc = komórka - acc
+                self.code.emit("STORE", scratch)
+                self.code.emit("LOAD", cell)
+                self.code.emit("SUB", scratch)
+
+    def evaluate_routine(self, expression):
+        kind = ROUTINES[expression.operator]
+        cells = self.routine_cells(kind)
+        # w self.fused iloraz i reszta zostały już policzone przez poprzednie dzielenie
+        if expression not in self.fused:
+            operands = [(expression.right, cells["right"]), (expression.left, cells["left"])]
+            if self.resident(expression.left):
+                operands.reverse()
+            for operand, cell in operands:
+                self.load(operand)
+                self.code.emit("STORE", cell)
+            self.call_routine(kind, cells, expression.variant if isinstance(expression, Routine) else ())
+        if expression.operator == '/':
+            self.code.emit("LOAD", cells["quotient"])
+        elif expression.operator == '%':
+            self.code.emit("LOAD", cells["remainder"])
+
+    def resident(self, value):
+        # czy wartość jest już w akumulatorze
+        if isinstance(value, Value):
+            return self.code.accumulator == ("const", value.value)
+        symbol = value.symbol
+        if self.address_cell(value) is not None:
+            return self.code.accumulator == ("indirect", self.address_cell(value))
+        if value.index is not None:
+            cell = self.element_cell(value, symbol)
+            return cell is not None and self.code.holds(cell)
+        if isinstance(symbol, Parameter):
+            return self.code.accumulator == ("indirect", symbol.memory_index)
+        return self.code.holds(symbol.memory_index)
+
+    def load(self, value):
+        if isinstance(value, Value):
+            self.load_constant(value.value)
+            return
+        symbol = value.symbol
+        if self.resident(value):
+            return
+        cell = self.element_cell(value, symbol)
+        if self.address_cell(value) is not None:
+            self.code.emit("LOADI", self.address_cell(value))
+        elif cell is not None:
+            self.code.emit("LOAD", cell)
+        elif value.index is not None:
+            self.load_address(value, symbol)
+            self.code.emit("LOADI", 0)
+        elif isinstance(symbol, Parameter):
+            self.code.emit("LOADI", symbol.memory_index)
+        else:
+            self.code.emit("LOAD", symbol.memory_index)
+
+    def store(self, symbol):
+        if isinstance(symbol, Parameter):
+            self.code.emit("STOREI", symbol.memory_index)
+        else:
+            self.code.emit("STORE", symbol.memory_index)
+
+    def address_cell(self, identifier):
+        # komórka z adresem elementu tablicy: zmienna z ir.Element albo
+        # iterator, który wskazuje element (pointer_cell), inaczej None
+        if isinstance(identifier, Element):
+            return identifier.address_symbol.memory_index
+        if identifier.index is None:
+            return None
+        return self.pointer_cell(identifier, identifier.symbol)
+
+    def pointer_cell(self, identifier, symbol):
+        if isinstance(symbol, Array) and isinstance(identifier.index, Identifier):
+            if symbol.base - self.index_offset(identifier.index) == 0:
+                return identifier.index.symbol.memory_index
+        return None
+
+    def index_offset(self, index):
+        # przesunięcie, które komórka indeksu dodaje do jego wartości
+        if not isinstance(index, Identifier):
+            return 0
+        symbol = index.symbol
+        return symbol.offset if isinstance(symbol, Iterator) else 0
+
+    def element_cell(self, identifier, symbol):
+        # komórka elementu tablicy o stałym indeksie (znana w czasie kompilacji)
+        if isinstance(symbol, Array) and isinstance(identifier.index, Value):
+            return symbol.get_at(identifier.index.value)
+        return None
+
+    def array_base(self, base):
+        # komórka z bazą tablicy, jeśli opłaca się ją trzymać w pamięci
+        if base not in self.pooled and POOL_SAVING * self.weight > POOL_COST:
+            self.pooled[base] = self.symbol_table.add_const(base)
+        return self.pooled.get(base)
+
+    def load_address(self, identifier, symbol):
+        # adres elementu tablicy w akumulatorze: baza + indeks, gdzie baza to
+        # adres elementu o indeksie 0 (dla parametru T - wartość jego komórki);
+        # iterator-wskaźnik zawiera już część bazy (index_offset)
+        index = identifier.index
+        if isinstance(symbol, Parameter):
+            self.load(index)
+            self.code.emit("ADD", symbol.memory_index)
+            return
+        base = symbol.base - self.index_offset(index)
+        if base == 0:
+            self.load(index)
+        elif self.array_base(base) is not None:
+            self.load(index)
+            self.code.emit("ADD", self.pooled[base])
+        else:
+            index_symbol = index.symbol
+            self.load_constant(base)
+            self.code.emit("ADDI" if isinstance(index_symbol, Parameter) else "ADD", index_symbol.memory_index)
+
@@ -0,0 +1,254 @@
+#
+# Eliminacja wspólnych podwyrażeń i powtórnie liczonych adresów elementów
+# tablic na grafie przepływu sterowania (ir.py).
+#
+# Każda wartość dostaje numer (klucz) zbudowany z kluczy jej argumentów:
+# ("expression", lewy, operator, prawy) dla operacji, ("element", tablica,
+# indeks) dla elementu tablicy w roli argumentu i ("address", tablica, indeks)
+# dla adresu elementu o zmiennym indeksie. Równe klucze oznaczają równe
+# wartości, dopóki nie zmieni się żadna zmienna, od której klucz zależy:
+# adres zależy tylko od indeksu, element także od zawartości tablicy.
+# Zapis do parametru procedury może zmienić każdy inny parametr tego samego
+# rodzaju (zmienną albo tablicę).
+#
+# Analiza w przód (dataflow.AvailableExpressions z kluczami wartości)
+# wyznacza klucze dostępne na każdej ścieżce - w obrębie bloku to lokalna
+# numeracja wartości, między blokami globalna.
+# Jeśli opłaca się to według wag bloków, wartość trafia do zmiennej
+# pomocniczej w każdym miejscu, gdzie jest liczona, a tam, gdzie jest już
+# dostępna, zastępuje ją odczyt tej zmiennej. Adres trafia do zmiennej
+# poleceniem ir.Address, a element czytany jest i zapisywany przez ir.Element.
+#
+from ast_tree import *
+from dataflow import AvailableExpressions
+from ir import COMMUTATIVE, Address, Branch, Element, Statement, restate, scoped
+from strength_reduction import cost, plan
+
+ROUTINE_OPERATORS = {'*', '/', '%'}
+# oszczędność na każdym ponownym użyciu wartości: LOADI komórki adresu
+# zamiast LOAD indeks; ADD baza; LOADI 0, LOAD wyniku zamiast LOAD; ADD
+# albo (szacunkowo) zamiast wywołania procedury mnożenia lub dzielenia
+ADDRESS_SAVING = 20
+ARITHMETIC_SAVING = 10
+ROUTINE_SAVING = 200
+# koszt zapamiętania wartości tam, gdzie jest liczona (STORE)
+STORE_COST = 10
+
+
+def operand_key(node, key):
+    if isinstance(node, Value):
+        return node.value
+    if node.index is None:
+        return key(node.name)
+    return ("element", key(node.name), operand_key(node.index, key))
+
+
+def expression_key(expression, key):
+    left, right = operand_key(expression.left, key), operand_key(expression.right, key)
+    if expression.operator in COMMUTATIVE and repr(left) > repr(right):
+        left, right = right, left
+    return ("expression", left, expression.operator, right)
+
+
+def address_key(identifier, key):
+    if isinstance(identifier.index, Identifier):
+        return ("address", key(identifier.name), key(identifier.index.name))
+    return None
+
+
+def depends(value_key):
+    # zmienne, których zapis unieważnia wartość
+    if isinstance(value_key, str):
+        return {value_key}
+    if not isinstance(value_key, tuple):
+        return set()
+    if value_key[0] == "address":
+        return depends(value_key[2])
+    if value_key[0] == "element":
+        return {value_key[1]} | depends(value_key[2])
+    return depends(value_key[1]) | depends(value_key[3])
+
+
+def operation_saving(value_key):
+    # działanie ze stałą może zostać policzone bez procedury (strength_reduction.py)
+    _, left, operator, right = value_key
+    if operator not in ROUTINE_OPERATORS:
+        return ARITHMETIC_SAVING
+    steps = plan(left if isinstance(left, int) else None, operator, right if isinstance(right, int) else None)
+    return ROUTINE_SAVING if steps is None else max(cost(steps), ARITHMETIC_SAVING)
+
+
+def saving(value_key):
+    if value_key[0] == "address":
+        return ADDRESS_SAVING
+    return operation_saving(value_key)
+
+
+class Site:
+    # wartości liczone przez jedną instrukcję lub terminator
+    def __init__(self, item):
+        self.item = item
+        self.addresses = {}  # klucz adresu -> liczba elementów o tym adresie
+        self.expression = None
+        key = scoped(item).key
+        kind = item.kind if isinstance(item, Statement) else None
+        if isinstance(item, Branch):
+            self.elements([item.condition.left, item.condition.right], key)
+        elif kind == "assign":
+            expression = item.command.expression
+            if isinstance(expression, Operation):
+                self.expression = expression_key(expression, key)
+                self.elements([expression.left, expression.right], key)
+            else:
+                self.elements([expression], key)
+            self.elements([item.command.identifier], key)
+        elif kind == "read":
+            self.elements([item.command.identifier], key)
+        elif kind == "write":
+            self.elements([item.command.value], key)
+        self.keys = frozenset(self.addresses) | ({self.expression} if self.expression else frozenset())
+
+    def elements(self, nodes, key):
+        for node in nodes:
+            if isinstance(node, Identifier):
+                address = address_key(node, key)
+                if address is not None:
+                    self.addresses[address] = self.addresses.get(address, 0) + 1
+
+
+class CommonSubexpressions:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.aliases = []  # grupy parametrów, które mogą wskazywać to samo
+        if isinstance(cfg.scope, Procedure):
+            parameters = cfg.scope.parameters
+            self.aliases = [{param for param in parameters if not isinstance(param, tuple)},
+                            {param[0] for param in parameters if isinstance(param, tuple)}]
+        self.temporaries = {}  # klucz -> nazwa zmiennej pomocniczej
+
+    def run(self):
+        sites = {}
+        for block in self.cfg.blocks:
+            for item in block.statements + ([block.terminator] if block.terminator else []):
+                site = Site(item)
+                if site.keys:
+                    sites[item] = site
+        keys = {item: site.keys for item, site in sites.items()}
+        solution = AvailableExpressions(keys, depends, self.aliases).solve(self.cfg)
+        selected = self.select(solution, sites)
+        if not selected:
+            return self.cfg
+        for block in self.cfg.blocks:
+            statements = []
+            for item, available, _ in solution.statements(block):
+                site = sites.get(item)
+                keys = site.keys & selected if site else set()
+                if item is block.terminator:
+                    if keys:
+                        block.terminator = self.rewrite_branch(item, site, keys, available, statements)
+                elif keys:
+                    self.rewrite_statement(item, site, keys, available, statements)
+                else:
+                    statements.append(item)
+            block.statements = statements
+        return self.cfg
+
+    def select(self, solution, sites):
+        # klucze, dla których ponowne użycia są warte zapamiętywania wartości
+        gain = {}
+        for block in self.cfg.blocks:
+            for item, available, _ in solution.statements(block):
+                site = sites.get(item)
+                if site is None:
+                    continue
+                for value_key in site.keys:
+                    count = site.addresses.get(value_key, 1)
+                    if value_key in available:
+                        reused, stored = count, 0
+                    else:
+                        reused, stored = count - 1, 1
+                    gain[value_key] = gain.get(value_key, 0) + \
+                        block.weight * (reused * saving(value_key) - stored * STORE_COST)
+        return {value_key for value_key, value in gain.items() if value > 0}
+
+    def temporary(self, value_key):
+        if value_key not in self.temporaries:
+            prefix = "address" if value_key[0] == "address" else "value"
+            name = f"{prefix}{len(self.temporaries)}"
+            self.temporaries[value_key] = name
+            self.cfg.scope.declarations.append(Declaration(name))
+        return self.temporaries[value_key]
+
+    def addresses(self, item, site, keys, available, statements):
+        # zmienne z adresami elementów; adresy, których jeszcze nie ma, są liczone
+        key = scoped(item).key
+        names = {}
+        for value_key in site.addresses:
+            if value_key not in keys:
+                continue
+            names[value_key] = self.temporary(value_key)
+            if value_key not in available:
+                element = next(node for node in self.nodes(item)
+                               if isinstance(node, Identifier) and address_key(node, key) == value_key)
+                command = Address(Identifier(names[value_key]), element)
+                command.lineno, command.origin = item.line, item.origin
+                statements.append(restate(item, command))
+        return names, key
+
+    def nodes(self, item):
+        if isinstance(item, Branch):
+            return [item.condition.left, item.condition.right]
+        command = item.command
+        if item.kind == "assign":
+            expression = command.expression
+            operands = [expression.left, expression.right] if isinstance(expression, Operation) else [expression]
+            return operands + [command.identifier]
+        if item.kind == "read":
+            return [command.identifier]
+        return [command.value]
+
+    def substitute(self, node, names, key):
+        if isinstance(node, Operation):
+            return Operation(self.substitute(node.left, names, key), node.operator,
+                             self.substitute(node.right, names, key))
+        if isinstance(node, Identifier):
+            address = address_key(node, key)
+            if address in names:
+                return Element(node, names[address])
+        return node
+
+    def rewrite_statement(self, item, site, keys, available, statements):
+        names, key = self.addresses(item, site, keys, available, statements)
+        command = item.command
+        if item.kind == "assign":
+            target = self.substitute(command.identifier, names, key)
+            expression = command.expression
+            if site.expression in keys:
+                temporary = Identifier(self.temporary(site.expression))
+                if site.expression not in available:
+                    computed = Assign(temporary, self.substitute(expression, names, key))
+                    computed.located(command)
+                    statements.append(restate(item, computed))
+                expression = temporary
+            else:
+                expression = self.substitute(expression, names, key)
+            command = Assign(target, expression)
+        elif item.kind == "read":
+            command = Read(self.substitute(command.identifier, names, key))
+        else:
+            command = Write(self.substitute(command.value, names, key))
+        command.located(item.command)
+        statements.append(restate(item, command))
+
+    def rewrite_branch(self, item, site, keys, available, statements):
+        names, key = self.addresses(item, site, keys, available, statements)
+        condition = item.condition
+        condition = Condition(self.substitute(condition.left, names, key), condition.operator,
+                              self.substitute(condition.right, names, key))
+        condition.located(item.condition)
+        uses = scoped(item).reads(condition.left) | scoped(item).reads(condition.right)
+        return Branch(condition, item.true_target, item.false_target, uses, item.source)
+
+
+def eliminate_common_subexpressions(cfg):
+    return CommonSubexpressions(cfg).run()
@@ -0,0 +1,35 @@
+#
+# Zamiana warunków na skoki maszyny wirtualnej.
+#
+# Maszyna skacze tylko według znaku akumulatora, więc warunek left op right
+# liczymy jako różnicę left - right i skaczemy dla odpowiednich znaków.
+# Różnicę można też liczyć w odwrotnej kolejności (right - left) z lustrzanym
+# operatorem - generator wybiera tańszą wersję, np. x - 0 zamiast 0 - x (samo
+# LOAD x) albo wersję, w której odjemnik nie wymaga komórki pomocniczej.
+#
+# Skok wykonywany, gdy warunek ma zadaną wartość, to jeden lub dwa skoki
+# warunkowe (dla dwóch znaków) - nigdy JUMP, więc gałąź, która nie skacze,
+# po prostu przechodzi dalej. Zero to pojedyncza wartość różnicy, zwykle
+# najmniej prawdopodobna, dlatego JZERO stawiamy na końcu.
+#
+# znaki różnicy left - right, dla których warunek jest spełniony
+TRUE_SIGNS = {
+    '==': ("zero",),
+    '!=': ("pos", "neg"),
+    '>': ("pos",),
+    '<': ("neg",),
+    '>=': ("pos", "zero"),
+    '<=': ("neg", "zero"),
+}
+SIGNS = ("pos", "neg", "zero")
+SIGN_JUMPS = {"pos": "JPOS", "neg": "JNEG", "zero": "JZERO"}
+# warunek dla zamienionych stron: a op b <=> b MIRRORED[op] a
+MIRRORED = {'==': '==', '!=': '!=', '>': '<', '<': '>', '>=': '<=', '<=': '>='}
+
+
+def jumps(operator, when=True):
+    # skoki warunkowe wykonywane dokładnie wtedy, gdy warunek ma wartość when
+    signs = TRUE_SIGNS[operator]
+    if not when:
+        signs = tuple(sign for sign in SIGNS if sign not in signs)
+    return [SIGN_JUMPS[sign] for sign in signs]
@@ -0,0 +1,251 @@
+#
+# Zwijanie i propagacja stałych na drzewie AST.
+#
+# Przechodzimy polecenia w kolejności wykonania, pamiętając wartości zmiennych
+# (i elementów tablic o stałych indeksach) znane w czasie kompilacji. W pętlach
+# zapominamy wszystko, co ciało pętli może zmienić, a po IF zostawiamy tylko
+# wartości zgodne w obu gałęziach. Parametry procedur nie są śledzone, bo
+# przekazywane są przez referencję i mogą wskazywać tę samą zmienną.
+#
+# Drzewo zmieniane jest tylko tam, gdzie wynik jest tańszy: operacje i warunki
+# o stałych argumentach są liczone od razu (martwe gałęzie znikają), stałe
+# indeksy tablic zastępują zmienne (adres liczony przez Array.get_at), a znane
+# elementy tablic zastępowane są przez SET. Stały indeks spoza zakresu
+# tablicy byłby błędem kompilacji, a element może leżeć w gałęzi, która się
+# nie wykonuje - wtedy indeks zostaje zmienną. Zwykła zmienna zostaje zmienną:
+# LOAD (10) jest tańszy niż SET (50).
+#
+from ast_tree import *
+from visitor import Transformer
+
+
+def divide(left, right):
+    return 0 if right == 0 else left // right
+
+
+def modulo(left, right):
+    return 0 if right == 0 else left % right
+
+
+OPERATIONS = {
+    '+': lambda left, right: left + right,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+    '/': divide,
+    '%': modulo,
+}
+
+CONDITIONS = {
+    '==': lambda left, right: left == right,
+    '!=': lambda left, right: left != right,
+    '>': lambda left, right: left > right,
+    '<': lambda left, right: left < right,
+    '>=': lambda left, right: left >= right,
+    '<=': lambda left, right: left <= right,
+}
+
+
+def constant(node, value):
+    folded = Value(value)
+    folded.located(node)
+    return folded
+
+
+def array_bounds(declarations):
+    # tablica -> (pierwszy, ostatni indeks)
+    return {declaration.name: tuple(declaration.array_bounds)
+            for declaration in declarations if declaration.array_bounds}
+
+
+def in_bounds(bounds, name, index):
+    # parametr T nie ma znanych granic (i nie jest sprawdzany w czasie kompilacji)
+    if name not in bounds:
+        return True
+    first, last = bounds[name]
+    return first <= index <= last
+
+
+def written_names(commands):
+    # nazwy zmiennych i tablic, które polecenia mogą zmienić
+    names = set()
+    for command in commands.commands:
+        if isinstance(command, (Assign, Read)):
+            names.add(command.identifier.name)
+        elif isinstance(command, ProcCall):
+            names.update(command.args)
+        elif isinstance(command, If):
+            names |= written_names(command.true_commands)
+            if command.false_commands:
+                names |= written_names(command.false_commands)
+        elif isinstance(command, (While, RepeatUntil, For)):
+            names |= written_names(command.commands)
+    return names
+
+
+class Environment(dict):
+    # nazwa -> wartość dla zmiennych, (nazwa, indeks) -> wartość dla elementów
+
+    def copy(self):
+        return Environment(self)
+
+    def forget(self, names):
+        for key in list(self):
+            if (key[0] if isinstance(key, tuple) else key) in names:
+                del self[key]
+
+    def meet(self, other):
+        for key in list(self):
+            if key not in other or other[key] != self[key]:
+                del self[key]
+
+
+class ConstantPropagation(Transformer):
+    def __init__(self):
+        self.untracked = set()
+        self.bounds = {}  # tablice bieżącej procedury -> granice
+
+    def run(self, ast):
+        program = ast.root
+        for procedure in program.procedures.procedures:
+            self.untracked = {param[0] if isinstance(param, tuple) else param for param in procedure.parameters}
+            self.bounds = array_bounds(procedure.declarations)
+            self.commands(procedure.commands, Environment())
+        self.untracked = set()
+        self.bounds = array_bounds(program.main.declarations)
+        self.commands(program.main.commands, Environment())
+        return ast
+
+    def commands(self, commands, env):
+        return self.transform(commands, env)
+
+    # Commands
+    def visit_assign(self, command, env):
+        target = self.identifier(command.identifier, env)
+        command.identifier = target
+        command.expression, value = self.expression(command.expression, env)
+        name = target.name
+        if name in self.untracked:
+            return command
+        if target.index is None:
+            env.forget({name})
+            if value is not None:
+                env[name] = value
+        elif isinstance(target.index, Value):
+            key = (name, target.index.value)
+            env.pop(key, None)
+            if value is not None:
+                env[key] = value
+        else:
+            env.forget({name})
+        return command
+
+    def visit_if(self, command, env):
+        decided = self.condition(command.condition, env)
+        if decided is True:
+            return self.commands(command.true_commands, env)
+        if decided is False:
+            if command.false_commands:
+                return self.commands(command.false_commands, env)
+            return None
+        other = env.copy()
+        self.commands(command.true_commands, env)
+        if command.false_commands:
+            self.commands(command.false_commands, other)
+        env.meet(other)
+        return command
+
+    def visit_while(self, command, env):
+        if self.condition(command.condition, env.copy(), rewrite=False) is False:
+            return None
+        env.forget(written_names(command.commands))
+        self.condition(command.condition, env)
+        self.commands(command.commands, env.copy())
+        return command
+
+    def visit_repeatuntil(self, command, env):
+        env.forget(written_names(command.commands))
+        self.commands(command.commands, env.copy())
+        self.condition(command.condition, env)
+        return command
+
+    def visit_for(self, command, env):
+        command.start_value, start = self.value(command.start_value, env)
+        command.end_value, end = self.value(command.end_value, env)
+        if start is not None and end is not None:
+            if (start > end) if command.direction == "to" else (start < end):
+                return None
+            # stałe granice: pętlę można rozwinąć (unrolling.py)
+            command.start_value = constant(command.start_value, start)
+            command.end_value = constant(command.end_value, end)
+        env.forget(written_names(command.commands))
+        body = env.copy()
+        # wewnątrz pętli nazwa iteratora przesłania zmienną o tej samej nazwie
+        body.forget({command.iterator})
+        shadowed = command.iterator in self.untracked
+        self.untracked.add(command.iterator)
+        self.commands(command.commands, body)
+        if not shadowed:
+            self.untracked.discard(command.iterator)
+        return command
+
+    def visit_read(self, command, env):
+        command.identifier = self.identifier(command.identifier, env)
+        env.forget({command.identifier.name})
+        return command
+
+    def visit_write(self, command, env):
+        command.value, _ = self.value(command.value, env)
+        return command
+
+    def visit_proccall(self, command, env):
+        env.forget(set(command.args))
+        return command
+
+    # Expressions
+    def identifier(self, identifier, env):
+        # stały indeks zamiast zmiennej o znanej wartości
+        index = identifier.index
+        if isinstance(index, Identifier) and index.index is None and index.name not in self.untracked:
+            if index.name in env and in_bounds(self.bounds, identifier.name, env[index.name]):
+                rewritten = Identifier(identifier.name, constant(index, env[index.name]), identifier.scope)
+                rewritten.located(identifier)
+                return rewritten
+        return identifier
+
+    def value(self, value, env, rewrite=True):
+        # zwraca (węzeł, wartość lub None)
+        if isinstance(value, Value):
+            return value, value.value
+        value = self.identifier(value, env) if rewrite else value
+        if value.name in self.untracked:
+            return value, None
+        if value.index is None:
+            return value, env.get(value.name)
+        if isinstance(value.index, Value) and (value.name, value.index.value) in env:
+            known = env[(value.name, value.index.value)]
+            return (constant(value, known) if rewrite else value), known
+        return value, None
+
+    def expression(self, expression, env):
+        if not isinstance(expression, Operation):
+            return self.value(expression, env)
+        expression.left, left = self.value(expression.left, env)
+        expression.right, right = self.value(expression.right, env)
+        if left is None or right is None:
+            return expression, None
+        result = OPERATIONS[expression.operator](left, right)
+        return constant(expression, result), result
+
+    def condition(self, condition, env, rewrite=True):
+        # True/False, gdy wynik jest znany w czasie kompilacji, inaczej None
+        left_node, left = self.value(condition.left, env, rewrite)
+        right_node, right = self.value(condition.right, env, rewrite)
+        if rewrite:
+            condition.left, condition.right = left_node, right_node
+        if left is None or right is None:
+            return None
+        return CONDITIONS[condition.operator](left, right)
+
+
+def propagate_constants(ast):
+    return ConstantPropagation().run(ast)
@@ -0,0 +1,180 @@
+#
+# Analiza przepływu danych na grafie z ir.py.
+#
+# Analysis rozwiązuje układ równań metodą iteracji do punktu stałego:
+# w przód wartość na wejściu bloku to część wspólna (meet) wartości na
+# wyjściach poprzedników, wstecz - na wejściach następników. Konkretna analiza
+# podaje kierunek, wartość na brzegu grafu, wartość początkową, meet i
+# przejście przez jedną instrukcję. Terminator bloku (skok z warunkiem)
+# traktowany jest jak ostatnia instrukcja, która tylko czyta zmienne.
+#
+# Analiza w przód może też zmieniać wartość na krawędzi (transfer_edge, np.
+# według warunku skoku) i przyspieszać zbieżność (widen), gdy wartości na
+# wejściu bloku mogą rosnąć bez końca.
+#
+# Solution pamięta wartości na początku i na końcu każdego bloku (w kolejności
+# wykonania, niezależnie od kierunku analizy), a Solution.statements() podaje
+# wartości przed i po każdej instrukcji bloku.
+#
+
+
+class Solution:
+    def __init__(self, analysis, entry, exit):
+        self.analysis = analysis
+        self.entry = entry  # blok -> wartość na początku bloku
+        self.exit = exit  # blok -> wartość na końcu bloku
+
+    def statements(self, block):
+        # [(instrukcja, wartość przed, wartość po)] dla instrukcji i terminatora
+        items = block.statements + ([block.terminator] if block.terminator else [])
+        result = []
+        if self.analysis.forward:
+            value = self.entry[block]
+            for item in items:
+                after = self.analysis.transfer(item, value)
+                result.append((item, value, after))
+                value = after
+        else:
+            value = self.exit[block]
+            for item in reversed(items):
+                before = self.analysis.transfer(item, value)
+                result.append((item, before, value))
+                value = before
+            result.reverse()
+        return result
+
+
+class Analysis:
+    forward = True
+
+    def boundary(self, cfg):
+        # wartość na wejściu grafu (w przód) lub na wyjściu z niego (wstecz)
+        return frozenset()
+
+    def initial(self, cfg):
+        return frozenset()
+
+    def meet(self, values):
+        return frozenset().union(*values)
+
+    def transfer(self, statement, value):
+        return value
+
+    def transfer_edge(self, block, successor, value):
+        # wartość przekazywana krawędzią block -> successor (w przód)
+        return value
+
+    def widen(self, previous, value):
+        # nowa wartość na wejściu bloku, który miał już wartość previous
+        return value
+
+    def transfer_block(self, block, value):
+        items = block.statements + ([block.terminator] if block.terminator else [])
+        for item in (items if self.forward else reversed(items)):
+            value = self.transfer(item, value)
+        return value
+
+    def solve(self, cfg):
+        predecessors = cfg.predecessors()
+        initial = self.initial(cfg)
+        boundary = self.boundary(cfg)
+        entry = {block: initial for block in cfg.blocks}
+        exit = {block: initial for block in cfg.blocks}
+        order = cfg.blocks if self.forward else list(reversed(cfg.blocks))
+        changed = True
+        while changed:
+            changed = False
+            for block in order:
+                if self.forward:
+                    incoming = [self.transfer_edge(predecessor, block, exit[predecessor])
+                                for predecessor in predecessors[block]]
+                    if block is cfg.entry:
+                        incoming.append(boundary)
+                    value = self.meet(incoming) if incoming else initial
+                    if value != entry[block]:
+                        value = self.widen(entry[block], value)
+                    result = self.transfer_block(block, value)
+                    if value != entry[block] or result != exit[block]:
+                        entry[block], exit[block] = value, result
+                        changed = True
+                else:
+                    successors = block.successors()
+                    incoming = [entry[successor] for successor in successors] if successors else [boundary]
+                    value = self.meet(incoming)
+                    result = self.transfer_block(block, value)
+                    if value != exit[block] or result != entry[block]:
+                        exit[block], entry[block] = value, result
+                        changed = True
+        return Solution(self, entry, exit)
+
+
+class Liveness(Analysis):
+    # zmienne, których bieżąca wartość może zostać jeszcze odczytana
+    forward = False
+
+    def __init__(self, live_out=()):
+        self.live_out = frozenset(live_out)
+
+    def boundary(self, cfg):
+        return self.live_out
+
+    def transfer(self, statement, value):
+        return (value - statement.defs) | statement.uses
+
+
+class ReachingDefinitions(Analysis):
+    # pary (zmienna, instrukcja): zapisy, które mogą być widoczne w danym
+    # miejscu; zapis pewny (defs) usuwa wcześniejsze zapisy zmiennej, a możliwy
+    # (may_defs, np. argument procedury) - nie
+    def transfer(self, statement, value):
+        if statement.defs:
+            value = frozenset(definition for definition in value if definition[0] not in statement.defs)
+        written = statement.defs | statement.may_defs
+        if written:
+            value = value | {(name, statement) for name in written}
+        return value
+
+
+def operands(expression):
+    # zmienne wyrażenia (lewy, operator, prawy)
+    return {operand for operand in (expression[0], expression[2]) if isinstance(operand, str)}
+
+
+class AvailableExpressions(Analysis):
+    # Wartości policzone na każdej ścieżce i od tamtej pory nie zmienione,
+    # domyślnie wyrażenia (lewy, operator, prawy) z Statement.expression.
+    # Inne wartości (np. adresy elementów, common_subexpressions.py) opisują:
+    # keys - instrukcja lub terminator -> klucze liczonych przez nią wartości,
+    # depends - klucz -> zmienne, od których zależy, i aliases - grupy
+    # zmiennych, z których zapis jednej może zmienić pozostałe.
+    def __init__(self, keys=None, depends=operands, aliases=()):
+        self.keys = keys
+        self.depends = depends
+        self.aliases = aliases
+
+    def generated(self, item):
+        if self.keys is not None:
+            return self.keys.get(item, frozenset())
+        return frozenset([item.expression]) if item.expression else frozenset()
+
+    def written(self, item):
+        written = item.defs | item.may_defs
+        for group in self.aliases:
+            if written & group:
+                written = written | group
+        return written
+
+    def initial(self, cfg):
+        return frozenset().union(*(self.generated(item) for block in cfg.blocks
+                                   for item in block.statements + ([block.terminator] if block.terminator else [])))
+
+    def meet(self, values):
+        return frozenset.intersection(*values)
+
+    def transfer(self, item, value):
+        # wartość zapisana przez tę samą instrukcję, która ją liczy, nie jest dostępna
+        value = value | self.generated(item)
+        written = self.written(item)
+        if written:
+            value = frozenset(key for key in value if not self.depends(key) & written)
+        return value
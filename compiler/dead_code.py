@@ -0,0 +1,85 @@
+#
+# Usuwanie martwego kodu na drzewie AST.
+#
+# Polecenia za pętlą, która nigdy się nie kończy (stały warunek po propagacji
+# stałych), są nieosiągalne, a procedury nieosiągalne w grafie wywołań z
+# PROGRAM nie dostają ani kodu, ani pamięci. Martwe przypisania usuwane są
+# na grafie przepływu sterowania (dead_stores.py).
+#
+from ast_tree import *
+from constant_propagation import CONDITIONS
+from inliner import bodies
+
+
+def constant_condition(condition):
+    if isinstance(condition.left, Value) and isinstance(condition.right, Value):
+        return CONDITIONS[condition.operator](condition.left.value, condition.right.value)
+    return None
+
+
+def called_procedures(commands):
+    names = set()
+    for command in commands.commands:
+        if isinstance(command, ProcCall):
+            names.add(command.name)
+        for body in bodies(command):
+            names |= called_procedures(body)
+    return names
+
+
+class DeadCode:
+    def __init__(self):
+        self.statistics = {"unreachable": 0, "procedures": 0}
+
+    def run(self, ast):
+        program = ast.root
+        for procedure in program.procedures.procedures:
+            self.prune(procedure.commands)
+        self.prune(program.main.commands)
+        self.remove_procedures(program)
+        return ast
+
+    def remove_procedures(self, program):
+        calls = {procedure.name: called_procedures(procedure.commands) for procedure in program.procedures.procedures}
+        reachable = set()
+        pending = list(called_procedures(program.main.commands))
+        while pending:
+            name = pending.pop()
+            if name not in reachable:
+                reachable.add(name)
+                pending.extend(calls.get(name, ()))
+        procedures = [procedure for procedure in program.procedures.procedures if procedure.name in reachable]
+        self.statistics["procedures"] += len(program.procedures.procedures) - len(procedures)
+        program.procedures.procedures = procedures
+
+    # Nieosiągalne polecenia
+    def prune(self, commands):
+        # obcina polecenia za pierwszym, które nigdy się nie kończy;
+        # zwraca True, gdy cały blok nigdy się nie kończy
+        for position, command in enumerate(commands.commands):
+            if self.diverges(command):
+                self.statistics["unreachable"] += len(commands.commands) - position - 1
+                commands.commands = commands.commands[:position + 1]
+                return True
+        return False
+
+    def diverges(self, command):
+        if isinstance(command, If):
+            decided = constant_condition(command.condition)
+            true_diverges = self.prune(command.true_commands)
+            false_diverges = self.prune(command.false_commands) if command.false_commands else False
+            if decided is None:
+                return true_diverges and false_diverges
+            return true_diverges if decided else false_diverges
+        if isinstance(command, While):
+            self.prune(command.commands)
+            return constant_condition(command.condition) is True
+        if isinstance(command, RepeatUntil):
+            return self.prune(command.commands) or constant_condition(command.condition) is False
+        if isinstance(command, For):
+            self.prune(command.commands)
+        return False
+
+
+def eliminate_dead_code(ast):
+    return DeadCode().run(ast)
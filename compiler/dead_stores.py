@@ -0,0 +1,41 @@
+#
+# Usuwanie martwych przypisań na grafie przepływu sterowania (ir.py).
+#
+# Przypisanie do zmiennej lokalnej, której wartość nie jest żywa za nim
+# (dataflow.Liveness), można pominąć: wyrażenia nie mają efektów ubocznych.
+# Dotyczy to także wyliczenia adresu elementu tablicy (ir.Address).
+# READ zostaje, bo zużywa wejście. Parametry mogą być czytane przez
+# wywołującego, a zmienne lokalne procedury zachowują wartość między
+# wywołaniami, więc na końcu procedury wszystkie uznajemy za żywe.
+# Deklaracje, do których nic się już nie odwołuje, znikają razem z
+# komórkami pamięci.
+#
+from ast_tree import Procedure
+from dataflow import Liveness
+
+
+def eliminate_dead_stores(cfg):
+    scope = cfg.scope
+    local = {declaration.name for declaration in scope.declarations if not declaration.array_bounds}
+    live_out = local if isinstance(scope, Procedure) else set()
+    changed = True
+    while changed:
+        changed = False
+        solution = Liveness(live_out).solve(cfg)
+        for block in cfg.blocks:
+            statements = []
+            for statement, _, live in solution.statements(block):
+                if statement is block.terminator:
+                    continue
+                if statement.kind in ("assign", "address") and statement.defs and statement.defs <= local - live:
+                    changed = True
+                    continue
+                statements.append(statement)
+            block.statements = statements
+
+    referenced = set()
+    for block in cfg.blocks:
+        for statement in block.statements + ([block.terminator] if block.terminator else []):
+            referenced |= statement.uses | statement.defs | statement.may_defs
+    scope.declarations[:] = [declaration for declaration in scope.declarations if declaration.name in referenced]
+    return cfg
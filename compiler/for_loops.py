@@ -0,0 +1,76 @@
+#
+# Wybór sposobu przechowywania iteratora pętli FOR (ir.ForTest.mode).
+#
+# Zwykła pętla trzyma w komórce iteratora jego wartość, a w komórce granicy
+# koniec zakresu, i w każdym obrocie odejmuje jedno od drugiego. Gdy ciało
+# w ogóle nie czyta iteratora, komórka liczy pozostałe obroty w dół
+# ("countdown"): sprawdzenie to jeden JNEG na wartości, która i tak jest
+# w akumulatorze po kroku. Gdy iterator służy wyłącznie za indeks tablic
+# zadeklarowanych w procedurze (lub w PROGRAM), komórka może trzymać od razu
+# adres elementu najczęściej używanej z nich ("pointer") - element czytany
+# jest przez LOADI, a zapisywany przez STOREI na komórce iteratora, bez
+# liczenia adresu; pozostałe tablice dostają bazę przesuniętą o tę samą stałą.
+#
+# Analiza przegląda ciało pętli na grafie po pozostałych optymalizacjach, bo
+# mogły one przenieść albo usunąć użycia iteratora.
+#
+from ast_tree import *
+from ir import Branch, ForTest, Statement, scoped
+
+
+def iterator_uses(node, key, resolve):
+    # [tablica] dla użyć iteratora jako indeksu, None dla użycia wartości
+    if isinstance(node, Identifier):
+        if node.index is None:
+            return [None] if resolve(node.name) == key else []
+        if isinstance(node.index, Identifier) and resolve(node.index.name) == key:
+            return [node.name]
+        return []
+    if isinstance(node, (Operation, Condition)):
+        return iterator_uses(node.left, key, resolve) + iterator_uses(node.right, key, resolve)
+    return []
+
+
+def item_uses(item, key):
+    if key not in item.uses:
+        return []
+    resolve = scoped(item).key
+    if isinstance(item, Branch):
+        return iterator_uses(item.condition, key, resolve)
+    if not isinstance(item, Statement):
+        return [None]
+    command = item.command
+    if item.kind == "assign":
+        return iterator_uses(command.identifier, key, resolve) + iterator_uses(command.expression, key, resolve)
+    if item.kind == "read":
+        return iterator_uses(command.identifier, key, resolve)
+    if item.kind == "write":
+        return iterator_uses(command.value, key, resolve)
+    if item.kind == "address":
+        return iterator_uses(command.element, key, resolve)
+    return [None]
+
+
+def specialize_for_loops(cfg):
+    arrays = {declaration.name for declaration in cfg.scope.declarations if declaration.array_bounds}
+    for position, head in enumerate(cfg.blocks):
+        test = head.terminator
+        if not isinstance(test, ForTest):
+            continue
+        key = next(key for key in test.uses if not key.endswith(":limit"))
+        body = cfg.blocks[position + 1:cfg.blocks.index(test.exit)]
+        weights = {}
+        mode = "countdown"
+        for block in body:
+            for item in block.statements + ([block.terminator] if block.terminator else []):
+                if isinstance(item, Statement) and item.kind == "for_step" and item.command is test.command:
+                    continue
+                for array in item_uses(item, key):
+                    if array not in arrays:
+                        mode = None
+                    else:
+                        weights[array] = weights.get(array, 0) + block.weight
+        if mode is not None and weights:
+            mode = ("pointer", max(sorted(weights), key=weights.get))
+        test.mode = mode
+    return cfg
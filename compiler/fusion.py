@@ -0,0 +1,73 @@
+#
+# Łączenie dzielenia i reszty liczonych na tych samych argumentach.
+#
+# Procedura dzielenia zostawia w pamięci zarówno iloraz, jak i resztę, więc
+# gdy po "a % b" (albo "a / b") wkrótce pojawia się "a / b" (albo "a % b")
+# i żaden z argumentów nie został w międzyczasie zmieniony, drugi wynik
+# można po prostu wczytać. Analiza przegląda kolejne instrukcje jednego bloku
+# grafu przepływu sterowania (ir.py) już po optymalizacjach, które mogły
+# usunąć albo przestawić dzielenia, i przerywa się na wywołaniach.
+#
+from ast_tree import *
+from ir import Reduction
+
+DIVISIONS = ('/', '%')
+
+
+def same_value(left, right):
+    if isinstance(left, Value) and isinstance(right, Value):
+        return left.value == right.value
+    if isinstance(left, Identifier) and isinstance(right, Identifier):
+        if left.name != right.name:
+            return False
+        if left.index is None or right.index is None:
+            return left.index is None and right.index is None
+        return same_value(left.index, right.index)
+    return False
+
+
+def names_read(value):
+    if not isinstance(value, Identifier):
+        return set()
+    return {value.name} | names_read(value.index)
+
+
+def division(command):
+    if isinstance(command, Assign) and isinstance(command.expression, Operation):
+        # dzielenie przez potęgę dwójki liczone jest bez procedury
+        if command.expression.operator in DIVISIONS and not isinstance(command.expression, Reduction):
+            return command.expression
+    return None
+
+
+def fused_divisions(cfg):
+    # zbiór operacji, które mogą wczytać wynik poprzedniego dzielenia
+    fused = set()
+    aliases = set()
+    if isinstance(cfg.scope, Procedure):
+        # parametry przekazywane przez referencję mogą wskazywać to samo
+        aliases = {param[0] if isinstance(param, tuple) else param for param in cfg.scope.parameters}
+    for block in cfg.blocks:
+        scan(block.statements, aliases, fused)
+    return fused
+
+
+def scan(statements, aliases, fused):
+    current = None  # ostatnie dzielenie, którego wyniki są nadal aktualne
+    operands = set()
+    for statement in statements:
+        command = statement.command
+        expression = division(command) if statement.kind == "assign" else None
+        if expression is not None:
+            if current is not None and same_value(current.left, expression.left) \
+                    and same_value(current.right, expression.right):
+                fused.add(expression)
+            else:
+                current = expression
+                operands = names_read(expression.left) | names_read(expression.right)
+        if statement.kind in ("assign", "read"):
+            written = command.identifier.name
+            if written in operands or (written in aliases and operands & aliases):
+                current = None
+        elif statement.kind != "write":
+            current = None
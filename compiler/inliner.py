@@ -0,0 +1,226 @@
+#
+# Wstawianie procedur w miejsca wywołań (na drzewie AST).
+#
+# Procedura może wywoływać tylko procedury zdefiniowane przed nią, więc
+# przechodząc je w kolejności definicji wstawiamy od dołu grafu wywołań:
+# kopiowane ciało ma już wstawione własne wywołania. Parametry przekazywane
+# są przez referencję, dlatego parametr formalny (również tablica T) jest po
+# prostu zastępowany nazwą argumentu. Zmienne lokalne i iteratory wstawianej
+# procedury dostają nowe nazwy z cyfrą (niedozwoloną w nazwach z programu)
+# i są deklarowane w zakresie wywołującego.
+#
+# Decyzja zapada dla każdego wywołania osobno: szacowana oszczędność - koszt
+# wywołania i przekazania argumentów oraz pośrednich odwołań do parametrów,
+# razy szacowana liczba wykonań (usage.py) - musi przewyższyć koszt
+# powielenia ciała, a łączny rozmiar wstawionego kodu nie może przekroczyć
+# budżetu. Procedurę wywoływaną w jednym miejscu wstawiamy zawsze, gdy
+# mieści się w budżecie.
+#
+import copy
+
+from ast_tree import *
+from arithmetic import ROUTINES
+from usage import Usage, LOOP_WEIGHT
+
+# SET adresu powrotu, STORE, JUMP i RTRN
+CALL_COST = 50 + 10 + 1 + 10
+# SET adresu argumentu i STORE do komórki parametru
+ARGUMENT_COST = 50 + 10
+# LOADI/STOREI (20) zamiast LOAD/STORE (10) przy każdym użyciu parametru
+INDIRECT_COST = 20 - 10
+# SET indeksu i ADD parametru T zamiast stałego adresu elementu
+ELEMENT_COST = 50 + 10
+# koszt jednego dodatkowego rozkazu (w jednostkach kosztu)
+SIZE_COST = 2
+# górna granica łącznej (szacowanej) liczby rozkazów wstawionych procedur
+SIZE_BUDGET = 400
+
+
+def parameter_name(parameter):
+    return parameter[0] if isinstance(parameter, tuple) else parameter
+
+
+def expressions(command):
+    # wartości, wyrażenia i warunki należące bezpośrednio do polecenia
+    if isinstance(command, Assign):
+        return [command.identifier, command.expression]
+    if isinstance(command, (If, While, RepeatUntil)):
+        return [command.condition]
+    if isinstance(command, For):
+        return [command.start_value, command.end_value]
+    if isinstance(command, Read):
+        return [command.identifier]
+    if isinstance(command, Write):
+        return [command.value]
+    return []
+
+
+def bodies(command):
+    if isinstance(command, If):
+        return [command.true_commands] + ([command.false_commands] if command.false_commands else [])
+    if isinstance(command, (While, RepeatUntil, For)):
+        return [command.commands]
+    return []
+
+
+def identifiers(node):
+    # identyfikatory w wartości, wyrażeniu lub warunku (razem z indeksami)
+    if isinstance(node, Identifier):
+        yield node
+        if isinstance(node.index, Identifier):
+            yield node.index
+    elif isinstance(node, (Operation, Condition)):
+        yield from identifiers(node.left)
+        yield from identifiers(node.right)
+
+
+def iterator_names(commands):
+    names = set()
+    for command in commands.commands:
+        if isinstance(command, For):
+            names.add(command.iterator)
+        for body in bodies(command):
+            names |= iterator_names(body)
+    return names
+
+
+def code_size(commands):
+    # przybliżona liczba rozkazów wygenerowanych dla poleceń
+    size = 0
+    for command in commands.commands:
+        if isinstance(command, Assign):
+            expression = command.expression
+            size += 3 + (6 if isinstance(expression, Operation) and expression.operator in ROUTINES else 0)
+        elif isinstance(command, (Read, Write)):
+            size += 2
+        elif isinstance(command, For):
+            size += 10
+        elif isinstance(command, ProcCall):
+            size += 4 + 2 * len(command.args)
+        else:
+            size += 4
+        size += sum(code_size(body) for body in bodies(command))
+    return size
+
+
+def rename(commands, names, origin):
+    # polecenia zachowują linię źródła wstawianej procedury
+    for command in commands.commands:
+        if command.origin is None:
+            command.origin = origin
+        for expression in expressions(command):
+            for identifier in identifiers(expression):
+                identifier.name = names.get(identifier.name, identifier.name)
+        if isinstance(command, For):
+            command.iterator = names.get(command.iterator, command.iterator)
+        elif isinstance(command, ProcCall):
+            command.args = [names.get(arg, arg) for arg in command.args]
+        for body in bodies(command):
+            rename(body, names, origin)
+
+
+class Inliner:
+    def __init__(self, budget=SIZE_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.procedures = {}
+        self.weights = {}
+        self.sites = {}
+        self.savings = {}
+        self.statistics = {"inlined": 0, "kept": 0}
+
+    def run(self, ast):
+        program = ast.root
+        self.weights = Usage(program).procedure_weights
+        for procedure in program.procedures.procedures:
+            self.count_sites(procedure.commands)
+        self.count_sites(program.main.commands)
+        for procedure in program.procedures.procedures:
+            self.inline_calls(procedure, procedure.commands, self.weights[procedure.name], set())
+            self.procedures[procedure.name] = procedure
+        self.inline_calls(program.main, program.main.commands, 1, set())
+        return ast
+
+    def count_sites(self, commands):
+        for command in commands.commands:
+            if isinstance(command, ProcCall):
+                self.sites[command.name] = self.sites.get(command.name, 0) + 1
+            for body in bodies(command):
+                self.count_sites(body)
+
+    def inline_calls(self, caller, commands, weight, iterators):
+        result = []
+        for command in commands.commands:
+            if isinstance(command, ProcCall) and self.profitable(command, weight, iterators):
+                result.extend(self.expand(caller, command))
+                continue
+            if isinstance(command, For):
+                self.inline_calls(caller, command.commands, weight * LOOP_WEIGHT, iterators | {command.iterator})
+            elif isinstance(command, (While, RepeatUntil)):
+                self.inline_calls(caller, command.commands, weight * LOOP_WEIGHT, iterators)
+            else:
+                for body in bodies(command):
+                    self.inline_calls(caller, body, weight, iterators)
+            result.append(command)
+        commands.commands = result
+
+    def profitable(self, command, weight, iterators):
+        callee = self.procedures.get(command.name)
+        # iterator przekazany przez referencję nie może stać się celem przypisania
+        if callee is None or iterators & set(command.args):
+            self.statistics["kept"] += 1
+            return False
+        size = code_size(callee.commands)
+        if self.size + size > self.budget:
+            self.statistics["kept"] += 1
+            return False
+        saving = weight * (CALL_COST + ARGUMENT_COST * len(command.args) + self.parameter_saving(callee))
+        if self.sites[command.name] > 1 and saving < SIZE_COST * size:
+            self.statistics["kept"] += 1
+            return False
+        self.size += size
+        self.statistics["inlined"] += 1
+        return True
+
+    def parameter_saving(self, callee):
+        # oszczędność na odwołaniach do parametrów w jednym wykonaniu procedury
+        if callee.name not in self.savings:
+            scalars = {name for name in callee.parameters if not isinstance(name, tuple)}
+            arrays = {parameter[0] for parameter in callee.parameters if isinstance(parameter, tuple)}
+            self.savings[callee.name] = self.uses(callee.commands, scalars, arrays, 1)
+        return self.savings[callee.name]
+
+    def uses(self, commands, scalars, arrays, weight):
+        saving = 0
+        for command in commands.commands:
+            for expression in expressions(command):
+                for identifier in identifiers(expression):
+                    if identifier.name in scalars:
+                        saving += weight * INDIRECT_COST
+                    elif identifier.name in arrays and isinstance(identifier.index, Value):
+                        saving += weight * ELEMENT_COST
+            inner = weight * LOOP_WEIGHT if isinstance(command, (While, RepeatUntil, For)) else weight
+            for body in bodies(command):
+                saving += self.uses(body, scalars, arrays, inner)
+        return saving
+
+    def expand(self, caller, command):
+        callee = self.procedures[command.name]
+        names = {parameter_name(parameter): arg for parameter, arg in zip(callee.parameters, command.args)}
+        declared = {declaration.name for declaration in caller.declarations}
+        for declaration in callee.declarations:
+            local = f"{callee.name}0{declaration.name}"
+            names[declaration.name] = local
+            if local not in declared:
+                copied = Declaration(local, declaration.array_bounds)
+                copied.located(declaration)
+                caller.declarations.append(copied)
+        for iterator in iterator_names(callee.commands):
+            names.setdefault(iterator, f"{callee.name}0{iterator}")
+        body = copy.deepcopy(callee.commands)
+        rename(body, names, callee.name)
+        return body.commands
+
+
+def inline_procedures(ast, budget=SIZE_BUDGET):
+    return Inliner(budget).run(ast)
@@ -0,0 +1,401 @@
+#
+# Reprezentacja pośrednia: graf przepływu sterowania z bloków podstawowych.
+#
+# Polecenia języka mają już postać trójadresową (wyrażenie to co najwyżej
+# jedna operacja na dwóch wartościach), więc instrukcjami bloków są polecenia
+# AST Assign, Read, Write i ProcCall (opakowane w Statement) oraz znaczniki
+# pętli FOR. Sterowanie (IF, WHILE, REPEAT, FOR) zamieniane jest na krawędzie
+# między blokami: Jump, Branch (skok zależny od warunku) i ForTest (porównanie
+# iteratora z granicą). Bloki leżą w kolejności kodu źródłowego i w tej
+# kolejności generator zamienia je na rozkazy, więc przejście do następnego
+# bloku nie wymaga skoku.
+#
+# Każda instrukcja zna zmienne, które czyta (uses), które na pewno zapisuje
+# (defs) i które może zapisać (may_defs - tablice i argumenty procedur).
+# Iteratory mają własne klucze ("i@1"), bo mogą przesłaniać zmienne o tej
+# samej nazwie. Na tym opiera się analiza przepływu danych (dataflow.py).
+#
+# Optymalizacje mogą wstawiać polecenia Address (adres elementu tablicy do
+# zmiennej pomocniczej) i zastępować elementy tablic węzłami Element, które
+# sięgają do elementu przez taką zmienną, a operacje ze stałą węzłami
+# Reduction, które generator liczy podanymi krokami zamiast procedury.
+# Mnożenia i dzielenia o znanych znakach argumentów stają się węzłami
+# Routine, wykonywanymi tańszym wariantem procedury.
+#
+from ast_tree import *
+from usage import LOOP_WEIGHT
+from visitor import Visitor
+
+COMMUTATIVE = {'+', '*'}
+
+
+class Element(Identifier):
+    # element tablicy, którego adres jest już w zmiennej address
+    __slots__ = ("address", "address_symbol")
+
+    def __init__(self, identifier, address):
+        super().__init__(identifier.name, identifier.index, identifier.scope)
+        self.located(identifier)
+        self.address = address
+        self.address_symbol = None
+
+    def __str__(self):
+        return f"{self.name}[{self.index}] (Address: {self.address})"
+
+
+class Address(Command):
+    # identifier := adres elementu tablicy element
+    __slots__ = ("identifier", "element")
+
+    def __init__(self, identifier, element):
+        self.identifier = identifier
+        self.element = element
+
+    def __str__(self):
+        return f"Address {self.identifier} = &{self.element}"
+
+
+class Reduction(Operation):
+    # operacja ze stałą liczona krokami steps na argumencie operand (strength_reduction.py)
+    __slots__ = ("operand", "steps")
+
+    def __init__(self, operation, operand, steps):
+        super().__init__(operation.left, operation.operator, operation.right)
+        self.located(operation)
+        self.operand = operand
+        self.steps = steps
+
+    def __str__(self):
+        return f"({self.left} {self.operator} {self.right}) (Steps: {' '.join(self.steps)})"
+
+
+class Routine(Operation):
+    # mnożenie lub dzielenie (ranges.py): unsigned - oba argumenty nieujemne,
+    # nonzero - dzielnik różny od zera
+    __slots__ = ("unsigned", "nonzero")
+
+    def __init__(self, operation, unsigned, nonzero):
+        super().__init__(operation.left, operation.operator, operation.right)
+        self.located(operation)
+        self.unsigned = unsigned
+        self.nonzero = nonzero
+
+    @property
+    def variant(self):
+        return tuple(flag for flag, known in (("unsigned", self.unsigned), ("nonzero", self.nonzero)) if known)
+
+    def __str__(self):
+        return f"({self.left} {self.operator} {self.right}) (Variant: {' '.join(self.variant)})"
+
+
+class Statement:
+    def __init__(self, kind, command, uses=(), defs=(), may_defs=()):
+        # kind: "assign", "read", "write", "proccall", "address", "for_start", "for_step", "for_end"
+        self.kind = kind
+        self.command = command
+        self.uses = set(uses)
+        self.defs = set(defs)
+        self.may_defs = set(may_defs)
+        # (lewy, operator, prawy) dla przypisania wyniku operacji na zmiennych i stałych
+        self.expression = None
+
+    @property
+    def line(self):
+        return self.command.lineno
+
+    @property
+    def origin(self):
+        return self.command.origin
+
+    def __str__(self):
+        return f"{self.kind} {self.command}"
+
+
+class Terminator:
+    defs = frozenset()
+    may_defs = frozenset()
+    expression = None
+    source = None  # polecenie AST, z którego pochodzi skok
+
+    @property
+    def line(self):
+        return None if self.source is None else self.source.lineno
+
+    @property
+    def origin(self):
+        return None if self.source is None else self.source.origin
+
+    def successors(self):
+        return []
+
+    def redirect(self, old, new):
+        # krawędzie prowadzące do bloku old prowadzą do new
+        for name, target in list(vars(self).items()):
+            if target is old:
+                setattr(self, name, new)
+
+
+class Jump(Terminator):
+    def __init__(self, target, source=None):
+        self.target = target
+        self.source = source
+        self.uses = set()
+
+    def successors(self):
+        return [self.target]
+
+    def __str__(self):
+        return f"jump {self.target.name}"
+
+
+class Branch(Terminator):
+    # skok do true_target, gdy warunek jest spełniony, inaczej do false_target
+    def __init__(self, condition, true_target, false_target, uses, source=None):
+        self.condition = condition
+        self.true_target = true_target
+        self.false_target = false_target
+        self.uses = set(uses)
+        self.source = source
+
+    def successors(self):
+        return [self.true_target, self.false_target]
+
+    def __str__(self):
+        return f"branch {self.condition} ? {self.true_target.name} : {self.false_target.name}"
+
+
+class ForTest(Terminator):
+    # wejście do ciała pętli FOR albo wyjście, gdy iterator minął granicę
+    def __init__(self, command, body, exit, uses):
+        # sposób przechowywania iteratora (for_loops.py): None - wartość
+        # iteratora, "countdown" - liczba pozostałych obrotów minus jeden,
+        # ("pointer", tablica) - adres elementu tablicy o indeksie iteratora
+        self.mode = None
+        self.command = command
+        self.body = body
+        self.exit = exit
+        self.uses = set(uses)
+        self.source = command
+
+    def successors(self):
+        return [self.body, self.exit]
+
+    def __str__(self):
+        return f"for {self.command.iterator} ? {self.body.name} : {self.exit.name}"
+
+
+class Block:
+    def __init__(self, name, weight):
+        self.name = name
+        self.statements = []
+        self.terminator = None
+        # szacowana liczba wykonań względem wejścia do procedury (usage.py)
+        self.weight = weight
+        # iterator trzymany w akumulatorze na początku bloku (nagłówek FOR)
+        self.resident = None
+
+    def successors(self):
+        return self.terminator.successors() if self.terminator else []
+
+    def __str__(self):
+        lines = [f"{self.name}:"] + [f"  {statement}" for statement in self.statements]
+        if self.terminator:
+            lines.append(f"  {self.terminator}")
+        return "\n".join(lines)
+
+
+class CFG:
+    def __init__(self, scope, blocks):
+        self.scope = scope  # ast_tree.Procedure lub ast_tree.Main
+        self.blocks = blocks
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def predecessors(self):
+        predecessors = {block: [] for block in self.blocks}
+        for block in self.blocks:
+            for successor in block.successors():
+                predecessors[successor].append(block)
+        return predecessors
+
+    def statements(self):
+        for block in self.blocks:
+            yield from block.statements
+
+    def __str__(self):
+        return "\n".join(str(block) for block in self.blocks)
+
+
+class Lowering(Visitor):
+    prefix = "lower_"
+
+    def __init__(self):
+        self.blocks = []
+        self.iterators = {}  # nazwa -> klucz aktywnego iteratora
+        self.loops = 0
+
+    def new_block(self, hint, weight):
+        block = Block(f"{hint}{len(self.blocks)}", weight)
+        self.blocks.append(block)
+        return block
+
+    def lower(self, scope):
+        entry = self.new_block("entry", 1)
+        self.commands(scope.commands, entry, 1)
+        return CFG(scope, self.blocks)
+
+    def commands(self, commands, block, weight):
+        for command in commands.commands:
+            block = self.dispatch(command, block, weight)
+        return block
+
+    # Klucze zmiennych
+    def key(self, name):
+        return self.iterators.get(name, name)
+
+    def operand(self, value):
+        # klucz wartości: liczba, klucz zmiennej albo None (element tablicy)
+        if isinstance(value, Value):
+            return value.value
+        if value.index is None:
+            return self.key(value.name)
+        return None
+
+    def reads(self, node):
+        if isinstance(node, Value):
+            return set()
+        if isinstance(node, Identifier):
+            names = {self.key(node.name)}
+            if isinstance(node.index, Identifier):
+                names.add(self.key(node.index.name))
+            if isinstance(node, Element):
+                names.add(node.address)
+            return names
+        return self.reads(node.left) | self.reads(node.right)
+
+    def target(self, identifier):
+        # (defs, may_defs, uses) zapisu do identyfikatora
+        if identifier.index is None:
+            return {self.key(identifier.name)}, set(), set()
+        uses = {self.key(identifier.index.name)} if isinstance(identifier.index, Identifier) else set()
+        if isinstance(identifier, Element):
+            uses.add(identifier.address)
+        return set(), {self.key(identifier.name)}, uses
+
+    # Polecenia
+    def lower_assign(self, command, block, weight):
+        defs, may_defs, uses = self.target(command.identifier)
+        statement = Statement("assign", command, uses | self.reads(command.expression), defs, may_defs)
+        expression = command.expression
+        if isinstance(expression, Operation):
+            left, right = self.operand(expression.left), self.operand(expression.right)
+            if left is not None and right is not None:
+                if expression.operator in COMMUTATIVE and repr(left) > repr(right):
+                    left, right = right, left
+                statement.expression = (left, expression.operator, right)
+        block.statements.append(statement)
+        return block
+
+    def lower_read(self, command, block, weight):
+        defs, may_defs, uses = self.target(command.identifier)
+        block.statements.append(Statement("read", command, uses, defs, may_defs))
+        return block
+
+    def lower_write(self, command, block, weight):
+        block.statements.append(Statement("write", command, self.reads(command.value)))
+        return block
+
+    def lower_address(self, command, block, weight):
+        index = command.element.index
+        uses = {self.key(index.name)} if isinstance(index, Identifier) else set()
+        block.statements.append(Statement("address", command, uses, {command.identifier.name}))
+        return block
+
+    def lower_proccall(self, command, block, weight):
+        args = {self.key(arg) for arg in command.args}
+        block.statements.append(Statement("proccall", command, args, may_defs=args))
+        return block
+
+    def lower_if(self, command, block, weight):
+        uses = self.reads(command.condition)
+        then_block = self.new_block("then", weight)
+        then_end = self.commands(command.true_commands, then_block, weight)
+        if command.false_commands:
+            else_block = self.new_block("else", weight)
+            else_end = self.commands(command.false_commands, else_block, weight)
+        exit = self.new_block("endif", weight)
+        if command.false_commands:
+            block.terminator = Branch(command.condition, then_block, else_block, uses, command)
+            else_end.terminator = Jump(exit, command)
+        else:
+            block.terminator = Branch(command.condition, then_block, exit, uses, command)
+        then_end.terminator = Jump(exit, command)
+        return exit
+
+    def lower_while(self, command, block, weight):
+        # warunek przed pętlą i na końcu ciała: powrót to jeden skok warunkowy
+        uses = self.reads(command.condition)
+        body = self.new_block("while", weight * LOOP_WEIGHT)
+        body_end = self.commands(command.commands, body, weight * LOOP_WEIGHT)
+        exit = self.new_block("endwhile", weight)
+        block.terminator = Branch(command.condition, body, exit, uses, command)
+        body_end.terminator = Branch(command.condition, body, exit, uses, command)
+        return exit
+
+    def lower_repeatuntil(self, command, block, weight):
+        body = self.new_block("repeat", weight * LOOP_WEIGHT)
+        block.terminator = Jump(body, command)
+        body_end = self.commands(command.commands, body, weight * LOOP_WEIGHT)
+        exit = self.new_block("until", weight)
+        body_end.terminator = Branch(command.condition, exit, body, self.reads(command.condition), command)
+        return exit
+
+    def lower_for(self, command, block, weight):
+        # granice liczone są raz, zanim iterator wejdzie w zasięg
+        bounds = self.reads(command.start_value) | self.reads(command.end_value)
+        self.loops += 1
+        key = f"{command.iterator}@{self.loops}"
+        limit = f"{key}:limit"
+        block.statements.append(Statement("for_start", command, bounds, {key, limit}))
+        shadowed = self.iterators.get(command.iterator)
+        self.iterators[command.iterator] = key
+
+        head = self.new_block("for", weight * LOOP_WEIGHT)
+        head.resident = Identifier(command.iterator)
+        block.terminator = Jump(head, command)
+        body = self.new_block("forbody", weight * LOOP_WEIGHT)
+        body_end = self.commands(command.commands, body, weight * LOOP_WEIGHT)
+        body_end.statements.append(Statement("for_step", command, {key}, {key}))
+        body_end.terminator = Jump(head, command)
+
+        if shadowed is None:
+            del self.iterators[command.iterator]
+        else:
+            self.iterators[command.iterator] = shadowed
+        exit = self.new_block("endfor", weight)
+        exit.statements.append(Statement("for_end", command))
+        head.terminator = ForTest(command, body, exit, {key, limit})
+        return exit
+
+
+def lower(scope):
+    return Lowering().lower(scope)
+
+
+def scoped(statement):
+    # Lowering z iteratorami widocznymi w instrukcji statement: pozwala obniżyć
+    # polecenie, które ją zastępuje
+    lowering = Lowering()
+    for key in statement.uses | statement.defs | statement.may_defs:
+        if "@" in key:
+            lowering.iterators[key.split("@")[0]] = key.split(":")[0]
+    return lowering
+
+
+def restate(statement, command):
+    # instrukcja dla polecenia wstawionego w miejsce (lub przed) statement
+    block = Block("", 0)
+    scoped(statement).commands(Commands([command]), block, 0)
+    return block.statements[0]
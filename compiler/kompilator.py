@@ -0,0 +1,126 @@
+import sys
+from importlib import import_module
+
+from lexer import MyLexer
+from parser import MyParser
+from code_generator import CodeGenerator
+
+# Optymalizacje podane są jako "moduł.funkcja": moduł importowany jest dopiero
+# wtedy, gdy optymalizacja ma zostać wykonana. Ustawienia (settings) to
+# słownik nazwa optymalizacji -> argumenty nazwane jej funkcji, np.
+# {"inline": {"budget": 800}}.
+#
+# optymalizacje drzewa AST w kolejności wykonywania
+OPTIMIZATIONS = [
+    ("inline", "inliner.inline_procedures"),
+    ("constants", "constant_propagation.propagate_constants"),
+    ("unroll", "unrolling.unroll_loops"),
+    # kopie ciał rozwiniętych pętli: iterator jest w nich stałą
+    ("constants", "constant_propagation.propagate_constants"),
+    ("dead_code", "dead_code.eliminate_dead_code"),
+]
+
+# optymalizacje grafu przepływu sterowania (ir.CFG) każdej procedury
+IR_OPTIMIZATIONS = [
+    ("loop_invariants", "loop_invariants.hoist_loop_invariants"),
+    ("common_subexpressions", "common_subexpressions.eliminate_common_subexpressions"),
+    ("strength_reduction", "strength_reduction.reduce_strength"),
+    ("ranges", "ranges.specialize_routines"),
+    ("dead_stores", "dead_stores.eliminate_dead_stores"),
+    ("for_loops", "for_loops.specialize_for_loops"),
+]
+
+# optymalizacje wygenerowanego kodu (assembler.Assembly)
+CODE_OPTIMIZATIONS = [
+    ("peephole", "peephole.peephole"),
+]
+
+
+def resolve(target):
+    module, function = target.rsplit(".", 1)
+    return getattr(import_module(module), function)
+
+
+def parse_source(source):
+    lexer = MyLexer()
+    parser = MyParser(source)
+    return parser.parse(lexer.tokenize(source))
+
+
+def optimize(ast, disabled=(), settings=None):
+    settings = settings or {}
+    for name, optimization in OPTIMIZATIONS:
+        if name not in disabled:
+            ast = resolve(optimization)(ast, **settings.get(name, {}))
+    return ast
+
+
+def ir_passes(disabled=()):
+    return [resolve(optimization) for name, optimization in IR_OPTIMIZATIONS if name not in disabled]
+
+
+def optimize_code(code, disabled=()):
+    for name, optimization in CODE_OPTIMIZATIONS:
+        if name not in disabled:
+            code = resolve(optimization)(code)
+    return code
+
+
+def assemble_source(source, disabled=(), settings=None):
+    ast = parse_source(source)
+    if all(name in disabled for name, _ in OPTIMIZATIONS + IR_OPTIMIZATIONS):
+        code = CodeGenerator(ast).assemble()
+    else:
+        # błędy zgłaszamy dla drzewa w postaci napisanej przez programistę
+        CodeGenerator(ast).check()
+        code = CodeGenerator(optimize(ast, disabled, settings), validated=True, passes=ir_passes(disabled)).assemble()
+    return optimize_code(code, disabled)
+
+
+def compile_source(source, disabled=(), settings=None):
+    return assemble_source(source, disabled, settings).to_text()
+
+
+def option(args, name):
+    # wartość opcji name (usuwana z args) albo None
+    if name in args and args.index(name) + 1 < len(args):
+        position = args.index(name)
+        value = args[position + 1]
+        del args[position:position + 2]
+        return value
+    return None
+
+
+def main(argv):
+    args = argv[1:]
+    memory_map_path = option(args, "--memory-map")
+    inline_budget = option(args, "--inline-budget")
+    valid = inline_budget is None or inline_budget.isdigit()
+    if len(args) != 2 or any(arg.startswith("--") for arg in args) or not valid:
+        print("Sposób użycia programu: python kompilator.py wejście.imp wyjście.mr [--memory-map mapa.txt] "
+              "[--inline-budget rozkazy]", file=sys.stderr)
+        return 1
+    settings = {}
+    if inline_budget is not None:
+        settings["inline"] = {"budget": int(inline_budget)}
+    try:
+        with open(args[0]) as file:
+            source = file.read()
+    except OSError:
+        print(f"Błąd: Nie można otworzyć pliku {args[0]}", file=sys.stderr)
+        return 1
+    try:
+        code = assemble_source(source, settings=settings)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    with open(args[1], "w") as file:
+        file.write(code.to_text())
+    if memory_map_path:
+        with open(memory_map_path, "w") as file:
+            file.write(code.memory.report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1,4 +1,5 @@
 from sly import Lexer
+from tables import build_lexer
 
 class MyLexer(Lexer):
     tokens = { "PROCEDURE", "ENDWHILE", "PROGRAM", "DOWNTO", "ENDFOR", "REPEAT", "BEGIN", "ENDIF", "UNTIL", "WHILE", "WRITE", "ELSE", "FROM", "THEN", "END", "FOR", "DO", "IF", "IS", "TO", "READ", "T", "PIDENTIFIER", "NUM", "ASSIGN", "NOTEQUAL", "GREATEREQUAL", "LESSEQUAL", "EQUAL", "GREATER", "LESS", "COMMA", "SEMICOLON", "COLON", "PLUS", "MINUS", "MULTIPLY", "DIVIDE", "MOD", "LBRACKET", "RBRACKET", "LPAREN", "RPAREN" }
@@ -68,6 +69,11 @@ class MyLexer(Lexer):
         print(f"Unknown symbol: {t.value[0]!r} on line {self.lineno}")
         self.index += 1
 
+    @classmethod
+    def _build(cls):
+        # wyrażenie regularne z pamięci podręcznej (tables.py)
+        build_lexer(cls, super()._build)
+
     
 
 if __name__ == '__main__':
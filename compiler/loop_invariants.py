@@ -0,0 +1,188 @@
+#
+# Wynoszenie obliczeń niezmienniczych z pętli WHILE i REPEAT na grafie
+# przepływu sterowania (ir.py).
+#
+# Bloki leżą w kolejności kodu, więc krawędź do bloku na tej samej lub
+# wcześniejszej pozycji to skok powrotny pętli, a pętlą są bloki od jej
+# nagłówka do bloku, z którego wraca. Operacja albo element tablicy, których
+# argumenty (także zawartość tablicy) nie są zapisywane nigdzie w pętli, mają
+# w każdym obrocie tę samą wartość. Liczymy je raz w nowym bloku przed
+# nagłówkiem (preheader), do którego prowadzą wszystkie wejścia do pętli, i
+# trzymamy w zmiennej pomocniczej. Wartość trafia do preheadera tylko wtedy,
+# gdy według wag bloków jest używana w pętli częściej, niż byłaby liczona.
+#
+# Pętle FOR sprawdzają iterator w nagłówku, więc blok przed nim wykonuje się
+# także wtedy, gdy ciało nie wykona się ani razu; zostawiamy je w spokoju.
+# Pętle wewnętrzne obsługiwane są najpierw, a ich preheadery należą do pętli
+# zewnętrznych, więc wartość może wyjść przez kilka poziomów.
+#
+from ast_tree import *
+from common_subexpressions import depends, expression_key, operand_key, operation_saving
+from ir import Block, Branch, Jump, Statement, restate, scoped
+
+# oszczędność w każdym obrocie: LOAD zmiennej zamiast wartości
+ELEMENT_SAVING = 30  # LOAD indeks; ADD baza; LOADI 0
+# zapisanie wartości w preheaderze (STORE)
+STORE_COST = 10
+
+
+def saving(value_key):
+    if value_key[0] == "element":
+        return ELEMENT_SAVING
+    return operation_saving(value_key)
+
+
+class LoopInvariants:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.aliases = []
+        if isinstance(cfg.scope, Procedure):
+            parameters = cfg.scope.parameters
+            self.aliases = [{param for param in parameters if not isinstance(param, tuple)},
+                            {param[0] for param in parameters if isinstance(param, tuple)}]
+        self.count = 0
+        self.statistics = {"loops": 0, "hoisted": 0}
+
+    def run(self):
+        for header, latch in self.loops():
+            self.hoist(header, latch)
+        return self.cfg
+
+    def loops(self):
+        # (nagłówek, blok ze skokiem powrotnym), od najkrótszych
+        positions = {block: position for position, block in enumerate(self.cfg.blocks)}
+        loops = []
+        for block in self.cfg.blocks:
+            for successor in block.successors():
+                if positions[successor] <= positions[block] and successor.resident is None:
+                    loops.append((successor, block))
+        return sorted(loops, key=lambda loop: positions[loop[1]] - positions[loop[0]])
+
+    def body(self, header, latch):
+        blocks = self.cfg.blocks
+        return blocks[blocks.index(header):blocks.index(latch) + 1]
+
+    def written(self, body):
+        written = set()
+        for block in body:
+            for statement in block.statements:
+                written |= statement.defs | statement.may_defs
+        for group in self.aliases:
+            if written & group:
+                written |= group
+        return written
+
+    # Wartości niezmiennicze
+    def values(self, item, written):
+        # [(klucz, węzeł)] wartości niezmienniczych liczonych przez instrukcję
+        key = scoped(item).key
+        result = []
+        if isinstance(item, Branch):
+            nodes = [item.condition.left, item.condition.right]
+        elif not isinstance(item, Statement):
+            nodes = []
+        elif item.kind == "assign":
+            expression = item.command.expression
+            if isinstance(expression, Operation):
+                value_key = expression_key(expression, key)
+                if not depends(value_key) & written:
+                    return [(value_key, expression)]
+                nodes = [expression.left, expression.right]
+            else:
+                nodes = [expression]
+        elif item.kind == "write":
+            nodes = [item.command.value]
+        else:
+            nodes = []
+        for node in nodes:
+            if isinstance(node, Identifier) and isinstance(node.index, Identifier):
+                value_key = operand_key(node, key)
+                if not depends(value_key) & written:
+                    result.append((value_key, node))
+        return result
+
+    def hoist(self, header, latch):
+        body = self.body(header, latch)
+        written = self.written(body)
+        found = {}  # klucz -> (węzeł, instrukcja, w której go znaleziono)
+        gain = {}
+        for block in body:
+            for item in block.statements + ([block.terminator] if block.terminator else []):
+                for value_key, node in self.values(item, written):
+                    found.setdefault(value_key, (node, item))
+                    gain[value_key] = gain.get(value_key, 0) + block.weight * saving(value_key)
+
+        predecessors = self.cfg.predecessors()[header]
+        outside = [block for block in predecessors if block not in body]
+        weight = sum(block.weight for block in outside)
+        hoisted = {value_key: None for value_key, value in gain.items()
+                   if value > weight * (saving(value_key) + STORE_COST)}
+        if not hoisted:
+            return
+
+        preheader = Block(f"pre{header.name}", weight)
+        for value_key in hoisted:
+            node, item = found[value_key]
+            name = f"invariant{self.count}"
+            self.count += 1
+            self.cfg.scope.declarations.append(Declaration(name))
+            command = Assign(Identifier(name), node)
+            command.lineno, command.origin = item.line, item.origin
+            preheader.statements.append(restate(item, command))
+            hoisted[value_key] = name
+        preheader.terminator = Jump(header)
+        for block in outside:
+            block.terminator.redirect(header, preheader)
+        self.cfg.blocks.insert(self.cfg.blocks.index(header), preheader)
+        self.statistics["loops"] += 1
+        self.statistics["hoisted"] += len(hoisted)
+
+        for block in body:
+            block.statements = [self.rewrite(statement, hoisted, written) for statement in block.statements]
+            if isinstance(block.terminator, Branch):
+                block.terminator = self.rewrite_branch(block.terminator, hoisted, written)
+
+    # Zastępowanie wartości zmiennymi z preheadera
+    def substitute(self, node, hoisted, key):
+        if isinstance(node, Identifier) and isinstance(node.index, Identifier):
+            name = hoisted.get(operand_key(node, key))
+            if name is not None:
+                return Identifier(name)
+        return node
+
+    def rewrite(self, statement, hoisted, written):
+        values = self.values(statement, written)
+        if not any(value_key in hoisted for value_key, _ in values):
+            return statement
+        key = scoped(statement).key
+        command = statement.command
+        if statement.kind == "assign":
+            expression = command.expression
+            if isinstance(expression, Operation) and expression_key(expression, key) in hoisted:
+                expression = Identifier(hoisted[expression_key(expression, key)])
+            elif isinstance(expression, Operation):
+                expression = Operation(self.substitute(expression.left, hoisted, key), expression.operator,
+                                       self.substitute(expression.right, hoisted, key))
+            else:
+                expression = self.substitute(expression, hoisted, key)
+            command = Assign(command.identifier, expression)
+        else:
+            command = Write(self.substitute(command.value, hoisted, key))
+        command.located(statement.command)
+        return restate(statement, command)
+
+    def rewrite_branch(self, branch, hoisted, written):
+        values = self.values(branch, written)
+        if not any(value_key in hoisted for value_key, _ in values):
+            return branch
+        key = scoped(branch).key
+        condition = branch.condition
+        condition = Condition(self.substitute(condition.left, hoisted, key), condition.operator,
+                              self.substitute(condition.right, hoisted, key))
+        condition.located(branch.condition)
+        uses = scoped(branch).reads(condition.left) | scoped(branch).reads(condition.right)
+        return Branch(condition, branch.true_target, branch.false_target, uses, branch.source)
+
+
+def hoist_loop_invariants(cfg):
+    return LoopInvariants(cfg).run()
@@ -0,0 +1,201 @@
+#
+# Przydział pamięci: wspólne komórki dla ramek procedur, iteratorów FOR i
+# zmiennych o rozłącznych czasach życia.
+#
+# Tablica symboli nadaje każdemu symbolowi własne komórki. Po analizie
+# semantycznej całego programu znany jest graf wywołań; rekurencji nie ma, a
+# procedura woła tylko procedury zdefiniowane wcześniej, więc dwie procedury
+# są aktywne jednocześnie tylko wtedy, gdy jedna (pośrednio) woła drugą.
+# Ramka procedury - adres powrotu, parametry, zmienne lokalne i iteratory -
+# leży zatem tuż nad ramkami procedur, które ją wołają, a procedury od siebie
+# niezależne zajmują te same komórki. Iterator pętli FOR (z komórką granicy)
+# żyje tylko w swojej pętli: kolejne pętle dzielą komórki, a każdy poziom
+# zagnieżdżenia ma własną parę.
+#
+# W obrębie ramki (także programu głównego) zmienne skalarne - również
+# pomocnicze zmienne optymalizacji (valueN, addressN, invariantN) i zmienne
+# wstawionych procedur - kolorowane są według grafu kolizji z
+# dataflow.Liveness: zmienne kolidują, gdy jedna jest zapisywana, kiedy druga
+# jest żywa, a argumenty jednego wywołania procedury kolidują zawsze
+# (przekazywane są przez referencję). Zmienne bez kolizji dzielą komórkę.
+#
+# Zmienna lokalna żywa na wejściu procedury (dataflow.Liveness: jej wartość
+# może zostać odczytana przed zapisem, np. zapisana tylko w jednej gałęzi)
+# zachowuje wartość z poprzedniego wywołania, więc dostaje komórki poza
+# ramkami. Dotyczy to też tablic, z których procedura czyta - zapis elementu
+# nie zastępuje całej tablicy. Program główny jest aktywny przez cały czas
+# i zajmuje najniższe adresy.
+#
+# Komórki pomocnicze generatora (np. argumenty i wyniki mnożenia i dzielenia,
+# używane też przez kolejne dzielenia, fusion.py) i stałe przydzielane są
+# później, nad ramkami, i mają własne komórki. MemoryMap opisuje wynik
+# (kompilator.py --memory-map).
+#
+from assembler import MAIN_SCOPE
+from dataflow import Liveness
+from symbol_table import Array, Parameter, Variable
+
+
+class Region:
+    # komórki od address: symbole zakresu scope (nazwa procedury lub PROGRAM)
+    def __init__(self, address, size, scope, names):
+        self.address = address
+        self.size = size
+        self.scope = scope
+        self.names = names
+
+
+def interference(cfg, names, live_out=()):
+    # nazwa -> nazwy zmiennych z names, z którymi nie może dzielić komórki
+    solution = Liveness(live_out).solve(cfg)
+    edges = {name: set() for name in names}
+
+    def connect(written, live):
+        for first in written & names:
+            for second in live & names:
+                if first != second:
+                    edges[first].add(second)
+                    edges[second].add(first)
+
+    # wartości z wejścia (kopie parametrów) i wyjścia ramki potrzebne są naraz
+    entry = solution.entry[cfg.entry] & names
+    connect(entry, entry)
+    connect(set(live_out), set(live_out))
+    for block in cfg.blocks:
+        for statement, _, after in solution.statements(block)[:len(block.statements)]:
+            connect(statement.defs | statement.may_defs, after)
+            if statement.kind == "proccall":
+                connect(statement.uses, statement.uses)
+    return edges
+
+
+def colour(names, edges):
+    # nazwa -> numer komórki; zachłannie, w kolejności names
+    colours = {}
+    for name in names:
+        taken = {colours[other] for other in edges[name] if other in colours}
+        colours[name] = next(number for number in range(len(names)) if number not in taken)
+    return colours
+
+
+class MemoryMap:
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.regions = []
+        # komórki symboli, gdyby każdy miał własne
+        self.unshared = 0
+
+    def place(self, symbol, address, scope, name):
+        symbol.relocate(address)
+        self.regions.append(Region(address, symbol.size, scope, name))
+        self.unshared += symbol.size
+        return address + symbol.size
+
+    @property
+    def size(self):
+        # liczba używanych komórek (z akumulatorem)
+        return self.symbol_table.memory_index
+
+    def report(self):
+        regions = list(self.regions)
+        regions += [Region(address, 1, "-", f"pomocnicza {name}")
+                    for name, address in self.symbol_table.temporaries.items()]
+        regions += [Region(address, 1, "-", f"stała {value}")
+                    for value, address in self.symbol_table.consts.items()]
+        extra = len(self.symbol_table.temporaries) + len(self.symbol_table.consts)
+        lines = [f"Pamięć: {self.size} komórek (bez współdzielenia: {1 + self.unshared + extra})", ""]
+        lines.append(f"{'adres':>7} {'rozmiar':>8}  {'zakres':<16} nazwa")
+        lines.append(f"{0:>7} {1:>8}  {'-':<16} akumulator")
+        for region in sorted(regions, key=lambda region: region.address):
+            lines.append(f"{region.address:>7} {region.size:>8}  {region.scope:<16} {region.names}")
+        return "\n".join(lines) + "\n"
+
+
+class Allocator:
+    def __init__(self, symbol_table, procedures, main_cfg, copied):
+        # procedures: [(symbol_table.Procedure, ir.CFG)] w kolejności definicji;
+        # copied: parametry przekazywane przez kopię (aliasing.py)
+        self.symbol_table = symbol_table
+        self.procedures = procedures
+        self.main_cfg = main_cfg
+        self.copied = copied
+        self.memory = MemoryMap(symbol_table)
+        self.iterators = {}  # procedura (None dla PROGRAM) -> iteratory
+
+    def allocate(self):
+        for iterator in self.symbol_table.iterators:
+            self.iterators.setdefault(iterator.procedure, []).append(iterator)
+        address = self.frame(None, MAIN_SCOPE, list(self.symbol_table.globals.items()), 1, self.main_cfg)
+        shared = {}
+        copied_out = {}
+        for procedure, cfg in self.procedures:
+            copied_out[procedure] = [name for name, (_, copy_out) in self.copied.get(procedure.name, {}).items()
+                                     if copy_out]
+            kept, shared[procedure] = self.split_locals(procedure, cfg, copied_out[procedure])
+            for name, symbol in kept:
+                address = self.memory.place(symbol, address, procedure.name, name + self.bounds(symbol))
+        # procedury wołające są zdefiniowane później: ich ramki są już na miejscu
+        callers = {procedure.name: [] for procedure, _ in self.procedures}
+        for procedure, _ in self.procedures:
+            for callee in procedure.called_procedures:
+                callers[callee].append(procedure)
+        base = end = address
+        ends = {}
+        for procedure, cfg in reversed(self.procedures):
+            start = max((ends[caller] for caller in callers[procedure.name]), default=base)
+            start = self.memory.place(procedure, start, procedure.name, "adres powrotu, parametry")
+            ends[procedure] = self.frame(procedure, procedure.name, shared[procedure], start, cfg,
+                                         copied_out[procedure])
+            end = max(end, ends[procedure])
+        self.symbol_table.memory_index = end
+        return self.memory
+
+    def split_locals(self, procedure, cfg, copied_out):
+        # zmienne lokalne z wartością z poprzedniego wywołania i pozostałe
+        live = Liveness(copied_out).solve(cfg).entry[cfg.entry]
+        copied_in = {name for name, (copy_in, _) in self.copied.get(procedure.name, {}).items() if copy_in}
+        kept, shared = [], []
+        for name, symbol in procedure.scope.items():
+            if isinstance(symbol, Parameter):
+                continue
+            if name in live and name not in copied_in:
+                kept.append((name, symbol))
+            else:
+                shared.append((name, symbol))
+        return kept, shared
+
+    def frame(self, procedure, scope, symbols, address, cfg, live_out=()):
+        scalars = [name for name, symbol in symbols if isinstance(symbol, Variable)]
+        colours = colour(scalars, interference(cfg, set(scalars), live_out))
+        # zmienne skalarne o tym samym kolorze dzielą komórkę pierwszej z nich
+        cells = {}
+        for name, symbol in symbols:
+            if name not in colours:
+                address = self.memory.place(symbol, address, scope, name + self.bounds(symbol))
+            elif colours[name] in cells:
+                region = cells[colours[name]]
+                symbol.relocate(region.address)
+                region.names += ", " + name
+                self.memory.unshared += 1
+            else:
+                address = self.memory.place(symbol, address, scope, name)
+                cells[colours[name]] = self.memory.regions[-1]
+        # para komórek (iterator, granica) na każdy poziom zagnieżdżenia pętli
+        levels = {}
+        for iterator in self.iterators.get(procedure, []):
+            levels.setdefault(iterator.depth, []).append(iterator)
+        for depth in sorted(levels):
+            names = ", ".join(sorted({iterator.name for iterator in levels[depth]}))
+            for iterator in levels[depth]:
+                iterator.relocate(address)
+            self.memory.regions.append(Region(address, 2, scope, f"FOR {names} (iterator, granica)"))
+            self.memory.unshared += 2 * len(levels[depth])
+            address += 2
+        return address
+
+    def bounds(self, symbol):
+        return f"[{symbol.first_index}:{symbol.last_index}]" if isinstance(symbol, Array) else ""
+
+
+def allocate(symbol_table, procedures, main_cfg, copied):
+    return Allocator(symbol_table, procedures, main_cfg, copied).allocate()
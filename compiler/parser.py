@@ -1,52 +1,40 @@
 from sly import Parser
 from lexer import MyLexer
-from symbol_table import SymbolTable
+from tables import build_parser
 from ast_tree import *
 
 class MyParser(Parser):
     tokens = MyLexer.tokens
-    symbol_table = SymbolTable()
-    current_scope = None
 
     precedence = (
         ('left', 'PLUS', 'MINUS'),
         ('left', 'MULTIPLY', 'DIVIDE', 'MOD')
     )
 
+    def __init__(self, source=None):
+        # tekst programu - potrzebny do numerów kolumn węzłów
+        self.source = source
+
     # Program
     @_('procedures main')
     def program_all(self, p):
-        return AST(Program(p.procedures, p.main))
+        return AST(self.at(Program(p.procedures, p.main), p))
 
 
     # Procedures
     @_('procedures PROCEDURE proc_head IS declarations BEGIN commands END')
     def procedures(self, p):
         name, parameters = p.proc_head
-        try:
-            procedure_scope = self.symbol_table.add_procedure(name, parameters)
-            self.current_scope = procedure_scope  # Przełącz na lokalny zakres procedury
-            for declaration in p.declarations:
-                if isinstance(declaration, Declaration):
-                    if declaration.is_array:
-                        self.symbol_table.add_array(declaration.name, *declaration.bounds, self.current_scope)
-                    else:
-                        self.symbol_table.add_variable(declaration.name, self.current_scope)
-            commands = p.commands
-            self.current_scope = None  # Powrót do globalnego zakresu
-        except Exception as e:
-            print(f"Error while adding procedure '{name}': {e}")
-        return Procedures(p.procedures.procedures + [Procedure(name, parameters, p.declarations, p.commands)])
+        procedure = self.at(Procedure(name, parameters, p.declarations, p.commands), p)
+        p.procedures.procedures.append(procedure)
+        return p.procedures
 
     @_('procedures PROCEDURE proc_head IS BEGIN commands END')
     def procedures(self, p):
         name, parameters = p.proc_head
-        # Dodaj procedurę do globalnej tablicy symboli
-        procedure_scope = self.symbol_table.add_procedure(name, parameters)
-        self.current_scope = procedure_scope.locals  # Przełącz na lokalny zakres procedury
-        commands = p.commands
-        self.current_scope = None  # Powrót do globalnego zakresu
-        return Procedures(p.procedures.procedures + [Procedure(name, parameters, [], commands)])
+        procedure = self.at(Procedure(name, parameters, [], p.commands), p)
+        p.procedures.procedures.append(procedure)
+        return p.procedures
 
     @_('')
     def procedures(self, p):
@@ -56,59 +44,64 @@ class MyParser(Parser):
     # Main function
     @_('PROGRAM IS declarations BEGIN commands END')
     def main(self, p):
-        return Main(p.declarations, p.commands)
+        return self.at(Main(p.declarations, p.commands), p)
 
     @_('PROGRAM IS BEGIN commands END')
     def main(self, p):
-        return Main([], p.commands)
+        return self.at(Main([], p.commands), p)
 
 
     # Commands list
+    # Listy są lewostronnie rekurencyjne, a częściowa lista trafia tylko do
+    # jednej redukcji, więc dopisujemy do niej w miejscu - budowa drzewa jest
+    # liniowa względem długości bloku.
     @_('commands command')
     def commands(self, p):
-        return Commands(p.commands.commands + [p.command])
+        p.commands.commands.append(p.command)
+        return p.commands
 
     @_('command')
     def commands(self, p):
-        return Commands([p.command])
+        return self.at(Commands([p.command]), p)
 
 
     # Single command
     @_('identifier ASSIGN expression SEMICOLON')
     def command(self, p):
-        return Assign(p.identifier, p.expression)
+        return self.at(Assign(p.identifier, p.expression), p)
 
     @_('IF condition THEN commands ELSE commands ENDIF')
     def command(self, p):
-        return If(p.condition, p.commands0, p.commands1)
+        return self.at(If(p.condition, p.commands0, p.commands1), p)
 
     @_('IF condition THEN commands ENDIF')
     def command(self, p):
-        return If(p.condition, p.commands)
+        return self.at(If(p.condition, p.commands), p)
 
     @_('WHILE condition DO commands ENDWHILE')
     def command(self, p):
-        return While(p.condition, p.commands)
+        return self.at(While(p.condition, p.commands), p)
 
     @_('REPEAT commands UNTIL condition SEMICOLON')
     def command(self, p):
-        return RepeatUntil(p.commands, p.condition)
+        # linia warunku - tam wykonywany jest skok powrotny pętli
+        return self.at(RepeatUntil(p.commands, p.condition), p, p.condition)
 
     @_('FOR PIDENTIFIER FROM value TO value DO commands ENDFOR')
     def command(self, p):
-        return For(p.PIDENTIFIER, p.value0, p.value1, "to", p.commands)
+        return self.at(For(p.PIDENTIFIER, p.value0, p.value1, "to", p.commands), p)
 
     @_('FOR PIDENTIFIER FROM value DOWNTO value DO commands ENDFOR')
     def command(self, p):
-        return For(p.PIDENTIFIER, p.value0, p.value1, "downto", p.commands)
+        return self.at(For(p.PIDENTIFIER, p.value0, p.value1, "downto", p.commands), p)
 
     @_('READ identifier SEMICOLON')
     def command(self, p):
-        return Read(p.identifier)
+        return self.at(Read(p.identifier), p)
 
     @_('WRITE value SEMICOLON')
     def command(self, p):
-        return Write(p.value)
+        return self.at(Write(p.value), p)
 
     @_('proc_call SEMICOLON')
     def command(self, p):
@@ -124,57 +117,39 @@ class MyParser(Parser):
     # Procedure call
     @_('PIDENTIFIER LPAREN args RPAREN')
     def proc_call(self, p):
-        return ProcCall(p.PIDENTIFIER, p.args)
+        return self.at(ProcCall(p.PIDENTIFIER, p.args), p)
 
 
     # Declarations
     @_('declarations COMMA PIDENTIFIER')
     def declarations(self, p):
-        if self.current_scope:  # Jeśli jesteśmy w procedurze
-            self.current_scope.add_variable(p.PIDENTIFIER)
-        else:  # Jeśli jesteśmy w zakresie globalnym
-            self.symbol_table.add_variable(p.PIDENTIFIER)
-        return p.declarations + [Declaration(p.PIDENTIFIER)]
+        p.declarations.append(self.at(Declaration(p.PIDENTIFIER), p))
+        return p.declarations
 
-    @_('declarations COMMA PIDENTIFIER LBRACKET NUM COLON NUM RBRACKET')
+    @_('declarations COMMA PIDENTIFIER LBRACKET number COLON number RBRACKET')
     def declarations(self, p):
-        try:
-            if self.current_scope:  # Jeśli jesteśmy w procedurze
-                self.symbol_table.add_array(p.PIDENTIFIER, p.NUM, p.NUM1, self.current_scope)
-            else:  # Jeśli jesteśmy w zakresie globalnym
-                self.symbol_table.add_array(p.PIDENTIFIER, p.NUM, p.NUM1)
-        except Exception as e:
-            print(f"Error: {e}")
-        return p.declarations + [Declaration(p.PIDENTIFIER, (p.NUM, p.NUM1))]
+        p.declarations.append(self.at(Declaration(p.PIDENTIFIER, (p.number0, p.number1)), p))
+        return p.declarations
 
     @_('PIDENTIFIER')
     def declarations(self, p):
-        if self.current_scope:
-            self.current_scope.add_variable(p.PIDENTIFIER)
-        else:
-            self.symbol_table.add_variable(p.PIDENTIFIER)
-        return [Declaration(p.PIDENTIFIER)]
+        return [self.at(Declaration(p.PIDENTIFIER), p)]
 
-    @_('PIDENTIFIER LBRACKET NUM COLON NUM RBRACKET')
+    @_('PIDENTIFIER LBRACKET number COLON number RBRACKET')
     def declarations(self, p):
-        try:
-            if self.current_scope:
-                self.symbol_table.add_array(p.PIDENTIFIER, p.NUM, p.NUM1, self.current_scope)
-            else:
-                self.symbol_table.add_array(p.PIDENTIFIER, p.NUM, p.NUM1)
-        except Exception as e:
-            print(f"Error: {e}")
-        return [Declaration(p.PIDENTIFIER, (p.NUM, p.NUM1))]
+        return [self.at(Declaration(p.PIDENTIFIER, (p.number0, p.number1)), p)]
 
 
     # Arguments declarations
     @_('args_decl COMMA PIDENTIFIER')
     def args_decl(self, p):
-        return p.args_decl + [p.PIDENTIFIER]
+        p.args_decl.append(p.PIDENTIFIER)
+        return p.args_decl
 
     @_('args_decl COMMA T PIDENTIFIER')
     def args_decl(self, p):
-        return p.args_decl + [(p.PIDENTIFIER, "table")]
+        p.args_decl.append((p.PIDENTIFIER, "table"))
+        return p.args_decl
 
     @_('PIDENTIFIER')
     def args_decl(self, p):
@@ -188,7 +163,8 @@ class MyParser(Parser):
     # Arguments in procedure call
     @_('args COMMA PIDENTIFIER')
     def args(self, p):
-        return p.args + [p.PIDENTIFIER]
+        p.args.append(p.PIDENTIFIER)
+        return p.args
 
     @_('PIDENTIFIER')
     def args(self, p):
@@ -202,55 +178,55 @@ class MyParser(Parser):
 
     @_('value PLUS value')
     def expression(self, p):
-        return Operation(p.value0, '+', p.value1)
+        return self.at(Operation(p.value0, '+', p.value1), p)
 
     @_('value MINUS value')
     def expression(self, p):
-        return Operation(p.value0, '-', p.value1)
+        return self.at(Operation(p.value0, '-', p.value1), p)
 
     @_('value MULTIPLY value')
     def expression(self, p):
-        return Operation(p.value0, '*', p.value1)
+        return self.at(Operation(p.value0, '*', p.value1), p)
 
     @_('value DIVIDE value')
     def expression(self, p):
-        return Operation(p.value0, '/', p.value1)
+        return self.at(Operation(p.value0, '/', p.value1), p)
 
     @_('value MOD value')
     def expression(self, p):
-        return Operation(p.value0, '%', p.value1)
+        return self.at(Operation(p.value0, '%', p.value1), p)
 
 
     # Conditions
     @_('value EQUAL value')
     def condition(self, p):
-        return Condition(p.value0, '==', p.value1)
+        return self.at(Condition(p.value0, '==', p.value1), p)
 
     @_('value NOTEQUAL value')
     def condition(self, p):
-        return Condition(p.value0, '!=', p.value1)
+        return self.at(Condition(p.value0, '!=', p.value1), p)
 
     @_('value GREATER value')
     def condition(self, p):
-        return Condition(p.value0, '>', p.value1)
+        return self.at(Condition(p.value0, '>', p.value1), p)
 
     @_('value LESS value')
     def condition(self, p):
-        return Condition(p.value0, '<', p.value1)
+        return self.at(Condition(p.value0, '<', p.value1), p)
 
     @_('value GREATEREQUAL value')
     def condition(self, p):
-        return Condition(p.value0, '>=', p.value1)
+        return self.at(Condition(p.value0, '>=', p.value1), p)
 
     @_('value LESSEQUAL value')
     def condition(self, p):
-        return Condition(p.value0, '<=', p.value1)
+        return self.at(Condition(p.value0, '<=', p.value1), p)
 
 
     # Values
-    @_('NUM')
+    @_('number')
     def value(self, p):
-        return Value(p.NUM)
+        return self.at(Value(p.number), p)
 
     @_('identifier')
     def value(self, p):
@@ -260,20 +236,44 @@ class MyParser(Parser):
     # Identifiers
     @_('PIDENTIFIER')
     def identifier(self, p):
-        return Identifier(p.PIDENTIFIER)
+        return self.at(Identifier(p.PIDENTIFIER), p)
 
-    @_('PIDENTIFIER LBRACKET NUM RBRACKET')
+    @_('PIDENTIFIER LBRACKET number RBRACKET')
     def identifier(self, p):
-        return Identifier(p.PIDENTIFIER, Value(p.NUM))
+        return self.at(Identifier(p.PIDENTIFIER, self.at(Value(p.number), p)), p)
 
     @_('PIDENTIFIER LBRACKET PIDENTIFIER RBRACKET')
     def identifier(self, p):
-        return Identifier(p.PIDENTIFIER0, Identifier(p.PIDENTIFIER1))
+        return self.at(Identifier(p.PIDENTIFIER0, self.at(Identifier(p.PIDENTIFIER1), p)), p)
+
+
+    # Numbers (także ujemne - lekser zwraca minus jako osobny token)
+    @_('NUM')
+    def number(self, p):
+        return p.NUM
+
+    @_('MINUS NUM')
+    def number(self, p):
+        return -p.NUM
+
+
+    def at(self, node, p, anchor=None):
+        # pozycja pierwszego symbolu produkcji albo węzła anchor
+        if anchor is not None:
+            return node.located(anchor)
+        node.lineno = p.lineno
+        if self.source is not None:
+            node.column = p.index - self.source.rfind("\n", 0, p.index)
+        return node
 
+    @classmethod
+    def _build(cls, definitions):
+        # tablice LALR z pamięci podręcznej (tables.py)
+        build_parser(cls, definitions)
 
     # Error handling
     def error(self, p):
         if p:
-            print(f"Syntax error at token {p.type} ({p.value}) on line {p.lineno}")
+            raise Exception(f"Syntax error at token {p.type} ({p.value}) on line {p.lineno}")
         else:
-            print("Syntax error at EOF")
\ No newline at end of file
+            raise Exception("Syntax error at EOF")
\ No newline at end of file
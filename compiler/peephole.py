@@ -0,0 +1,209 @@
+#
+# Optymalizator "przez dziurkę od klucza" dla wygenerowanego kodu.
+#
+# Reguły działają na liście rozkazów i etykiet z assembler.Assembly: skoki
+# wskazują etykiety, więc po każdym usunięciu rozkazu przesunięcia skoków
+# przeliczane są na nowo w Assembly.resolve(). Etykieta oznacza miejsce, do
+# którego można doskoczyć, dlatego wzorce nigdy nie przechodzą przez etykietę,
+# do której prowadzi jakiś skok. Reguły stosowane są aż do punktu stałego,
+# a Peephole.statistics zlicza, ile razy zadziałała każda z nich.
+#
+from assembler import Label, Instruction, JUMPS
+
+CONDITIONAL = {"JPOS": "pos", "JZERO": "zero", "JNEG": "neg"}
+BRANCH = {case: op for op, case in CONDITIONAL.items()}
+SIGNS = ("neg", "zero", "pos")
+# rozkazy, których jedynym efektem jest zmiana akumulatora
+ACCUMULATOR_ONLY = {"SET", "LOAD", "LOADI", "ADD", "SUB", "ADDI", "SUBI", "HALF"}
+# rozkazy kończące blok: za nimi do następnej etykiety nie da się dojść
+TERMINATORS = {"JUMP", "RTRN", "HALT"}
+
+
+def overwrites_accumulator(instruction):
+    # nowa wartość akumulatora nie zależy od poprzedniej
+    if instruction.op == "SET":
+        return True
+    if instruction.op == "GET":
+        return instruction.arg == 0
+    if instruction.op in ("LOAD", "LOADI"):
+        return instruction.arg != 0
+    return False
+
+
+class Peephole:
+    RULES = ("unused_labels", "unreachable", "redundant_load_store", "dead_set",
+             "jump_to_next", "jump_chain", "inverted_branch")
+
+    def __init__(self, code):
+        self.code = code
+        self.statistics = {rule: 0 for rule in self.RULES}
+
+    def run(self):
+        changed = True
+        while changed:
+            changed = False
+            for rule in self.RULES:
+                items = getattr(self, rule)(self.code.items)
+                if items is not None:
+                    self.code.items = items
+                    changed = True
+        return self.statistics
+
+    def count(self, rule, n=1):
+        self.statistics[rule] += n
+
+    def targets(self, items):
+        return {item.target for item in items if isinstance(item, Instruction) and item.target is not None}
+
+    def following(self, items, position):
+        # pierwszy rozkaz od pozycji position (pomijając etykiety) i etykiety po drodze
+        labels = []
+        while position < len(items) and isinstance(items[position], Label):
+            labels.append(items[position])
+            position += 1
+        return (items[position] if position < len(items) else None), labels
+
+    # Reguły
+    def unused_labels(self, items):
+        used = self.targets(items)
+        result = [item for item in items if not isinstance(item, Label) or item in used]
+        if len(result) == len(items):
+            return None
+        self.count("unused_labels", len(items) - len(result))
+        return result
+
+    def unreachable(self, items):
+        result = []
+        reachable = True
+        for item in items:
+            if isinstance(item, Label):
+                reachable = True
+            elif not reachable:
+                self.count("unreachable")
+                continue
+            result.append(item)
+            if isinstance(item, Instruction) and item.op in TERMINATORS:
+                reachable = False
+        return result if len(result) != len(items) else None
+
+    def redundant_load_store(self, items):
+        # STORE x; LOAD x  |  LOAD x; STORE x  |  STORE x; STORE x
+        result = []
+        for item in items:
+            previous = result[-1] if result else None
+            if isinstance(item, Instruction) and isinstance(previous, Instruction) \
+                    and item.target is None and previous.target is None and item.arg == previous.arg:
+                if (previous.op, item.op) in (("STORE", "LOAD"), ("LOAD", "STORE"), ("STORE", "STORE")) \
+                        and item.arg != 0:
+                    self.count("redundant_load_store")
+                    continue
+            result.append(item)
+        return result if len(result) != len(items) else None
+
+    def dead_set(self, items):
+        # zmiana akumulatora, którą następny rozkaz nadpisuje bez czytania
+        result = []
+        changed = False
+        for item in items:
+            previous = result[-1] if result else None
+            if isinstance(item, Instruction) and isinstance(previous, Instruction) \
+                    and previous.op in ACCUMULATOR_ONLY and overwrites_accumulator(item):
+                result.pop()
+                self.count("dead_set")
+                changed = True
+            result.append(item)
+        return result if changed else None
+
+    def jump_to_next(self, items):
+        result = []
+        changed = False
+        for position, item in enumerate(items):
+            if isinstance(item, Instruction) and item.op in JUMPS:
+                _, labels = self.following(items, position + 1)
+                if item.target in labels:
+                    self.count("jump_to_next")
+                    changed = True
+                    continue
+            result.append(item)
+        return result if changed else None
+
+    def destination(self, items, positions, label):
+        return self.following(items, positions[label])[0]
+
+    def jump_chain(self, items):
+        # skok do skoku: przekierowanie od razu do celu
+        positions = {item: position for position, item in enumerate(items) if isinstance(item, Label)}
+        result = []
+        changed = False
+        for item in items:
+            if isinstance(item, Instruction) and item.op in JUMPS:
+                target = item.target
+                seen = {target}
+                while True:
+                    next_item = self.destination(items, positions, target)
+                    if next_item is None or next_item.op not in JUMPS or next_item.target in seen:
+                        break
+                    # warunek drugiego skoku musi być spełniony, skoro spełniony był pierwszy
+                    if next_item.op != "JUMP" and next_item.op != item.op:
+                        break
+                    target = next_item.target
+                    seen.add(target)
+                if target is not item.target:
+                    item = Instruction(item.op, target=target, scope=item.scope, line=item.line)
+                    self.count("jump_chain")
+                    changed = True
+                elif item.op == "JUMP":
+                    next_item = self.destination(items, positions, target)
+                    if next_item is not None and next_item.op in ("HALT", "RTRN"):
+                        # skok do końca programu lub powrotu z procedury
+                        item = Instruction(next_item.op, next_item.arg, scope=item.scope, line=item.line)
+                        self.count("jump_chain")
+                        changed = True
+            result.append(item)
+        return result if changed else None
+
+    def inverted_branch(self, items):
+        # Jw L1; ...; JUMP L2; L1:  ->  skoki do L2 dla pozostałych znaków akumulatora
+        result = []
+        changed = False
+        position = 0
+        while position < len(items):
+            run = []
+            end = position
+            while end < len(items) and isinstance(items[end], Instruction) and items[end].op in CONDITIONAL:
+                run.append(items[end])
+                end += 1
+            jump = items[end] if end < len(items) else None
+            if run and isinstance(jump, Instruction) and jump.op == "JUMP" and jump.target is not None:
+                _, labels = self.following(items, end + 1)
+                near = run[0].target
+                if near in labels and all(branch.target is near for branch in run):
+                    cases = {CONDITIONAL[branch.op] for branch in run}
+                    rest = [case for case in SIGNS if case not in cases]
+                    if len(rest) < len(run) + 1:
+                        for case in rest:
+                            result.append(Instruction(BRANCH[case], target=jump.target, scope=jump.scope, line=jump.line))
+                        self.count("inverted_branch")
+                        changed = True
+                        position = end + 1
+                        continue
+            if run:
+                # powtórzony warunek w ciągu skoków warunkowych nigdy nie skoczy
+                seen = set()
+                for branch in run:
+                    if branch.op in seen:
+                        self.count("inverted_branch")
+                        changed = True
+                        continue
+                    seen.add(branch.op)
+                    result.append(branch)
+                position = end
+                continue
+            result.append(items[position])
+            position += 1
+        return result if changed else None
+
+
+def peephole(code):
+    code.statistics["peephole"] = Peephole(code).run()
+    return code
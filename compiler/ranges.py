@@ -0,0 +1,306 @@
+#
+# Przedziały wartości zmiennych i wybór wariantów procedur arytmetycznych.
+#
+# Procedury z arithmetic.py sprowadzają argumenty do wartości bezwzględnych,
+# a na końcu dzielenia poprawiają znaki ilorazu i reszty; dzielenie sprawdza
+# też, czy dzielnik nie jest zerem. Gdy wiadomo, że oba argumenty są
+# nieujemne albo że dzielnik nie jest zerem, generator używa wariantu bez tych
+# rozkazów (węzeł ir.Routine).
+#
+# Analiza w przód (Ranges) przypisuje zmiennym przedziały [lo, hi], gdzie
+# None oznacza brak ograniczenia, a brak klucza - dowolną wartość. Źródłem
+# wiedzy są stałe, działania na przedziałach, granice pętli FOR (iterator
+# leży między początkiem a granicą) i warunki: na krawędzi skoku przedział
+# jest zawężany według warunku albo jego zaprzeczenia, a krawędź, na której
+# warunek nie może zajść, nie niesie żadnej wartości (None). READ może
+# wczytać dowolną liczbę całkowitą. Zapis do parametru procedury może zmienić
+# inne parametry (przekazywane są przez referencję). Przedziały zmiennych
+# zmienianych w pętli zbiegają dzięki poszerzaniu (widen): granica, która się
+# przesuwa, skacze do najbliższej stałej z warunków programu (progu), a gdy
+# takiej nie ma - przestaje istnieć.
+#
+from ast_tree import *
+from arithmetic import ROUTINES
+from dataflow import Analysis
+from ir import Branch, ForTest, Reduction, Routine, Statement, restate, scoped
+
+UNKNOWN = (None, None)
+NEGATED = {'==': '!=', '!=': '==', '>': '<=', '<': '>=', '>=': '<', '<=': '>'}
+MIRRORED = {'==': '==', '!=': '!=', '>': '<', '<': '>', '>=': '<=', '<=': '>='}
+
+
+# Działania na przedziałach
+def hull(ranges):
+    ranges = list(ranges)
+    lows = [low for low, _ in ranges]
+    highs = [high for _, high in ranges]
+    return (None if None in lows else min(lows), None if None in highs else max(highs))
+
+
+def intersect(left, right):
+    # część wspólna albo None, gdy jest pusta
+    low = left[0] if right[0] is None else right[0] if left[0] is None else max(left[0], right[0])
+    high = left[1] if right[1] is None else right[1] if left[1] is None else min(left[1], right[1])
+    if low is not None and high is not None and low > high:
+        return None
+    return low, high
+
+
+def negate(value):
+    low, high = value
+    return (None if high is None else -high, None if low is None else -low)
+
+
+def add(left, right):
+    low = None if left[0] is None or right[0] is None else left[0] + right[0]
+    high = None if left[1] is None or right[1] is None else left[1] + right[1]
+    return low, high
+
+
+def nonnegative(value):
+    return value[0] is not None and value[0] >= 0
+
+
+def nonpositive(value):
+    return value[1] is not None and value[1] <= 0
+
+
+def finite(*values):
+    return all(bound is not None for value in values for bound in value)
+
+
+def multiply(left, right):
+    if finite(left, right):
+        return hull((a * b, a * b) for a in left for b in right)
+    if nonnegative(left) and nonnegative(right):
+        return left[0] * right[0], None
+    if nonpositive(left) and nonpositive(right):
+        return 0, None
+    if (nonnegative(left) and nonpositive(right)) or (nonpositive(left) and nonnegative(right)):
+        return None, 0
+    return UNKNOWN
+
+
+def divide(left, right):
+    # podłoga ilorazu, x / 0 = 0
+    if finite(left, right):
+        parts = [part for part in (intersect(right, (None, -1)), intersect(right, (1, None))) if part]
+        results = [(a // b, a // b) for part in parts for a in left for b in part]
+        if intersect(right, (0, 0)):
+            results.append((0, 0))
+        return hull(results)
+    if nonnegative(left) and nonnegative(right):
+        return 0, left[1]
+    if finite(left):
+        bound = max(abs(left[0]), abs(left[1]))
+        return -bound, bound
+    return UNKNOWN
+
+
+def modulo(left, right):
+    # reszta ma znak dzielnika i jest od niego mniejsza co do modułu, x % 0 = 0
+    if nonnegative(right):
+        high = None if right[1] is None else max(right[1] - 1, 0)
+        if nonnegative(left) and left[1] is not None:
+            high = left[1] if high is None else min(high, left[1])
+        return 0, high
+    if nonpositive(right):
+        return (None if right[0] is None else min(right[0] + 1, 0)), 0
+    if finite(right):
+        return right[0] + 1, right[1] - 1
+    return UNKNOWN
+
+
+OPERATIONS = {
+    '+': add,
+    '-': lambda left, right: add(left, negate(right)),
+    '*': multiply,
+    '/': divide,
+    '%': modulo,
+}
+
+
+class Ranges(Analysis):
+    # klucz zmiennej -> przedział; None w miejscach, do których nie da się dojść
+    def __init__(self, cfg):
+        self.aliases = []
+        if isinstance(cfg.scope, Procedure):
+            self.aliases = [{param for param in cfg.scope.parameters if not isinstance(param, tuple)}]
+        self.keys = {}  # instrukcja -> funkcja nazwa -> klucz (ir.scoped)
+        # progi poszerzania: stałe z warunków i sąsiednie liczby
+        thresholds = {-1, 0, 1}
+        for block in cfg.blocks:
+            if isinstance(block.terminator, Branch):
+                for node in (block.terminator.condition.left, block.terminator.condition.right):
+                    if isinstance(node, Value):
+                        thresholds |= {node.value - 1, node.value, node.value + 1}
+        self.thresholds = sorted(thresholds)
+
+    def key(self, item, name):
+        if item not in self.keys:
+            self.keys[item] = scoped(item).key
+        return self.keys[item](name)
+
+    def boundary(self, cfg):
+        return {}
+
+    def initial(self, cfg):
+        return None
+
+    def meet(self, values):
+        values = [value for value in values if value is not None]
+        if not values:
+            return None
+        return {key: hull(value[key] for value in values)
+                for key in values[0] if all(key in value for value in values[1:])
+                and hull(value[key] for value in values) != UNKNOWN}
+
+    def widen(self, previous, value):
+        if previous is None or value is None:
+            return value
+        widened = {}
+        for key, (low, high) in value.items():
+            if key not in previous:
+                continue
+            old_low, old_high = previous[key]
+            if low is not None and (old_low is None or low < old_low):
+                low = max((bound for bound in self.thresholds if bound <= low), default=None)
+            if high is not None and (old_high is None or high > old_high):
+                high = min((bound for bound in self.thresholds if bound >= high), default=None)
+            if (low, high) != UNKNOWN:
+                widened[key] = (low, high)
+        return widened
+
+    def range(self, item, node, value):
+        if isinstance(node, Value):
+            return node.value, node.value
+        if isinstance(node, Identifier):
+            if node.index is not None:
+                return UNKNOWN
+            return value.get(self.key(item, node.name), UNKNOWN)
+        return OPERATIONS[node.operator](self.range(item, node.left, value), self.range(item, node.right, value))
+
+    def written(self, item):
+        written = item.defs | item.may_defs
+        for group in self.aliases:
+            if written & group:
+                written = written | group
+        return written
+
+    def transfer(self, item, value):
+        if value is None or not isinstance(item, Statement):
+            return value
+        written = self.written(item)
+        result = {key: bounds for key, bounds in value.items() if key not in written}
+        known = {}
+        command = item.command
+        if item.kind == "assign" and item.defs:
+            known[next(iter(item.defs))] = self.range(item, command.expression, value)
+        elif item.kind == "for_start":
+            iterator = next(key for key in item.defs if not key.endswith(":limit"))
+            known[iterator] = self.range(item, command.start_value, value)
+            known[f"{iterator}:limit"] = self.range(item, command.end_value, value)
+        elif item.kind == "for_step":
+            iterator = next(iter(item.defs))
+            step = 1 if command.direction == "to" else -1
+            known[iterator] = add(value.get(iterator, UNKNOWN), (step, step))
+        result.update((key, bounds) for key, bounds in known.items() if bounds != UNKNOWN)
+        return result
+
+    # Zawężanie na krawędziach
+    def transfer_edge(self, block, successor, value):
+        terminator = block.terminator
+        if value is None:
+            return None
+        if isinstance(terminator, Branch) and terminator.true_target is not terminator.false_target:
+            condition = terminator.condition
+            operator = condition.operator if successor is terminator.true_target else NEGATED[condition.operator]
+            return self.refine(terminator, condition.left, operator, condition.right, value)
+        if isinstance(terminator, ForTest) and successor is terminator.body:
+            iterator = next(key for key in terminator.uses if not key.endswith(":limit"))
+            limit = f"{iterator}:limit"
+            operator = '<=' if terminator.command.direction == "to" else '>='
+            return self.refine_keys(iterator, operator, limit, value)
+        return value
+
+    def refine(self, item, left, operator, right, value):
+        # wartość po krawędzi, na której zachodzi left operator right
+        bounds = {}
+        for node in (left, right):
+            if isinstance(node, Identifier) and node.index is None:
+                bounds[id(node)] = self.key(item, node.name)
+        left_range, right_range = self.range(item, left, value), self.range(item, right, value)
+        value = dict(value)
+        for node, node_range, op, other in ((left, left_range, operator, right_range),
+                                            (right, right_range, MIRRORED[operator], left_range)):
+            narrowed = constrain(node_range, op, other)
+            if narrowed is None:
+                return None
+            if id(node) in bounds and narrowed != UNKNOWN:
+                narrowed = intersect(value.get(bounds[id(node)], UNKNOWN), narrowed)
+                if narrowed is None:
+                    return None
+                value[bounds[id(node)]] = narrowed
+        return value
+
+    def refine_keys(self, left, operator, right, value):
+        left_range, right_range = value.get(left, UNKNOWN), value.get(right, UNKNOWN)
+        value = dict(value)
+        for key, key_range, op, other in ((left, left_range, operator, right_range),
+                                          (right, right_range, MIRRORED[operator], left_range)):
+            narrowed = constrain(key_range, op, other)
+            if narrowed is None:
+                return None
+            if narrowed != UNKNOWN:
+                value[key] = narrowed
+        return value
+
+
+def constrain(value, operator, other):
+    # część przedziału value, dla której value operator x dla pewnego x z other
+    low, high = other
+    if operator == '<':
+        bound = (None, None if high is None else high - 1)
+    elif operator == '<=':
+        bound = (None, high)
+    elif operator == '>':
+        bound = (None if low is None else low + 1, None)
+    elif operator == '>=':
+        bound = (low, None)
+    elif operator == '==':
+        bound = other
+    else:
+        # value != x: zawęża tylko wtedy, gdy x jest znany i leży na brzegu
+        bound = UNKNOWN
+        if low is not None and low == high:
+            if value[0] == low == value[1]:
+                return None
+            if value[0] == low:
+                return low + 1, value[1]
+            if value[1] == low:
+                return value[0], low - 1
+    return intersect(value, bound)
+
+
+def specialize_routines(cfg):
+    solution = Ranges(cfg).solve(cfg)
+    analysis = solution.analysis
+    for block in cfg.blocks:
+        statements = []
+        for item, value, _ in solution.statements(block):
+            if item is block.terminator:
+                continue
+            expression = item.command.expression if item.kind == "assign" else None
+            if value is not None and isinstance(expression, Operation) and expression.operator in ROUTINES \
+                    and not isinstance(expression, (Reduction, Routine)):
+                left = analysis.range(item, expression.left, value)
+                right = analysis.range(item, expression.right, value)
+                unsigned = nonnegative(left) and nonnegative(right)
+                nonzero = intersect(right, (0, 0)) is None and expression.operator != '*'
+                if unsigned or nonzero:
+                    command = Assign(item.command.identifier, Routine(expression, unsigned, nonzero))
+                    command.located(item.command)
+                    item = restate(item, command)
+            statements.append(item)
+        block.statements = statements
+    return cfg
@@ -0,0 +1,150 @@
+#
+# Analiza semantyczna: rozwiązywanie nazw i kontrola poprawności programu.
+#
+# Graf procedury (lub programu głównego) z ir.py przechodzony jest w kolejności
+# bloków - tej samej, w której generator wypisuje kod. Każda nazwa jest
+# rozwiązywana raz w łańcuchu zakresów (symbol_table.Scope; ciało pętli FOR to
+# zakres z iteratorem wewnątrz zakresu procedury), a symbol trafia do węzła:
+# Identifier.symbol, Element.address_symbol, For.symbol oraz ProcCall.procedure
+# i ProcCall.arguments. Generator nie szuka już nazw w tablicy symboli.
+#
+# Przy okazji sprawdzane są deklaracje, użycie tablic i zmiennych, stałe
+# indeksy tablic, zapis do iteratora, wywołania procedur i - w kolejności
+# kodu - odczyt zmiennej przed nadaniem jej wartości (tylko dla drzewa przed
+# optymalizacjami, por. CodeGenerator.validated).
+#
+from ast_tree import *
+from ir import Branch, ForTest, Element
+from symbol_table import Array, Variable, Iterator, Parameter
+
+
+class CompilerError(Exception):
+    pass
+
+
+class Semantics:
+    def __init__(self, symbol_table, procedure=None, validated=False):
+        self.symbol_table = symbol_table
+        self.procedure = procedure  # symbol_table.Procedure lub None dla PROGRAM
+        self.validated = validated
+        self.scope = symbol_table.scope(procedure)
+        self.modes = {}  # pętla For -> ir.ForTest.mode
+
+    def run(self, cfg):
+        self.modes = {block.terminator.command: block.terminator.mode
+                      for block in cfg.blocks if isinstance(block.terminator, ForTest)}
+        for block in cfg.blocks:
+            if block.resident is not None:
+                self.resolve_read(block.resident)
+            for statement in block.statements:
+                self.check_at(statement.line, getattr(self, "check_" + statement.kind), statement.command)
+            if isinstance(block.terminator, Branch):
+                self.check_at(block.terminator.line, self.check_condition, block.terminator.condition)
+        if self.procedure:
+            self.symbol_table.validate_procedure(self.procedure.name)
+
+    def check_at(self, line, check, node):
+        try:
+            check(node)
+        except Exception as e:
+            raise CompilerError(f"{e} Line {line}.")
+
+    # Commands
+    def check_assign(self, command):
+        symbol = self.resolve_write(command.identifier)
+        self.check_expression(command.expression)
+        self.mark_initialized(symbol)
+
+    def check_address(self, command):
+        self.resolve_read(command.element)
+        self.mark_initialized(self.resolve_write(command.identifier))
+
+    def check_read(self, command):
+        self.mark_initialized(self.resolve_write(command.identifier))
+
+    def check_write(self, command):
+        self.check_expression(command.value)
+
+    def check_proccall(self, command):
+        if self.procedure and command.name == self.procedure.name:
+            raise Exception(f"Error: Undeclared procedure '{command.name}' (recursive call).")
+        callee = self.symbol_table.get_procedure(command.name)
+        if len(command.args) != len(callee.parameter_names):
+            raise Exception(f"Error: Procedure '{command.name}' expects {len(callee.parameter_names)} arguments, got {len(command.args)}.")
+        arguments = []
+        for arg, param_name in zip(command.args, callee.parameter_names):
+            symbol = self.symbol_table.lookup(arg, self.scope)
+            if callee.parameters[param_name].is_array != self.is_array(symbol):
+                raise Exception(f"Error: Invalid argument '{arg}' for parameter '{param_name}' of procedure '{command.name}'.")
+            self.mark_initialized(symbol)
+            arguments.append(symbol)
+        command.procedure = callee
+        command.arguments = arguments
+        if self.procedure:
+            self.procedure.called_procedures.add(command.name)
+
+    def check_for_start(self, command):
+        # granice pętli liczone są raz, zanim iterator wejdzie w zasięg
+        self.check_expression(command.start_value)
+        self.check_expression(command.end_value)
+        mode = self.modes.get(command)
+        body = self.symbol_table.add_iterator(command.iterator, self.scope)
+        command.symbol = body[command.iterator]
+        if isinstance(mode, tuple):
+            # iterator-wskaźnik: komórka przechowuje adres elementu tablicy
+            command.symbol.array = self.symbol_table.lookup(mode[1], self.scope)
+        self.scope = body
+
+    def check_for_step(self, command):
+        pass
+
+    def check_for_end(self, command):
+        self.scope = self.scope.parent
+
+    # Names
+    def check_condition(self, condition):
+        self.check_expression(condition.left)
+        self.check_expression(condition.right)
+
+    def check_expression(self, expression):
+        if isinstance(expression, Operation):
+            self.check_expression(expression.left)
+            self.check_expression(expression.right)
+        elif isinstance(expression, Identifier):
+            self.resolve_read(expression)
+
+    def is_array(self, symbol):
+        return isinstance(symbol, Array) or (isinstance(symbol, Parameter) and symbol.is_array)
+
+    def resolve(self, identifier):
+        symbol = self.symbol_table.lookup(identifier.name, self.scope)
+        identifier.symbol = symbol
+        if isinstance(identifier, Element):
+            identifier.address_symbol = self.symbol_table.lookup(identifier.address, self.scope)
+        if identifier.index is None:
+            if self.is_array(symbol):
+                raise Exception(f"Error: Improper use of array '{identifier.name}'.")
+            return symbol
+        if not self.is_array(symbol):
+            raise Exception(f"Error: Improper use of variable '{identifier.name}' as an array.")
+        if isinstance(identifier.index, Identifier):
+            self.resolve_read(identifier.index)
+        elif isinstance(symbol, Array):
+            symbol.get_at(identifier.index.value)
+        return symbol
+
+    def resolve_read(self, identifier):
+        symbol = self.resolve(identifier)
+        if isinstance(symbol, Variable) and not symbol.initialized and not self.validated:
+            raise Exception(f"Error: Use of uninitialized variable '{identifier.name}'.")
+        return symbol
+
+    def resolve_write(self, identifier):
+        symbol = self.resolve(identifier)
+        if isinstance(symbol, Iterator):
+            raise Exception(f"Error: Modification of loop iterator '{identifier.name}'.")
+        return symbol
+
+    def mark_initialized(self, symbol):
+        if isinstance(symbol, Variable):
+            symbol.initialized = True
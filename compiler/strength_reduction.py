@@ -0,0 +1,137 @@
+#
+# Redukcja mocy działań ze stałą na grafie przepływu sterowania (ir.py).
+#
+# Maszyna nie ma mnożenia ani dzielenia (procedury z arithmetic.py kosztują
+# kilkaset jednostek), ale HALF kosztuje 5, a podwojenie akumulatora to
+# STORE i ADD. Dlatego:
+# - mnożenie przez stałą to najtańszy łańcuch podwojeń, dodawań i odejmowań
+#   mnożnej (dla ujemnej stałej z negacją na końcu),
+# - dzielenie przez potęgę dwójki to kolejne HALF: HALF jest przesunięciem
+#   arytmetycznym, więc zaokrągla w dół także liczby ujemne, tak jak
+#   dzielenie w języku; przez ujemną potęgę dwójki dzielimy -x,
+# - reszta z dzielenia przez potęgę dwójki to x minus x bez najmłodszych
+#   bitów (HALF, a potem podwojenia); reszta ma znak dzielnika, więc
+#   x % -m = -((-x) % m).
+# Łańcuch zastępuje procedurę tylko wtedy, gdy według tabeli kosztów jest
+# tańszy od jej najtańszego wywołania. Kroki (STEP_COSTS) trafiają do węzła
+# ir.Reduction, a rozkazy wypisuje generator.
+#
+# Tożsamości (x*1, x+0, x-x, x/1, 0/x, x%1, x/0 itd.) zastępowane są samym
+# argumentem albo stałą, a operacje na dwóch stałych - wynikiem.
+#
+from functools import lru_cache
+
+from ast_tree import *
+from constant_propagation import OPERATIONS, constant
+from fusion import same_value
+from ir import Reduction, restate
+
+# koszt kroku planu; mnożna (albo -x) leży w komórce, podwojenie to
+# STORE t; ADD t, negacja STORE t; SUB t; SUB t, "rsub" STORE t; LOAD x; SUB t
+STEP_COSTS = {"add": 10, "sub": 10, "double": 20, "half": 5, "negate": 30, "store": 10, "rsub": 30}
+# najtańsze wywołanie procedury mnożenia lub dzielenia (przy małych argumentach)
+ROUTINE_COST = 400
+
+
+def power_of_two(value):
+    # k, jeśli value = 2^k (k > 0), inaczej None
+    if value > 1 and value & (value - 1) == 0:
+        return value.bit_length() - 1
+    return None
+
+
+@lru_cache(maxsize=None)
+def multiplication_chain(multiplier):
+    # najtańsze kroki od x do multiplier * x (multiplier > 0)
+    if multiplier == 1:
+        return ()
+    if multiplier == 2:
+        return ("add",)
+    if multiplier % 2 == 0:
+        return multiplication_chain(multiplier // 2) + ("double",)
+    return min(multiplication_chain(multiplier - 1) + ("add",),
+               multiplication_chain(multiplier + 1) + ("sub",), key=cost)
+
+
+def cost(steps):
+    return sum(STEP_COSTS[step] for step in steps)
+
+
+def plan(left, operator, right):
+    # kroki liczące left operator right, gdy jedna strona jest stałą (int),
+    # a druga nie (None); None, gdy lepsza jest procedura
+    if operator == '*' and isinstance(left, int) and right is None:
+        left, right = right, left
+    if left is not None or not isinstance(right, int):
+        return None
+    steps = None
+    if operator == '*' and right not in (0, 1):
+        steps = multiplication_chain(abs(right)) + (("negate",) if right < 0 else ())
+    elif operator == '/' and right == -1:
+        steps = ("negate",)
+    elif operator == '/' and power_of_two(abs(right)) is not None:
+        steps = (("negate",) if right < 0 else ()) + ("half",) * power_of_two(abs(right))
+    elif operator == '%' and power_of_two(abs(right)) is not None:
+        shift = power_of_two(abs(right))
+        steps = ("half",) * shift + ("double",) * shift + ("rsub",)
+        if right < 0:
+            steps = ("negate", "store") + steps + ("negate",)
+    if steps is None or cost(steps) >= ROUTINE_COST:
+        return None
+    return steps
+
+
+def identity(expression):
+    # prostszy węzeł o tej samej wartości albo None
+    left, operator, right = expression.left, expression.operator, expression.right
+    known = {side: node.value for side, node in (("left", left), ("right", right)) if isinstance(node, Value)}
+    if len(known) == 2:
+        return constant(expression, OPERATIONS[operator](known["left"], known["right"]))
+    if operator == '+' and known.get("left") == 0:
+        return right
+    if operator in ('+', '-') and known.get("right") == 0:
+        return left
+    if operator == '*' and 0 in known.values():
+        return constant(expression, 0)
+    if operator == '*' and known.get("left") == 1:
+        return right
+    if operator in ('*', '/') and known.get("right") == 1:
+        return left
+    if operator in ('/', '%') and (known.get("left") == 0 or known.get("right") == 0):
+        # x / 0 = x % 0 = 0
+        return constant(expression, 0)
+    if operator == '%' and known.get("right") in (1, -1):
+        return constant(expression, 0)
+    if operator in ('-', '%') and not known and same_value(left, right):
+        # x % x = 0 także dla x = 0
+        return constant(expression, 0)
+    return None
+
+
+def reduce_expression(expression):
+    simpler = identity(expression)
+    if simpler is not None:
+        return simpler
+    left = expression.left.value if isinstance(expression.left, Value) else None
+    right = expression.right.value if isinstance(expression.right, Value) else None
+    steps = plan(left, expression.operator, right)
+    if steps is None:
+        return None
+    operand = expression.right if isinstance(expression.left, Value) else expression.left
+    return Reduction(expression, operand, steps)
+
+
+def reduce_strength(cfg):
+    for block in cfg.blocks:
+        statements = []
+        for statement in block.statements:
+            expression = statement.command.expression if statement.kind == "assign" else None
+            if isinstance(expression, Operation) and not isinstance(expression, Reduction):
+                reduced = reduce_expression(expression)
+                if reduced is not None:
+                    command = Assign(statement.command.identifier, reduced)
+                    command.located(statement.command)
+                    statement = restate(statement, command)
+            statements.append(statement)
+        block.statements = statements
+    return cfg
@@ -1,4 +1,27 @@
-class Array:
+# Symbole nazw. Analiza semantyczna (semantics.py) rozwiązuje każdą nazwę
+# raz i zapisuje symbol w węźle drzewa, a generator korzysta już tylko z
+# symboli: kind - rodzaj, memory_index - komórka (dla tablicy pierwsza,
+# base - adres elementu o indeksie 0), first_index i last_index - granice
+# tablicy, by_reference - komórka przechowuje adres wartości.
+#
+# Tablica symboli nadaje komórki po kolei; memory.py przenosi je potem
+# (relocate) tak, by symbole, które nie żyją jednocześnie, dzieliły adresy.
+class Symbol:
+    kind = None
+    by_reference = False
+    size = 1  # liczba komórek od memory_index
+
+    def __deepcopy__(self, memo):
+        # kopia drzewa wskazuje te same symbole
+        return self
+
+    def relocate(self, address):
+        self.memory_index = address
+
+
+class Array(Symbol):
+    kind = "array"
+
     def __init__(self, memory_index, first_index, last_index):
         self.memory_index = memory_index
         if first_index > last_index:
@@ -6,16 +29,27 @@ class Array:
         self.first_index = first_index
         self.last_index = last_index
 
+    @property
+    def base(self):
+        # adres (być może spoza pamięci) elementu o indeksie 0: adres t[i] to base + i
+        return self.memory_index - self.first_index
+
+    @property
+    def size(self):
+        return self.last_index - self.first_index + 1
+
     def __str__(self):
         return f"Array at memory index {self.memory_index}, range [{self.first_index}:{self.last_index}]"
 
     def get_at(self, index):
         if index < self.first_index or index > self.last_index:
             raise IndexError("Error: Array index out of bounds.")
-        return self.memory_index + (index - self.first_index)
-    
+        return self.base + index
+
+
+class Variable(Symbol):
+    kind = "variable"
 
-class Variable:
     def __init__(self, memory_index):
         self.memory_index = memory_index
         self.initialized = False
@@ -23,141 +57,210 @@ class Variable:
     def __str__(self):
         status = "Initialized" if self.initialized else "Uninitialized"
         return f"{status} variable at memory index {self.memory_index}"
-    
 
-class Iterator:
-    def __init__(self, memory_index, limit_index):
+
+class Iterator(Symbol):
+    kind = "iterator"
+    size = 2
+
+    def __init__(self, name, memory_index, procedure=None, depth=1):
+        self.name = name
+        self.memory_index = memory_index
+        self.limit_index = memory_index + 1
+        # procedura (None dla PROGRAM) i zagnieżdżenie pętli (1 - pętla zewnętrzna)
+        self.procedure = procedure
+        self.depth = depth
+        # iterator-wskaźnik: tablica, której element wskazuje (for_loops.py)
+        self.array = None
+
+    @property
+    def offset(self):
+        # komórki przechowują iterator + offset (wskaźnik do elementu tablicy)
+        return self.array.base if self.array is not None else 0
+
+    def relocate(self, address):
+        self.memory_index = address
+        self.limit_index = address + 1
+
+    def __str__(self):
+        return f"Iterator '{self.name}' at memory index {self.memory_index}, limit index {self.limit_index}"
+
+
+# Parametry przekazywane są przez referencję: komórka parametru przechowuje
+# adres zmiennej, a dla tablic (T) adres elementu o indeksie 0.
+class Parameter(Symbol):
+    kind = "parameter"
+    by_reference = True
+
+    def __init__(self, memory_index, is_array=False):
         self.memory_index = memory_index
-        self.limit_index = limit_index
+        self.is_array = is_array
 
     def __str__(self):
-        return f"Iterator at memory index {self.memory_index}, limit index {self.limit_index}"
+        kind = "array parameter" if self.is_array else "parameter"
+        return f"{kind.capitalize()} at memory index {self.memory_index}"
+
+
+class Scope(dict):
+    # nazwa -> symbol; nazw brakujących w zakresie szukamy w zakresach
+    # otaczających (parent): ciało pętli FOR to zakres z samym iteratorem
+    def __init__(self, parent=None, procedure=None):
+        super().__init__()
+        self.parent = parent
+        self.procedure = parent.procedure if parent is not None else procedure
+        # liczba pętli FOR otaczających zakres
+        self.depth = parent.depth + 1 if parent is not None else 0
 
-    
+    def lookup(self, name):
+        scope = self
+        while scope is not None:
+            if name in scope:
+                return scope[name]
+            scope = scope.parent
+        return None
 
-class Procedure:
-    def __init__(self, name, parameters, local_variables, commands, memory_index):
+
+class Procedure(Symbol):
+    kind = "procedure"
+
+    def __init__(self, name, parameters, memory_index, order):
         self.name = name
+        # kolejność definicji: procedura może wołać tylko wcześniejsze
+        self.order = order
+        # pierwsza komórka procedury przechowuje adres powrotu
         self.memory_index = memory_index
-        self.parameters = {param: memory_index + i for i, param in enumerate(parameters)}
-        self.local_variables = {var: memory_index + len(parameters) + i for i, var in enumerate(local_variables)}
-        self.local_arrays = {}
-        self.commands = commands
+        self.return_address = memory_index
+        self.scope = Scope(procedure=self)
+        self.parameters = {}
+        self.parameter_names = []
+        for i, param in enumerate(parameters):
+            param_name, is_array = (param[0], True) if isinstance(param, tuple) else (param, False)
+            if not param_name.isidentifier():
+                raise Exception(f"Error: Invalid parameter name {param_name}")
+            if param_name in self.parameters:
+                raise Exception(f"Error: Redeclaration of parameter '{param_name}' in procedure '{name}'.")
+            self.parameters[param_name] = Parameter(memory_index + 1 + i, is_array)
+            self.parameter_names.append(param_name)
+        self.scope.update(self.parameters)
+        # parametry skalarne przekazywane przez kopię: nazwa -> Variable z kopią
+        self.copies = {}
+        self.commands = None
+        self.label = None
         self.called_procedures = set()
-        self.memory_size = len(parameters) + len(local_variables)
+        self.memory_size = 1 + len(parameters)
 
-        for param in parameters:
-            if not param.isidentifier():
-                raise Exception(f"Error: Invalid parameter name {param}")
+    @property
+    def size(self):
+        # adres powrotu i parametry
+        return 1 + len(self.parameter_names)
 
-    def is_valid_variable(self, name):
-        return name in self.parameters or name in self.local_variables
+    def relocate(self, address):
+        self.memory_index = address
+        self.return_address = address
+        for i, name in enumerate(self.parameter_names):
+            self.parameters[name].memory_index = address + 1 + i
 
     def __str__(self):
-        return f"Procedure '{self.name}' at memory index {self.memory_index} with parameters {self.parameters}"
+        return f"Procedure '{self.name}' at memory index {self.memory_index} with parameters {self.parameter_names}"
 
-    def __str__(self):
-        return f"Procedure '{self.name}' at memory index {self.memory_index} with parameters {self.parameters}"
 
-
-class SymbolTable(dict):
+class SymbolTable:
     def __init__(self):
-        super().__init__()
-        self.memory_index = 0
+        # komórka 0 to akumulator
+        self.memory_index = 1
+        self.globals = Scope()  # zmienne programu głównego
         self.consts = {}
-        self.iterators = {}
         self.procedures = {}
+        self.temporaries = {}
+        self.iterators = []
+
+    def scope(self, procedure=None):
+        return procedure.scope if procedure else self.globals
 
     def add_variable(self, name, scope=None):
-        table = scope.local_variables if scope else self
-        if name in table or name in self.iterators:
+        table = self.scope(scope)
+        if name in table:
             raise Exception(f"Error: Redeclaration of variable '{name}' in scope.")
         table[name] = Variable(self.memory_index)
         self.memory_index += 1
+        if scope:
+            scope.memory_size += 1
+        return table[name]
 
     def add_array(self, name, first_index, last_index, scope=None):
-        table = scope.local_arrays if scope else self
-        if name in table or name in self.iterators:
+        table = self.scope(scope)
+        if name in table:
             raise Exception(f"Error: Redeclaration of array '{name}' in scope.")
         if first_index > last_index:
-            raise Exception(f"Invalid range for array '{name}'.")
+            raise Exception(f"Error: Invalid range for array '{name}'.")
         table[name] = Array(self.memory_index, first_index, last_index)
         self.memory_index += (last_index - first_index + 1)
+        if scope:
+            scope.memory_size += last_index - first_index + 1
+        return table[name]
+
+    def add_parameter_copy(self, name, scope):
+        # własna komórka procedury z kopią parametru (aliasing.py); w zakresie
+        # procedury nazwa parametru wskazuje odtąd kopię
+        copy = Variable(self.memory_index)
+        copy.initialized = True
+        scope.copies[name] = copy
+        scope.scope[name] = copy
+        self.memory_index += 1
+        scope.memory_size += 1
+        return copy
 
     def add_const(self, value):
         if value not in self.consts:
             self.consts[value] = self.memory_index
             self.memory_index += 1
         return self.consts[value]
-    
-    def add_iterator(self, name):
-        if name in self or name in self.iterators:
+
+    def add_temporary(self, name):
+        if name not in self.temporaries:
+            self.temporaries[name] = self.memory_index
+            self.memory_index += 1
+        return self.temporaries[name]
+
+    def add_iterator(self, name, scope):
+        # zakres ciała pętli z nowym iteratorem name wewnątrz zakresu scope
+        if isinstance(scope.lookup(name), Iterator):
             raise Exception(f"Error: Redeclaration of iterator '{name}'.")
-        limit_address = self.memory_index + 1
-        self.iterators[name] = Iterator(self.memory_index, limit_address)
+        if scope.procedure and name in scope.procedure.parameters:
+            raise Exception(f"Error: Iterator '{name}' conflicts with parameter.")
+        body = Scope(scope)
+        body[name] = Iterator(name, self.memory_index, scope.procedure, body.depth)
+        self.iterators.append(body[name])
         self.memory_index += 2
+        return body
 
-
-    def add_procedure(self, name, parameters, local_variables, commands):
+    def add_procedure(self, name, parameters):
         if name in self.procedures:
             raise Exception(f"Error: Redeclaration of procedure '{name}'.")
-        if name in self:
+        if name in self.globals:
             raise Exception(f"Error: Name '{name}' conflicts with variable or array.")
-        
+
         base_memory_index = self.memory_index
-        self.memory_index += len(parameters) + len(local_variables)
+        self.memory_index += 1 + len(parameters)
 
-        procedure = Procedure(name, parameters, local_variables, commands, base_memory_index)
+        procedure = Procedure(name, parameters, base_memory_index, len(self.procedures))
         self.procedures[name] = procedure
-
-        self.validate_procedure(name)
+        return procedure
 
     def validate_procedure(self, name):
         procedure = self.get_procedure(name)
         for called_proc in procedure.called_procedures:
             if called_proc not in self.procedures:
                 raise Exception(f"Error: Procedure {called_proc} called in {name} is not defined.")
-            if list(self.procedures.keys()).index(called_proc) > list(self.procedures.keys()).index(name):
+            if self.procedures[called_proc].order >= procedure.order:
                 raise Exception(f"Error: Procedure {called_proc} must be defined before it is called in {name}.")
 
-    def get_iterator(self, name):
-        return self.iterators.get(name)
-    
-    # getting variable
-    def get_variable(self, name, scope=None):
-        table = scope.locals if scope else self
-        if name in table:
-            return table[name]
-        elif name in self.iterators:
-            return self.iterators[name]
-        else:
-            raise Exception(f"Error: Undeclared variable '{name}' in scope.")
-        
-    def get_variable(self, name, scope=None):
-        table = scope.local_variables if scope else self
-        if name in table:
-            return table[name]
-        elif name in self.iterators:
-            return self.iterators[name]
-        else:
+    # getting variable (zmienna, tablica, iterator lub parametr)
+    def lookup(self, name, scope):
+        symbol = scope.lookup(name)
+        if symbol is None:
             raise Exception(f"Error: Undeclared variable '{name}' in scope.")
-
-    def get_array_at(self, name, index, scope=None):
-        table = scope.local_arrays if scope else self
-        if name in table:
-            try:
-                return table[name].get_at(index)
-            except AttributeError:
-                raise Exception(f"Error: Non-array '{name}' used as an array.")
-        else:
-            raise Exception(f"Error: Undeclared array '{name}' in scope.")
-        
-    def get_address(self, target, scope=None):
-        table = scope.local_variables if scope else self
-        if isinstance(target, str):
-            return self.get_variable(target, scope).memory_index
-        elif isinstance(target, tuple):
-            return self.get_array_at(target[0], target[1], scope)
+        return symbol
 
     def get_procedure(self, name):
         if name in self.procedures:
@@ -173,57 +276,53 @@ if __name__ == "__main__":
     symbol_table.add_variable("x")
     symbol_table.add_variable("y")
     print("Symbol table after adding global variables:")
-    print(symbol_table)
+    print(symbol_table.globals)
 
     print("\n=== Adding global arrays ===")
     symbol_table.add_array("A", 0, 5)
     symbol_table.add_array("B", 1, 10)
     print("Symbol table after adding global arrays:")
-    print(symbol_table)
+    print(symbol_table.globals)
 
     print("\n=== Adding iterators ===")
-    symbol_table.add_iterator("i")
-    symbol_table.add_iterator("j")
-    print("Symbol table after adding iterators:")
-    print(symbol_table)
+    loop = symbol_table.add_iterator("i", symbol_table.globals)
+    inner_loop = symbol_table.add_iterator("j", loop)
+    print("Scopes after adding iterators:")
+    print(inner_loop, "->", loop)
 
     print("\n=== Adding procedures ===")
-    symbol_table.add_procedure('proc1', ['a', 'Tb'], ['x'], ['WRITE a;', 'WRITE x;'])
-    proc1 = symbol_table.get_procedure("proc1")
+    proc1 = symbol_table.add_procedure('proc1', ['a', ('b', "table")])
     symbol_table.add_variable("z", proc1)
     symbol_table.add_array("C", 0, 3, proc1)
     print(f"Procedure 'proc1': {proc1}")
-    print("Local variables of procedure 'proc1':")
-    print(proc1.local_variables)
-    print("Local arrays of procedure 'proc1':")
-    print(proc1.local_arrays)
+    print("Scope of procedure 'proc1':")
+    print(proc1.scope)
 
     print("\n=== Adding second procedure ===")
-    symbol_table.add_procedure('proc2', ['p', 'Tq'], ['y', 'z'], ['proc1(p, Tq);', 'WRITE y;', 'WRITE z;'])
-    proc2 = symbol_table.get_procedure("proc2")
+    proc2 = symbol_table.add_procedure('proc2', ['p', ('q', "table")])
+    proc2.called_procedures.add('proc1')
+    symbol_table.validate_procedure('proc2')
     symbol_table.add_variable("w", proc2)
     symbol_table.add_array("D", -5, 5, proc2)
     print(f"Procedure 'proc2': {proc2}")
-    print("Local variables of procedure 'proc2':")
-    print(proc2.local_variables)
-    print("Local arrays of procedure 'proc2':")
-    print(proc2.local_arrays)
+    print("Scope of procedure 'proc2':")
+    print(proc2.scope)
 
     print("\n=== Accessing variables and arrays ===")
     try:
-        addr_x = symbol_table.get_address("x")
+        addr_x = symbol_table.lookup("x", symbol_table.globals).memory_index
         print(f"Address of global variable 'x': {addr_x}")
     except Exception as e:
         print(e)
 
     try:
-        addr_a = symbol_table.get_address(("A", 2))
+        addr_a = symbol_table.lookup("A", symbol_table.globals).get_at(2)
         print(f"Address of global array 'A' at index 2: {addr_a}")
     except Exception as e:
         print(e)
 
     try:
-        addr_c = symbol_table.get_address(("C", 1), proc1)
+        addr_c = symbol_table.lookup("C", proc1.scope).get_at(1)
         print(f"Address of local array 'C' at index 1 in 'proc1': {addr_c}")
     except Exception as e:
         print(e)
@@ -240,20 +339,24 @@ if __name__ == "__main__":
         print(f"Expected error: {e}")
 
     try:
-        symbol_table.add_iterator("x")  # Iterator with a name conflicting with a variable
+        symbol_table.add_iterator("i", inner_loop)  # Nested iterator with the same name
     except Exception as e:
         print(f"Expected error: {e}")
 
     try:
-        addr_out_of_bounds = symbol_table.get_array_at("B", 15)
+        addr_out_of_bounds = symbol_table.lookup("B", symbol_table.globals).get_at(15)
     except Exception as e:
         print(f"Expected error: {e}")
 
     print("\n=== Adding third procedure with dependencies ===")
-    symbol_table.add_procedure('proc3', ['r'], ['temp'], ['proc2(r, Tb);', 'WRITE temp;'])
-    proc3 = symbol_table.get_procedure("proc3")
+    proc3 = symbol_table.add_procedure('proc3', ['r'])
+    proc3.called_procedures.add('proc4')
+    try:
+        symbol_table.validate_procedure('proc3')
+    except Exception as e:
+        print(f"Expected error: {e}")
     print(f"Procedure 'proc3': {proc3}")
 
     print("\n=== Final symbol table ===")
-    print(symbol_table)
-
+    print(symbol_table.globals)
+    print(symbol_table.procedures)
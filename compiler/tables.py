@@ -0,0 +1,136 @@
+#
+# Pamięć podręczna tablic parsera i wyrażenia regularnego leksera.
+#
+# sly buduje tablice LALR parsera i główne wyrażenie regularne leksera (po
+# sprawdzeniu osobno wyrażenia każdego tokenu) przy definicji klasy, czyli
+# przy każdym uruchomieniu kompilatora. Wynik zapisujemy w __pycache__ obok
+# modułów, w pliku nazwanym skrótem gramatyki (produkcje, priorytety, tokeny,
+# wyrażenia tokenów, wersje sly i Pythona); plik zawiera też pełny opis
+# gramatyki, porównywany przy odczycie. Przy zgodnym opisie klasa dostaje
+# tablice z pliku, a lekser kompiluje tylko gotowe wyrażenie główne; inaczej
+# sly buduje wszystko tak jak zwykle, a wynik trafia do pliku. Gdy pliku nie
+# da się odczytać ani zapisać, kompilator po prostu buduje tablice sam.
+#
+# Odczyt z pliku korzysta z wewnętrznych funkcji sly (wersja przypięta w
+# requirements.txt). Gdy cokolwiek na tej drodze zawiedzie, np. po zmianie
+# sly, tablice buduje oryginalny _build sly.
+#
+# Tablice to słowniki i listy liczb i napisów, więc wystarcza marshal
+# (pickle i hashlib same importują się dłużej, niż trwa odczyt).
+#
+import marshal
+import os
+import sys
+import zlib
+
+import sly
+from sly.yacc import Grammar, _collect_grammar_rules
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+
+def describe(*parts):
+    return repr((sys.version, sly.__version__) + parts)
+
+
+def path(name, key):
+    return os.path.join(DIRECTORY, f"{name}-{zlib.crc32(key.encode()):08x}.tables")
+
+
+def load(name, key):
+    try:
+        with open(path(name, key), "rb") as file:
+            cached_key, data = marshal.load(file)
+    except Exception:
+        return None
+    return data if cached_key == key else None
+
+
+def save(name, key, data):
+    # zapis przez plik tymczasowy - kompilator może działać w kilku procesach naraz
+    target = path(name, key)
+    temporary = f"{target}.{os.getpid()}"
+    try:
+        os.makedirs(DIRECTORY, exist_ok=True)
+        with open(temporary, "wb") as file:
+            marshal.dump((key, data), file)
+        os.replace(temporary, target)
+    except (OSError, ValueError):
+        pass
+
+
+class Tables:
+    # tablice LALR z pliku - to, czego używa Parser.parse
+    def __init__(self, lr_action, lr_goto, defaulted_states):
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+
+
+def sly_build_parser(cls, definitions):
+    # oryginalny Parser._build - sly pomija klasy z własnym _build
+    own = vars(cls)["_build"]
+    del cls._build
+    try:
+        sly.Parser._build.__func__(cls, definitions)
+    finally:
+        cls._build = own
+
+
+def build_parser(cls, definitions):
+    # zamiast Parser._build (wywoływanego przez metaklasę sly)
+    definitions = [(name, value) for name, value in definitions if name != "_build"]
+    try:
+        rules = [rule for _, value in definitions if callable(value) and hasattr(value, "rules")
+                 for rule in _collect_grammar_rules(value)]
+        precedence = [(term, level[0], number)
+                      for number, level in enumerate(getattr(cls, "precedence", ()), start=1)
+                      for term in level[1:]]
+        start = getattr(cls, "start", None)
+        key = describe(sorted(cls.tokens), precedence, start, [(name, syms) for _, _, _, name, syms in rules])
+        cached = load(cls.__name__, key)
+        if cached is not None:
+            grammar = Grammar(cls.tokens)
+            for term, assoc, level in precedence:
+                grammar.set_precedence(term, assoc, level)
+            for func, filename, line, name, syms in rules:
+                grammar.add_production(name, syms, func, filename, line)
+            grammar.set_start(start)
+            cls._grammar = grammar
+            cls._lrtable = Tables(*cached)
+            return
+    except Exception:
+        key = None
+    # sly buduje tablice (ze sprawdzeniem gramatyki)
+    sly_build_parser(cls, definitions)
+    if key is not None:
+        table = cls._lrtable
+        save(cls.__name__, key, (table.lr_action, table.lr_goto, table.defaulted_states))
+
+
+def build_lexer(cls, build):
+    # zamiast Lexer._build; build - oryginalna funkcja sly
+    key = None
+    try:
+        if not cls._remap:
+            cls._token_names = cls._token_names | set(cls.tokens)
+            cls._collect_rules()
+            patterns = [(name, value if isinstance(value, str) else value.pattern) for name, value in cls._rules]
+            key = describe(patterns, cls.reflags, cls.ignore, sorted(cls.literals))
+            pattern = load(cls.__name__, key)
+            if pattern is not None:
+                cls._ignored_tokens = set(cls._ignored_tokens)
+                cls._token_funcs = dict(cls._token_funcs)
+                for name, value in cls._rules:
+                    if name.startswith("ignore_"):
+                        name = name[7:]
+                        cls._ignored_tokens.add(name)
+                    if callable(value):
+                        cls._token_funcs[name] = value
+                cls._master_re = cls.regex_module.compile(pattern, cls.reflags)
+                return
+    except Exception:
+        key = None
+    build()
+    if key is not None:
+        save(cls.__name__, key, cls._master_re.pattern)
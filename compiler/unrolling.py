@@ -0,0 +1,137 @@
+#
+# Rozwijanie pętli FOR o stałej, niewielkiej liczbie obrotów.
+#
+# Po propagacji stałych granice wielu pętli są stałymi. Jeśli ciało powtórzone
+# tyle razy, ile obrotów ma pętla, mieści się w UNROLL_BUDGET rozkazów
+# (inliner.code_size), pętla zamienia się w kolejne kopie ciała, w których
+# iterator jest stałą: znika porównanie z granicą i krok iteratora, a elementy
+# tablic indeksowane iteratorem dostają stałe adresy. Kopie ciała zwija
+# następnie ponowna propagacja stałych (kompilator.OPTIMIZATIONS).
+#
+import copy
+
+from ast_tree import *
+from constant_propagation import array_bounds, constant, in_bounds
+from inliner import bodies, code_size, expressions, identifiers
+from visitor import Transformer
+
+UNROLL_BUDGET = 400
+
+
+def passes_iterator(commands, name):
+    # czy iterator trafia jako argument do procedury (wymaga nazwy zmiennej)
+    for command in commands.commands:
+        if isinstance(command, ProcCall) and name in command.args:
+            return True
+        if isinstance(command, For) and command.iterator == name:
+            continue
+        if any(passes_iterator(body, name) for body in bodies(command)):
+            return True
+    return False
+
+
+def indexed_arrays(commands, name):
+    # tablice, których elementy indeksowane są bezpośrednio iteratorem name
+    arrays = set()
+    for command in commands.commands:
+        for expression in expressions(command):
+            for identifier in identifiers(expression):
+                if isinstance(identifier.index, Identifier) and identifier.index.name == name:
+                    arrays.add(identifier.name)
+        if isinstance(command, For) and command.iterator == name:
+            continue
+        for body in bodies(command):
+            arrays |= indexed_arrays(body, name)
+    return arrays
+
+
+def substitute(node, name, value):
+    # węzeł z iteratorem name zastąpionym stałą value
+    if isinstance(node, Identifier):
+        if node.index is None:
+            return constant(node, value) if node.name == name else node
+        if isinstance(node.index, Identifier) and node.index.name == name:
+            node.index = constant(node.index, value)
+        return node
+    if isinstance(node, (Operation, Condition)):
+        node.left = substitute(node.left, name, value)
+        node.right = substitute(node.right, name, value)
+    return node
+
+
+def substitute_commands(commands, name, value):
+    for command in commands.commands:
+        if isinstance(command, Assign):
+            command.identifier = substitute(command.identifier, name, value)
+            command.expression = substitute(command.expression, name, value)
+        elif isinstance(command, (If, While, RepeatUntil)):
+            command.condition = substitute(command.condition, name, value)
+        elif isinstance(command, For):
+            command.start_value = substitute(command.start_value, name, value)
+            command.end_value = substitute(command.end_value, name, value)
+            if command.iterator == name:
+                # wewnętrzna pętla przesłania iterator
+                continue
+        elif isinstance(command, Read):
+            command.identifier = substitute(command.identifier, name, value)
+        elif isinstance(command, Write):
+            command.value = substitute(command.value, name, value)
+        for body in bodies(command):
+            substitute_commands(body, name, value)
+
+
+class Unrolling(Transformer):
+    def __init__(self, budget=UNROLL_BUDGET):
+        self.budget = budget
+        self.bounds = {}  # tablice bieżącej procedury -> granice
+        self.statistics = {"unrolled": 0}
+
+    def run(self, ast):
+        program = ast.root
+        for procedure in program.procedures.procedures:
+            self.bounds = array_bounds(procedure.declarations)
+            self.commands(procedure.commands)
+        self.bounds = array_bounds(program.main.declarations)
+        self.commands(program.main.commands)
+        return ast
+
+    def commands(self, commands):
+        return self.transform(commands)
+
+    def visit_command(self, command):
+        for body in bodies(command):
+            self.commands(body)
+        return command
+
+    def visit_for(self, command):
+        if not self.unrollable(command):
+            return self.visit_command(command)
+        start, end = command.start_value.value, command.end_value.value
+        step = 1 if command.direction == "to" else -1
+        copies = []
+        for value in range(start, end + step, step):
+            body = copy.deepcopy(command.commands)
+            substitute_commands(body, command.iterator, value)
+            copies.extend(body.commands)
+        self.statistics["unrolled"] += 1
+        # pętle wewnętrzne kopii mogą mieć już stałe granice
+        return self.commands(Commands(copies))
+
+    def unrollable(self, command):
+        start, end = command.start_value, command.end_value
+        if not isinstance(start, Value) or not isinstance(end, Value):
+            return False
+        if passes_iterator(command.commands, command.iterator):
+            return False
+        step = 1 if command.direction == "to" else -1
+        trips = (end.value - start.value) * step + 1
+        if trips <= 0 or trips * code_size(command.commands) > self.budget:
+            return False
+        # stały indeks spoza tablicy byłby błędem kompilacji, nawet w gałęzi,
+        # która się nie wykona
+        return all(in_bounds(self.bounds, array, start.value) and in_bounds(self.bounds, array, end.value)
+                   for array in indexed_arrays(command.commands, command.iterator))
+
+
+def unroll_loops(ast):
+    return Unrolling().run(ast)
@@ -0,0 +1,77 @@
+#
+# Statyczne szacowanie, jak często wykonywane są fragmenty programu.
+#
+# Waga polecenia to przybliżona liczba jego wykonań: każda pętla mnoży ją
+# przez LOOP_WEIGHT, a ciało procedury dziedziczy sumę wag swoich wywołań
+# (procedury wywołują tylko wcześniej zdefiniowane, więc wystarczy przejść je
+# od końca, zaczynając od PROGRAM). Na tej podstawie generator decyduje, czy
+# wstawiać procedury arytmetyczne i które stałe trzymać w pamięci.
+#
+from ast_tree import *
+from arithmetic import ROUTINES
+
+LOOP_WEIGHT = 10
+
+
+class Usage:
+    def __init__(self, program, fused=()):
+        self.fused = fused
+        self.routine_sites = {kind: 0 for kind in set(ROUTINES.values())}
+        self.constants = {}  # wartość -> ważona liczba materializacji
+        self.procedure_weights = {procedure.name: 0 for procedure in program.procedures.procedures}
+        self.commands(program.main.commands, 1)
+        for procedure in reversed(program.procedures.procedures):
+            self.commands(procedure.commands, self.procedure_weights[procedure.name])
+
+    def constant(self, value, weight):
+        self.constants[value] = self.constants.get(value, 0) + weight
+
+    def value(self, value, weight):
+        if isinstance(value, Value):
+            self.constant(value.value, weight)
+
+    def operation(self, expression, weight):
+        left, right = expression.left, expression.right
+        kind = ROUTINES.get(expression.operator)
+        if kind:
+            if expression in self.fused:
+                return
+            self.routine_sites[kind] += 1
+            if kind == "div":
+                # stała 1 w procedurze dzielenia
+                self.constant(1, weight)
+        elif isinstance(right, Value) and right.value == 0:
+            # x + 0 i x - 0 nie potrzebują stałej
+            right = None
+        self.value(left, weight)
+        if right is not None:
+            self.value(right, weight)
+
+    def commands(self, commands, weight):
+        for command in commands.commands:
+            if isinstance(command, Assign):
+                if isinstance(command.expression, Operation):
+                    self.operation(command.expression, weight)
+                else:
+                    self.value(command.expression, weight)
+            elif isinstance(command, Write):
+                self.value(command.value, weight)
+            elif isinstance(command, If):
+                self.condition(command.condition, weight)
+                self.commands(command.true_commands, weight)
+                if command.false_commands:
+                    self.commands(command.false_commands, weight)
+            elif isinstance(command, (While, RepeatUntil)):
+                self.condition(command.condition, weight * LOOP_WEIGHT)
+                self.commands(command.commands, weight * LOOP_WEIGHT)
+            elif isinstance(command, For):
+                self.value(command.start_value, weight)
+                self.value(command.end_value, weight)
+                # krok iteratora
+                self.constant(1 if command.direction == "to" else -1, weight * LOOP_WEIGHT)
+                self.commands(command.commands, weight * LOOP_WEIGHT)
+            elif isinstance(command, ProcCall) and command.name in self.procedure_weights:
+                self.procedure_weights[command.name] += weight
+
+    def condition(self, condition, weight):
+        self.operation(Operation(condition.left, '-', condition.right), weight)
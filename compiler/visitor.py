@@ -0,0 +1,61 @@
+#
+# Wspólna baza przejść po drzewie AST.
+#
+# Visitor wybiera metodę dla węzła według jego klasy: prefix + nazwa klasy
+# małymi literami (np. visit_assign), a gdy takiej nie ma - według klas
+# bazowych węzła. Tablica klasa węzła -> funkcja liczona jest dla każdej
+# klasy przejścia przy jej definicji (klasy z ast_tree.py) albo przy
+# pierwszym spotkaniu węzła nowej klasy (np. z ir.py), więc dispatch to jedno
+# wyszukanie w słowniku.
+#
+# Transformer przepisuje listy poleceń: wynik metody zastępuje polecenie,
+# None je usuwa, a Commands wstawia w jego miejsce kilka poleceń.
+#
+from ast_tree import ASTNode, Commands
+
+
+def node_classes(base=ASTNode):
+    for subclass in base.__subclasses__():
+        yield subclass
+        yield from node_classes(subclass)
+
+
+class Visitor:
+    prefix = "visit_"
+    methods = {}  # klasa węzła -> funkcja albo None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.methods = {}
+        for node_class in node_classes():
+            cls.method(node_class)
+
+    @classmethod
+    def method(cls, node_class):
+        function = None
+        for base in node_class.__mro__:
+            function = getattr(cls, cls.prefix + base.__name__.lower(), None)
+            if function is not None:
+                break
+        cls.methods[node_class] = function
+        return function
+
+    def dispatch(self, node, *args):
+        node_class = type(node)
+        function = self.methods[node_class] if node_class in self.methods else self.method(node_class)
+        if function is None:
+            raise Exception(f"Error: {type(self).__name__} cannot handle {node_class.__name__}")
+        return function(self, node, *args)
+
+
+class Transformer(Visitor):
+    def transform(self, commands, *args):
+        result = []
+        for command in commands.commands:
+            replacement = self.dispatch(command, *args)
+            if isinstance(replacement, Commands):
+                result.extend(replacement.commands)
+            elif replacement is not None:
+                result.append(replacement)
+        commands.commands = result
+        return commands
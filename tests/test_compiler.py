@@ -0,0 +1,143 @@
+#
+# Testy regresji kompilatora: optymalizacje nie zmieniają działania programów.
+#
+# Każdy program z tests/ i programs/ kompilowany jest bez optymalizacji, ze
+# wszystkimi oraz z każdą wyłączoną z osobna, a wynik uruchamiany na maszynie
+# wirtualnej (virtual_machine/mw.py). Wyjście musi być takie samo jak bez
+# optymalizacji; program z błędem musi dawać ten sam komunikat.
+#
+# Uruchomienie: python -m pytest tests
+#
+import functools
+import glob
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler"), os.path.join(ROOT, "virtual_machine")]
+
+from kompilator import OPTIMIZATIONS, IR_OPTIMIZATIONS, CODE_OPTIMIZATIONS, compile_source
+from mw import run_text
+
+NAMES = list(dict.fromkeys(name for name, _ in OPTIMIZATIONS + IR_OPTIMIZATIONS + CODE_OPTIMIZATIONS))
+ALL = tuple(NAMES)
+# konfiguracje porównywane z kompilacją bez optymalizacji
+CONFIGURATIONS = [()] + [(name,) for name in NAMES]
+
+# dane wejściowe programów (domyślnie jeden pusty zestaw)
+INPUTS = {
+    "tests/example1.imp": [[1234567890, 987654321], [28, 18]],
+    "tests/example2.imp": [[0, 1]],
+    "tests/example3.imp": [[1]],
+    "tests/example4.imp": [[20, 9]],
+    "tests/example5.imp": [[1234567890, 1234567890987654321, 987654321]],
+    "tests/example6.imp": [[20]],
+    "tests/example7.imp": [[0, 0, 0], [1, 0, 2]],
+    "tests/example9.imp": [[20, 9]],
+    "programs/program0.imp": [[13]],
+    "programs/program1.imp": [[12, 18, 30, 45]],
+    "programs/program3.imp": [[340], [1234567]],
+}
+
+PROGRAMS = sorted(os.path.relpath(path, ROOT).replace(os.sep, "/")
+                  for pattern in ("tests/*.imp", "programs/*.imp")
+                  for path in glob.glob(os.path.join(ROOT, pattern)))
+
+# programy, które optymalizacje zamieniały w błąd kompilacji (stały indeks
+# spoza tablicy w gałęzi, która się nie wykonuje), i zmienne dzielące komórki
+# (memory.py) obok argumentów przekazywanych przez referencję (źródło, dane,
+# wyjście)
+REGRESSIONS = {
+    "constant_index": ("""
+PROGRAM IS t[0:9], a, i BEGIN
+  READ a;
+  i := 20;
+  IF a > 0 THEN t[i] := 1; ENDIF
+  WRITE a;
+END
+""", [[0], [-4]], [[0], [-4]]),
+    "unrolled_index": ("""
+PROGRAM IS t[0:9], n BEGIN
+  READ n;
+  FOR i FROM 0 TO 12 DO
+    IF i < n THEN t[i] := i; ENDIF
+  ENDFOR
+  WRITE t[2];
+END
+""", [[3], [10]], [[2], [2]]),
+    "shared_cells": ("""
+PROCEDURE p(a, b) IS BEGIN
+  a := 7;
+  WRITE b;
+END
+PROCEDURE q(a, b) IS x, y BEGIN
+  READ y;
+  p(x, y);
+  WRITE x;
+  READ b;
+  x := b + 1;
+  a := x;
+END
+PROGRAM IS u, v, w, z BEGIN
+  READ u;
+  p(v, u);
+  WRITE v;
+  q(w, z);
+  WRITE w;
+END
+""", [[5, 6, 9]], [[5, 7, 6, 7, 10]]),
+}
+
+
+def source(path):
+    with open(os.path.join(ROOT, path)) as file:
+        return file.read()
+
+
+@functools.lru_cache(maxsize=None)
+def outcome(text, disabled, inputs):
+    # wyjście programu dla każdego zestawu danych albo komunikat błędu kompilacji
+    try:
+        code = compile_source(text, disabled)
+    except Exception as e:
+        return "error", str(e)
+    return "ok", [list(run_text(code, values).outputs) for values in inputs]
+
+
+def cases():
+    return [pytest.param(source(path), disabled, tuple(map(tuple, INPUTS.get(path, [[]]))),
+                         id=f"{path}-{'-'.join(disabled) or 'all'}")
+            for path in PROGRAMS for disabled in CONFIGURATIONS]
+
+
+@pytest.mark.parametrize("text, disabled, inputs", cases())
+def test_program(text, disabled, inputs):
+    assert outcome(text, disabled, inputs) == outcome(text, ALL, inputs)
+
+
+@pytest.mark.parametrize("name", sorted(REGRESSIONS))
+@pytest.mark.parametrize("disabled", [ALL] + CONFIGURATIONS, ids=lambda disabled: "-".join(disabled) or "all")
+def test_regression(name, disabled):
+    text, inputs, outputs = REGRESSIONS[name]
+    assert outcome(text, disabled, tuple(map(tuple, inputs))) == ("ok", outputs)
+
+
+def test_inlined_annotations():
+    # wstawione ciało procedury opisane jest jej nazwą i jej liniami (profiler.py)
+    code = compile_source(source("programs/program1.imp"))
+    annotations = {line.split("# @")[1] for line in code.splitlines()}
+    assert {"gcd:6", "gcd:7", "gcd:8", "gcd:11"} <= annotations
+    # program główny zaczyna się w linii 19
+    assert all(int(line) >= 19 for scope, line in map(lambda annotation: annotation.split(":"), annotations)
+               if scope == "PROGRAM" and line != "-")
+
+
+def test_inline_budget():
+    # budżet 0 zostawia wywołania procedury, wynik jest ten sam
+    text = source("programs/program1.imp")
+    kept = compile_source(text, settings={"inline": {"budget": 0}})
+    inlined = compile_source(text)
+    assert "RTRN" in kept and "RTRN" not in inlined
+    assert run_text(kept, [12, 18, 30, 45]).outputs == run_text(inlined, [12, 18, 30, 45]).outputs
@@ -0,0 +1,188 @@
+#
+# Testy analiz przepływu danych (compiler/dataflow.py) na małych grafach.
+#
+# Grafy powstają z programów przez ir.lower; instrukcje rozpoznajemy po
+# linii źródła (programy zaczynają się w linii 1).
+#
+# Uruchomienie: python -m pytest tests
+#
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler")]
+
+from common_subexpressions import Site, depends
+from dataflow import AvailableExpressions, Liveness, ReachingDefinitions
+from ir import lower
+from kompilator import parse_source
+
+
+def main_cfg(text):
+    return lower(parse_source(text).root.main)
+
+
+def before(solution, cfg, line, kind=None):
+    # wartość przed pierwszą instrukcją z linii line (i rodzaju kind)
+    for block in cfg.blocks:
+        for statement, value, _ in solution.statements(block)[:len(block.statements)]:
+            if statement.line == line and kind in (None, statement.kind):
+                return value
+    raise KeyError(line)
+
+
+def definitions(value, name):
+    # linie instrukcji, których zapis zmiennej name może być widoczny
+    return {statement.line for written, statement in value if written == name}
+
+
+def test_reaching_definitions_join():
+    cfg = main_cfg("""PROGRAM IS a, b BEGIN
+  READ b;
+  a := 1;
+  IF b > 0 THEN
+    a := 2;
+  ENDIF
+  a := a + b;
+  WRITE a;
+END
+""")
+    solution = ReachingDefinitions().solve(cfg)
+    assert definitions(before(solution, cfg, 7), "a") == {3, 5}
+    assert definitions(before(solution, cfg, 7), "b") == {2}
+    assert definitions(before(solution, cfg, 8), "a") == {7}
+
+
+def test_reaching_definitions_loop():
+    cfg = main_cfg("""PROGRAM IS a, n BEGIN
+  READ n;
+  a := 0;
+  WHILE a < n DO
+    a := a + 1;
+  ENDWHILE
+  WRITE a;
+END
+""")
+    solution = ReachingDefinitions().solve(cfg)
+    assert definitions(before(solution, cfg, 5), "a") == {3, 5}
+    assert definitions(before(solution, cfg, 7), "a") == {3, 5}
+
+
+def test_reaching_definitions_may_defs():
+    # wywołanie procedury może zapisać argument, ale nie usuwa wcześniejszych zapisów
+    text = """PROCEDURE p(x) IS BEGIN
+  x := 5;
+END
+PROGRAM IS a BEGIN
+  a := 1;
+  p(a);
+  WRITE a;
+  a := 2;
+  WRITE a;
+END
+"""
+    cfg = main_cfg(text)
+    solution = ReachingDefinitions().solve(cfg)
+    assert definitions(before(solution, cfg, 7), "a") == {5, 6}
+    assert definitions(before(solution, cfg, 9), "a") == {8}
+
+
+def test_available_expressions():
+    cfg = main_cfg("""PROGRAM IS a, b, c, d BEGIN
+  READ a;
+  READ b;
+  c := a + b;
+  d := b + a;
+  IF c > 0 THEN
+    a := 1;
+  ENDIF
+  d := a + b;
+  c := c * 2;
+  WRITE c;
+END
+""")
+    solution = AvailableExpressions().solve(cfg)
+    # dodawanie jest przemienne: b + a to to samo wyrażenie
+    assert before(solution, cfg, 5) == {("a", "+", "b")}
+    # a zmienia się w jednej z gałęzi
+    assert before(solution, cfg, 9) == frozenset()
+    assert before(solution, cfg, 10) == {("a", "+", "b")}
+    # c * 2 zmienia własny argument
+    assert before(solution, cfg, 11) == {("a", "+", "b")}
+
+
+def test_available_expressions_loop():
+    cfg = main_cfg("""PROGRAM IS a, b, n BEGIN
+  READ a;
+  READ n;
+  b := a + n;
+  WHILE n > 0 DO
+    b := a + n;
+    n := n - 1;
+  ENDWHILE
+  b := a + n;
+  WRITE b;
+END
+""")
+    solution = AvailableExpressions().solve(cfg)
+    # n zmienia się w pętli: przy powrocie do warunku wyrażenie nie jest dostępne
+    assert before(solution, cfg, 6) == frozenset()
+    assert ("n", "-", 1) not in before(solution, cfg, 9)
+    assert ("a", "+", "n") not in before(solution, cfg, 9)
+
+
+def test_available_addresses():
+    # klucze wartości z common_subexpressions.py: adres zależy tylko od indeksu
+    cfg = main_cfg("""PROGRAM IS t[0:9], i, a BEGIN
+  READ i;
+  t[i] := 1;
+  a := t[i];
+  t[i] := a + 1;
+  i := 0;
+  WRITE t[i];
+END
+""")
+    keys = {}
+    for block in cfg.blocks:
+        for statement in block.statements:
+            keys[statement] = Site(statement).keys
+    solution = AvailableExpressions(keys, depends).solve(cfg)
+    address = ("address", "t", "i")
+    assert keys[next(s for s in cfg.statements() if s.line == 3)] == {address}
+    assert before(solution, cfg, 4) == {address}
+    assert before(solution, cfg, 5) == {address}
+    # zapis i unieważnia adres, a + 1 pozostaje aktualne
+    assert before(solution, cfg, 7) == {("expression", "a", "+", 1)}
+
+
+def test_available_expressions_aliases():
+    # parametry przekazywane są przez referencję: zapis a może zmienić b
+    text = """PROCEDURE p(a, b) IS x BEGIN
+  x := b + 1;
+  a := 5;
+  x := b + 1;
+END
+PROGRAM IS u BEGIN
+  p(u, u);
+END
+"""
+    cfg = lower(parse_source(text).root.procedures.procedures[0])
+    assert before(AvailableExpressions().solve(cfg), cfg, 4) == {("b", "+", 1)}
+    assert before(AvailableExpressions(aliases=[{"a", "b"}]).solve(cfg), cfg, 4) == frozenset()
+
+
+def test_liveness():
+    cfg = main_cfg("""PROGRAM IS a, b, c BEGIN
+  READ a;
+  b := a + 1;
+  c := b;
+  IF a > 0 THEN
+    WRITE c;
+  ENDIF
+END
+""")
+    solution = Liveness().solve(cfg)
+    assert solution.entry[cfg.entry] == frozenset()
+    assert before(solution, cfg, 3) == {"a"}
+    assert before(solution, cfg, 4) == {"a", "b"}
+    assert before(solution, cfg, 6) == {"c"}
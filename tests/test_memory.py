@@ -0,0 +1,197 @@
+#
+# Testy przydziału pamięci (compiler/memory.py): które komórki dzielą ramki
+# procedur, pary komórek iteratorów FOR i zmienne skalarne, oraz raport
+# kompilator.py --memory-map.
+#
+# Uruchomienie: python -m pytest tests
+#
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler"), os.path.join(ROOT, "virtual_machine")]
+
+import code_generator
+from kompilator import assemble_source, parse_source
+from memory import interference
+from symbol_table import Parameter, Variable
+from test_compiler import ALL, PROGRAMS, source
+
+# r woła p i q, które nie wołają się nawzajem; c i d żyją w różnym czasie,
+# podobnie s i t w p
+TEXT = """PROCEDURE p(x) IS s, t BEGIN
+  s := x + 1;
+  WRITE s;
+  t := x * 2;
+  WRITE t;
+  x := t;
+END
+PROCEDURE q(y) IS u BEGIN
+  u := y - 1;
+  y := u;
+END
+PROCEDURE r(z) IS v BEGIN
+  p(z);
+  v := z;
+  q(v);
+  WRITE v;
+END
+PROGRAM IS a, b, c, d, t[1:3] BEGIN
+  READ a;
+  READ b;
+  c := a + b;
+  WRITE c;
+  d := b;
+  WRITE d;
+  FOR i FROM 1 TO 3 DO
+    FOR j FROM i TO 3 DO
+      WRITE j;
+    ENDFOR
+  ENDFOR
+  FOR k FROM a DOWNTO 1 DO
+    t[1] := k;
+  ENDFOR
+  a := b;
+  r(a);
+  WRITE a;
+END
+"""
+
+REPORT = """Pamięć: 25 komórek (bez współdzielenia: 32)
+
+  adres  rozmiar  zakres           nazwa
+      0        1  -                akumulator
+      1        1  PROGRAM          a
+      2        1  PROGRAM          b
+      3        1  PROGRAM          c, d
+      4        3  PROGRAM          t[1:3]
+      7        2  PROGRAM          FOR i, k (iterator, granica)
+      9        2  PROGRAM          FOR j (iterator, granica)
+     11        2  r                adres powrotu, parametry
+     13        1  r                v
+     14        2  q                adres powrotu, parametry
+     14        2  p                adres powrotu, parametry
+     16        1  q                u
+     16        1  p                s, t
+     17        1  -                stała -1
+     18        1  -                stała 1
+     19        1  -                stała 3
+     20        1  -                pomocnicza mul_left
+     21        1  -                pomocnicza mul_right
+     22        1  -                pomocnicza mul_result
+     23        1  -                pomocnicza mul_half
+     24        1  -                pomocnicza mul_return
+"""
+
+
+def allocation(monkeypatch, text, disabled):
+    # argumenty memory.allocate z generatora kodu
+    calls = []
+
+    def allocate(*args):
+        calls.append(args)
+        return original(*args)
+
+    original = code_generator.allocate
+    monkeypatch.setattr(code_generator, "allocate", allocate)
+    code = assemble_source(text, disabled)
+    assert len(calls) == 1
+    return code.memory, calls[0]
+
+
+def cells(symbol):
+    return set(range(symbol.memory_index, symbol.memory_index + symbol.size))
+
+
+def test_report():
+    assert assemble_source(TEXT, ALL).memory.report() == REPORT
+
+
+def test_shared_cells(monkeypatch):
+    memory, (symbol_table, procedures, _, _) = allocation(monkeypatch, TEXT, ALL)
+    symbols = {procedure.name: procedure for procedure, _ in procedures}
+    # p i q nie są aktywne jednocześnie; obie leżą nad ramką r, która je woła
+    assert symbols["p"].memory_index == symbols["q"].memory_index == 14
+    assert symbols["p"].scope["s"].memory_index == symbols["q"].scope["u"].memory_index == 16
+    assert not cells(symbols["r"]) & cells(symbols["p"])
+    # kolejne pętle dzielą parę komórek, pętla zagnieżdżona ma własną
+    iterators = {iterator.name: iterator for iterator in symbol_table.iterators}
+    assert iterators["i"].memory_index == iterators["k"].memory_index == 7
+    assert (iterators["j"].memory_index, iterators["j"].limit_index) == (9, 10)
+    assert symbol_table.globals["c"].memory_index == symbol_table.globals["d"].memory_index
+    assert memory.size == symbol_table.memory_index == 25
+
+
+def frames(symbol_table, procedures, main_cfg, copied):
+    # (zmienne skalarne ramki, graf przepływu, zmienne żywe na wyjściu)
+    yield {name: symbol for name, symbol in symbol_table.globals.items() if isinstance(symbol, Variable)}, main_cfg, ()
+    for procedure, cfg in procedures:
+        scalars = {name: symbol for name, symbol in procedure.scope.items()
+                   if isinstance(symbol, Variable) and not isinstance(symbol, Parameter)}
+        live_out = [name for name, (_, copy_out) in copied.get(procedure.name, {}).items() if copy_out]
+        yield scalars, cfg, live_out
+
+
+def frame_cells(symbol_table, procedure):
+    # komórki ramki procedury (None - programu głównego) z iteratorami
+    symbols = list(symbol_table.globals.values()) if procedure is None else [procedure, *procedure.scope.values()]
+    result = set()
+    for symbol in symbols:
+        if not isinstance(symbol, Parameter):
+            result |= cells(symbol)
+    for iterator in symbol_table.iterators:
+        if iterator.procedure is procedure:
+            result |= cells(iterator)
+    return result
+
+
+def callees(symbols, procedure):
+    # procedury wołane przez procedure, także pośrednio
+    result = set()
+    for name in procedure.called_procedures:
+        result |= {name} | callees(symbols, symbols[name])
+    return result
+
+
+@pytest.mark.parametrize("disabled", [(), ("inline",), ALL], ids=["all", "no_inline", "none"])
+@pytest.mark.parametrize("path", PROGRAMS + ["TEXT"])
+def test_lifetimes(monkeypatch, path, disabled):
+    text = TEXT if path == "TEXT" else source(path)
+    try:
+        code_generator.CodeGenerator(parse_source(text)).check()
+    except Exception:
+        pytest.skip("program z błędem kompilacji")
+    _, arguments = allocation(monkeypatch, text, disabled)
+    symbol_table, procedures, _, _ = arguments
+    # zmienne, których czasy życia się pokrywają, mają różne komórki
+    for scalars, cfg, live_out in frames(*arguments):
+        edges = interference(cfg, set(scalars), live_out)
+        for name, others in edges.items():
+            for other in others:
+                assert scalars[name].memory_index != scalars[other].memory_index, (name, other)
+    # ramki procedur aktywnych jednocześnie są rozłączne
+    symbols = {procedure.name: procedure for procedure, _ in procedures}
+    main = frame_cells(symbol_table, None)
+    for procedure in symbols.values():
+        assert not main & frame_cells(symbol_table, procedure), procedure.name
+        for name in callees(symbols, procedure):
+            assert not frame_cells(symbol_table, procedure) & frame_cells(symbol_table, symbols[name]), \
+                (procedure.name, name)
+    # iteratory zagnieżdżonych pętli mają różne komórki
+    for first in symbol_table.iterators:
+        for second in symbol_table.iterators:
+            if first.procedure is second.procedure and first.depth != second.depth:
+                assert not cells(first) & cells(second), (first.name, second.name)
+
+
+def test_memory_map_option(tmp_path):
+    program = tmp_path / "program.imp"
+    program.write_text(TEXT)
+    run = subprocess.run([sys.executable, os.path.join(ROOT, "compiler", "kompilator.py"), str(program),
+                          str(tmp_path / "program.mr"), "--memory-map", str(tmp_path / "mapa.txt")],
+                         capture_output=True, text=True)
+    assert run.returncode == 0, run.stderr
+    assert (tmp_path / "mapa.txt").read_text() == assemble_source(TEXT).memory.report()
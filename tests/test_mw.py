@@ -0,0 +1,144 @@
+#
+# Testy interpretera maszyny wirtualnej (virtual_machine/mw.py): koszty
+# rozkazów, błędy wykonania i komórki spoza gęstej części pamięci. Wyniki
+# mw.py są wzorcem dla testów kompilatora (test_compiler.py).
+#
+# Uruchomienie: python -m pytest tests
+#
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "virtual_machine")]
+
+from mw import DENSE_LIMIT, MachineError, parse_program, run_text
+
+# rozkaz wykonany raz przed HALT i jego koszt (mw.cc)
+COSTS = [
+    ("GET 1", 100),
+    ("PUT 0", 100),
+    ("LOAD 1", 10),
+    ("STORE 1", 10),
+    ("LOADI 1", 20),
+    ("STOREI 1", 20),
+    ("ADD 1", 10),
+    ("SUB 1", 10),
+    ("ADDI 1", 20),
+    ("SUBI 1", 12),
+    ("SET 3", 50),
+    ("HALF", 5),
+    ("JUMP 1", 1),
+    ("JPOS 1", 1),
+    ("JZERO 1", 1),
+    ("JNEG 1", 1),
+]
+
+
+@pytest.mark.parametrize("instruction, cost", COSTS, ids=[instruction for instruction, _ in COSTS])
+def test_cost(instruction, cost):
+    result = run_text(f"{instruction}\nHALT\n", [7])
+    assert (result.cost, result.steps) == (cost, 1)
+    assert result.io_cost == (100 if instruction[:3] in ("GET", "PUT") else 0)
+
+
+def test_rtrn_cost():
+    # SET 3, STORE 1, RTRN 1 -> HALT
+    result = run_text("SET 3\nSTORE 1\nRTRN 1\nHALT\n")
+    assert (result.cost, result.steps) == (50 + 10 + 10, 3)
+
+
+def test_program():
+    # suma dwóch liczb, połowa różnicy i wartość bezwzględna przez JNEG
+    result = run_text("""GET 1
+GET 2
+LOAD 1
+ADD 2
+PUT 0
+LOAD 1
+SUB 2
+HALF
+STORE 3
+JNEG 2
+JUMP 3
+SET 0
+SUB 3
+PUT 0
+HALT
+""", [4, 9])
+    assert result.outputs == [13, 3]
+    assert result.io_cost == 400
+    assert result.cost == 400 + 10 + 10 + 10 + 10 + 5 + 10 + 1 + 50 + 10
+
+
+def test_half_rounds_down():
+    assert run_text("SET -5\nHALF\nSTORE 1\nPUT 1\nHALT\n").outputs == [-3]
+
+
+def test_negative_address():
+    with pytest.raises(MachineError, match="ujemny adres"):
+        run_text("SET 1\nLOAD -1\nHALT\n")
+    # SET i skoki nie odwołują się do pamięci
+    assert run_text("SET -1\nJNEG 1\nHALT\n").cost == 51
+
+
+@pytest.mark.parametrize("text, target", [
+    ("JUMP 5\nHALT\n", 5),
+    ("SET 1\nJPOS -2\nHALT\n", -1),
+    ("SET 9\nSTORE 1\nRTRN 1\nHALT\n", 9),
+    ("SET 1\n", 1),
+], ids=["jump", "jpos", "rtrn", "past_end"])
+def test_missing_instruction(text, target):
+    with pytest.raises(MachineError, match=f"nieistniejącej instrukcji nr {target}\\."):
+        run_text(text)
+
+
+def test_jump_not_taken():
+    # skok poza program nie jest błędem, dopóki się nie wykona
+    assert run_text("SET 0\nJPOS 7\nHALT\n").steps == 2
+
+
+@pytest.mark.parametrize("address", [DENSE_LIMIT + 5, -3], ids=["above_dense_limit", "negative"])
+def test_sparse_cells(address):
+    # adresy pośrednie poza gęstą listą: STOREI, LOADI, ADDI, SUBI
+    result = run_text(f"""SET {address}
+STORE 1
+SET 42
+STOREI 1
+SET 0
+LOADI 1
+PUT 0
+ADDI 1
+PUT 0
+SUBI 1
+SUBI 1
+PUT 0
+SET {address + 1}
+STORE 2
+LOADI 2
+PUT 0
+HALT
+""")
+    assert result.outputs == [42, 84, 0, 0]
+
+
+def test_missing_input():
+    # mw.cc czytałby 0; tutaj brak danych jest błędem (nagłówek mw.py)
+    with pytest.raises(MachineError, match="brak danych"):
+        run_text("GET 1\nGET 2\nHALT\n", [1])
+
+
+def test_parse_errors():
+    with pytest.raises(MachineError, match="Brak argumentu rozkazu LOAD"):
+        parse_program("LOAD\nHALT\n")
+    with pytest.raises(MachineError, match="Linia 2: Nieoczekiwana liczba 5"):
+        parse_program("HALT\n5\n")
+    with pytest.raises(MachineError, match="Nierozpoznany symbol"):
+        parse_program("FOO 1\n")
+
+
+def test_comments():
+    program, comments = parse_program("SET 1 # @PROGRAM:3\nPUT 0\n# osobna linia\nHALT # koniec\n")
+    assert program == [(10, 1), (1, 0), (17, 0)]
+    assert comments == ["@PROGRAM:3", None, "koniec"]
@@ -0,0 +1,72 @@
+#
+# Porównanie symulatora bloków podstawowych (virtual_machine/mw_blocks.py)
+# z interpreterem (mw.py): te same wypisane wartości, koszt, koszt i/o,
+# liczba rozkazów i błędy - dla skompilowanych programów z tests/ i programs/
+# (z optymalizacjami, bez wstawiania procedur i bez optymalizacji) oraz
+# napisanych ręcznie programów kończących się błędem.
+#
+# Uruchomienie: python -m pytest tests
+#
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler"), os.path.join(ROOT, "virtual_machine")]
+
+from kompilator import compile_source
+from mw import Machine, MachineError, parse_program
+from mw_blocks import BlockMachine
+from test_compiler import ALL, INPUTS, PROGRAMS, source
+
+CONFIGURATIONS = {"all": (), "no_inline": ("inline",), "none": ALL}
+
+# programy kończące się błędem (także po pętli i wywołaniu przez RTRN)
+ERRORS = {
+    "negative_address": ("SET 1\nPUT 0\nLOAD -2\nHALT\n", []),
+    "jump": ("SET 3\nJPOS 4\nHALT\n", []),
+    "rtrn": ("SET 40\nSTORE 1\nRTRN 1\nHALT\n", []),
+    "past_end": ("GET 1\nPUT 1\n", [5]),
+    "missing_input": ("GET 1\nGET 2\nHALT\n", [1]),
+    # pętla trzy razy, potem skok poza program
+    "loop": ("SET 3\nSTORE 1\nLOAD 1\nJZERO 5\nSET -1\nADD 1\nSTORE 1\nJUMP -5\nJUMP 9\nHALT\n", []),
+    # procedura wołana dwa razy; drugi powrót prowadzi poza program
+    "return": ("SET 3\nSTORE 2\nJUMP 5\nSET 99\nSTORE 2\nJUMP 2\nHALT\nPUT 0\nRTRN 2\n", []),
+}
+
+
+def execute(machine_class, program, inputs):
+    try:
+        result = machine_class(program).run(inputs)
+    except MachineError as e:
+        return "error", str(e)
+    return "ok", result.as_dict()
+
+
+def compiled():
+    cases = []
+    for path in PROGRAMS:
+        for name, disabled in CONFIGURATIONS.items():
+            try:
+                code = compile_source(source(path), disabled)
+            except Exception:
+                continue  # programy z błędem kompilacji (tests/error*.imp)
+            program = parse_program(code)[0]
+            for inputs in INPUTS.get(path, [[]]):
+                cases.append(pytest.param(program, inputs, id=f"{path}-{name}-{' '.join(map(str, inputs))}"))
+    return cases
+
+
+@pytest.mark.parametrize("program, inputs", compiled())
+def test_compiled(program, inputs):
+    assert execute(BlockMachine, program, inputs) == execute(Machine, program, inputs)
+
+
+@pytest.mark.parametrize("name", sorted(ERRORS))
+def test_error(name):
+    text, inputs = ERRORS[name]
+    program = parse_program(text)[0]
+    expected = execute(Machine, program, inputs)
+    assert expected[0] == "error"
+    assert execute(BlockMachine, program, inputs) == expected
@@ -0,0 +1,96 @@
+#
+# Testy reguł optymalizatora "przez dziurkę od klucza" (compiler/peephole.py).
+#
+# Kod budowany jest w assembler.Assembly z napisów: "OP arg", skok "JPOS L"
+# do etykiety L i etykieta "L:". Sprawdzamy rozkazy po optymalizacji (z
+# przeliczonymi przesunięciami skoków) i niezerowe liczniki reguł.
+#
+# Uruchomienie: python -m pytest tests
+#
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler")]
+
+from assembler import Assembly, JUMPS
+from peephole import Peephole
+
+
+def optimize(*items):
+    code = Assembly()
+    labels = {}
+    for item in items:
+        if item.endswith(":"):
+            labels.setdefault(item[:-1], code.new_label(item[:-1]))
+            code.place(labels[item[:-1]])
+            continue
+        op, *arg = item.split()
+        if op in JUMPS:
+            labels.setdefault(arg[0], code.new_label(arg[0]))
+            code.jump(op, labels[arg[0]])
+        else:
+            code.emit(op, int(arg[0]) if arg else None)
+    statistics = Peephole(code).run()
+    return [str(instruction) for instruction in code.resolve()], \
+        {rule: count for rule, count in statistics.items() if count}
+
+
+def test_redundant_load_store():
+    # STORE x; LOAD x | LOAD x; STORE x | STORE x; STORE x - ale nie dla komórki 0
+    assert optimize("GET 1", "LOAD 1", "STORE 5", "LOAD 5", "LOAD 6", "STORE 6", "STORE 7", "STORE 7",
+                    "STORE 0", "LOAD 0", "PUT 0", "HALT") == (
+        ["GET 1", "LOAD 1", "STORE 5", "LOAD 6", "STORE 7", "STORE 0", "LOAD 0", "PUT 0", "HALT"],
+        {"redundant_load_store": 3})
+
+
+def test_dead_set():
+    # LOAD 0 czyta akumulator, więc nie nadpisuje ADD 4; GET 4 nie zmienia akumulatora
+    assert optimize("GET 1", "SET 5", "LOAD 3", "ADD 4", "LOAD 0", "STORE 2", "HALF", "GET 0", "ADD 1",
+                    "LOADI 2", "SUB 3", "GET 4", "PUT 0", "HALT") == (
+        ["GET 1", "LOAD 3", "ADD 4", "LOAD 0", "STORE 2", "GET 0", "LOADI 2", "SUB 3", "GET 4", "PUT 0", "HALT"],
+        {"dead_set": 3})
+
+
+def test_jump_to_next():
+    assert optimize("GET 0", "JZERO A", "SET 1", "PUT 0", "A:", "JUMP H", "H:", "HALT") == (
+        ["GET 0", "JZERO 3", "SET 1", "PUT 0", "HALT"],
+        {"jump_to_next": 1, "unused_labels": 1})
+
+
+def test_jump_chain():
+    # JPOS do JUMP: od razu do celu; JNEG do JZERO: warunek JZERO nie musi
+    # być spełniony, więc skok zostaje
+    assert optimize("GET 0", "JPOS A", "JNEG E", "PUT 0", "HALT",
+                    "A:", "JUMP B",
+                    "E:", "JZERO F", "SET 2", "PUT 0",
+                    "B:", "SET 1", "PUT 0",
+                    "F:", "HALT") == (
+        ["GET 0", "JPOS 7", "JNEG 3", "PUT 0", "HALT", "JZERO 5", "SET 2", "PUT 0", "SET 1", "PUT 0", "HALT"],
+        {"jump_chain": 1, "unreachable": 1, "unused_labels": 1})
+
+
+def test_jump_to_halt():
+    assert optimize("GET 0", "JZERO A", "PUT 0", "JUMP X", "A:", "SET 1", "X:", "HALT") == (
+        ["GET 0", "JZERO 3", "PUT 0", "HALT", "SET 1", "HALT"],
+        {"jump_chain": 1, "unused_labels": 1})
+
+
+def test_inverted_branch():
+    # JPOS L1; JNEG L1; JUMP L2; L1:  ->  JZERO L2
+    assert optimize("GET 0", "JPOS L1", "JNEG L1", "JUMP L2", "L1:", "PUT 0", "L2:", "SET 1", "PUT 0", "HALT") == (
+        ["GET 0", "JZERO 2", "PUT 0", "SET 1", "PUT 0", "HALT"],
+        {"inverted_branch": 1, "unused_labels": 1})
+
+
+def test_inverted_branch_not_shorter():
+    # JPOS L1; JUMP L2 dałoby JZERO L2; JNEG L2 - tyle samo rozkazów
+    assert optimize("GET 0", "JPOS L1", "JUMP L2", "L1:", "PUT 0", "L2:", "SET 1", "PUT 0", "HALT") == (
+        ["GET 0", "JPOS 2", "JUMP 2", "PUT 0", "SET 1", "PUT 0", "HALT"], {})
+
+
+def test_repeated_branch():
+    # drugi JPOS nigdy nie skoczy
+    assert optimize("GET 0", "JPOS L1", "JPOS L2", "PUT 0", "L1:", "SET 1", "PUT 0", "L2:", "HALT") == (
+        ["GET 0", "JPOS 2", "PUT 0", "SET 1", "PUT 0", "HALT"],
+        {"inverted_branch": 1, "unused_labels": 1})
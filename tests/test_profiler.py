@@ -0,0 +1,104 @@
+#
+# Testy profilera (virtual_machine/profiler.py): liczba wykonań i koszt
+# każdej linii źródła i procedury, rozbicie na rodzaje rozkazów, raport
+# tekstowy i JSON.
+#
+# Uruchomienie: python -m pytest tests
+#
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "compiler"), os.path.join(ROOT, "virtual_machine")]
+
+from kompilator import compile_source
+from profiler import profile_text
+
+# pętla wykonywana trzy razy; ciało opisane jako linie procedury p
+CODE = """SET 3\t# @PROGRAM:1
+STORE 1\t# @PROGRAM:1
+LOAD 1\t# @PROGRAM:2
+JZERO 6\t# @PROGRAM:2
+SET -1\t# @p:5
+ADD 1\t# @p:5
+STORE 1\t# @p:5
+PUT 1\t# @p:6
+JUMP -6\t# @PROGRAM:2
+PUT 1\t# @PROGRAM:8
+HALT\t# @PROGRAM:-
+"""
+
+# (zakres, linia) -> (wykonania, rozkazy, koszt, {rodzaj: (liczba, koszt)})
+LINES = {
+    ("p", 6): (3, 3, 300, {"PUT": (3, 300)}),
+    ("p", 5): (3, 9, 210, {"SET": (3, 150), "ADD": (3, 30), "STORE": (3, 30)}),
+    ("PROGRAM", 8): (1, 1, 100, {"PUT": (1, 100)}),
+    ("PROGRAM", 1): (1, 2, 60, {"SET": (1, 50), "STORE": (1, 10)}),
+    ("PROGRAM", 2): (4, 11, 47, {"LOAD": (4, 40), "JZERO": (4, 4), "JUMP": (3, 3)}),
+}
+
+
+def summary(entry):
+    kinds = {name: (kind["count"], kind["cost"]) for name, kind in entry.kinds.items()}
+    return entry.executions, entry.instructions, entry.cost, kinds
+
+
+def test_lines():
+    result = profile_text(CODE)
+    assert result.result.outputs == [2, 1, 0, 0]
+    assert [(entry.scope, entry.line) for entry in result.lines] == list(LINES)
+    assert {(entry.scope, entry.line): summary(entry) for entry in result.lines} == LINES
+    assert sum(entry.cost for entry in result.lines) == result.result.cost == 717
+
+
+def test_procedures():
+    result = profile_text(CODE)
+    assert [(entry.scope, entry.instructions, entry.cost) for entry in result.procedures] == \
+        [("p", 12, 510), ("PROGRAM", 14, 207)]
+
+
+def test_report():
+    source_lines = [f"linia {number}" for number in range(1, 9)]
+    report = profile_text(CODE).report(source_lines).splitlines()
+    assert report[0] == "Koszt: 717 (w tym i/o: 400)"
+    assert report[3].split() == ["300", "41.8%", "3", "p:6", "PUT", "3"]
+    assert report[4].strip() == "| linia 6"
+    assert report[5].split() == ["210", "29.3%", "3", "p:5", "SET", "3,", "ADD", "3,", "STORE", "3"]
+    assert report[-2:] == [f"{510:>14,} {71.1:>5.1f}% {12:>10,}  p", f"{207:>14,} {28.9:>5.1f}% {14:>10,}  PROGRAM"]
+
+
+def test_json():
+    data = json.loads(profile_text(CODE).to_json())
+    assert (data["cost"], data["io_cost"], data["outputs"]) == (717, 400, [2, 1, 0, 0])
+    assert data["lines"][-1] == {"scope": "PROGRAM", "line": 2, "executions": 4, "instructions": 11, "cost": 47,
+                                 "kinds": {"LOAD": {"count": 4, "cost": 40}, "JZERO": {"count": 4, "cost": 4},
+                                           "JUMP": {"count": 3, "cost": 3}}}
+    assert data["procedures"][0] == {"scope": "p", "executions": 3, "instructions": 12, "cost": 510,
+                                     "kinds": {"SET": {"count": 3, "cost": 150}, "ADD": {"count": 3, "cost": 30},
+                                               "STORE": {"count": 3, "cost": 30}, "PUT": {"count": 3, "cost": 300}}}
+
+
+def test_compiled_program():
+    # koszty linii i procedur skompilowanego programu sumują się do kosztu
+    with open(os.path.join(ROOT, "programs", "program1.imp")) as file:
+        result = profile_text(compile_source(file.read()), [12, 18, 30, 45])
+    assert sum(entry.cost for entry in result.lines) == result.result.cost
+    assert sum(entry.cost for entry in result.procedures) == result.result.cost
+    assert "?" not in {entry.scope for entry in result.lines}
+
+
+def test_command_line(tmp_path):
+    code = tmp_path / "kod.mr"
+    code.write_text(CODE)
+    output = tmp_path / "wynik.json"
+    profiler = os.path.join(ROOT, "virtual_machine", "profiler.py")
+    run = subprocess.run([sys.executable, profiler, str(code), "--json", str(output)],
+                         capture_output=True, text=True, input="")
+    assert run.returncode == 0
+    assert run.stdout == profile_text(CODE).report()
+    assert json.loads(output.read_text()) == profile_text(CODE).as_dict()
+    # --json bez ścieżki
+    run = subprocess.run([sys.executable, profiler, str(code), "--json"], capture_output=True, text=True, input="")
+    assert run.returncode != 0 and run.stderr.startswith("Sposób użycia")
@@ -0,0 +1,85 @@
+#
+# Testy pamięci podręcznej tablic parsera i leksera (compiler/tables.py).
+#
+# Klasy MyLexer i MyParser budują się przy imporcie, więc każde budowanie
+# to osobny proces z tables.DIRECTORY ustawionym na katalog tymczasowy.
+# Proces wypisuje drzewo i tokeny programu oraz rodzaj tablic parsera:
+# Tables - z pliku, LRTable - zbudowane przez sly.
+#
+# Uruchomienie: python -m pytest tests
+#
+import json
+import marshal
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUILD = """
+import json, sys
+import tables
+tables.DIRECTORY = sys.argv[1]
+from kompilator import parse_source
+from lexer import MyLexer
+from parser import MyParser
+source = open(sys.argv[2]).read()
+print(json.dumps({
+    "tables": type(MyParser._lrtable).__name__,
+    "tokens": [(t.type, t.value, t.lineno, t.index) for t in MyLexer().tokenize(source)],
+    "ast": str(parse_source(source)),
+}))
+"""
+
+
+def build(directory, name="example9.imp"):
+    run = subprocess.run([sys.executable, "-c", BUILD, str(directory), os.path.join(ROOT, "tests", name)],
+                         cwd=os.path.join(ROOT, "compiler"), capture_output=True, text=True)
+    assert run.returncode == 0, run.stderr
+    return json.loads(run.stdout)
+
+
+def cache_files(directory):
+    return {name.split("-")[0]: directory / name for name in os.listdir(directory)}
+
+
+def test_cold_and_warm(tmp_path):
+    cold = build(tmp_path)
+    assert cold["tables"] == "LRTable"
+    files = cache_files(tmp_path)
+    assert sorted(files) == ["MyLexer", "MyParser"]
+    contents = {name: file.read_bytes() for name, file in files.items()}
+    warm = build(tmp_path)
+    assert warm["tables"] == "Tables"
+    assert warm == dict(cold, tables="Tables")
+    # odczyt nie zmienia plików
+    assert {name: file.read_bytes() for name, file in cache_files(tmp_path).items()} == contents
+
+
+def test_corrupt_cache(tmp_path):
+    expected = build(tmp_path)
+    files = cache_files(tmp_path)
+    contents = {name: file.read_bytes() for name, file in files.items()}
+    for file in files.values():
+        file.write_bytes(b"\x00uszkodzony plik")
+    assert build(tmp_path) == expected
+    # sly zbudował tablice od nowa i zapisał je ponownie
+    assert {name: file.read_bytes() for name, file in cache_files(tmp_path).items()} == contents
+
+
+def test_mismatched_cache(tmp_path):
+    expected = build(tmp_path)
+    files = cache_files(tmp_path)
+    contents = {name: file.read_bytes() for name, file in files.items()}
+    # ten sam plik, ale opis innej gramatyki - sly buduje i nadpisuje plik
+    for file in files.values():
+        key, data = marshal.loads(file.read_bytes())
+        file.write_bytes(marshal.dumps((key + " ", data)))
+    assert build(tmp_path) == expected
+    assert {name: file.read_bytes() for name, file in files.items()} == contents
+    # zgodny opis, ale tablice w złym kształcie - sly buduje tablice (bez
+    # zapisu, bo błąd wystąpił już po odczycie pliku)
+    for file in files.values():
+        key, data = marshal.loads(file.read_bytes())
+        file.write_bytes(marshal.dumps((key, [1, 2] if file.name.startswith("MyParser") else 5)))
+    assert build(tmp_path) == expected
@@ -0,0 +1,345 @@
+#
+# Interpreter maszyny wirtualnej w Pythonie (odpowiednik mw.cc / mw-cln.cc)
+#
+# Pamięć trzymana jest w gęstej liście zamiast std::map, a rozkazy są
+# dekodowane raz do tablicy procedur obsługi indeksowanej kodem rozkazu.
+# Wynik uruchomienia (koszt, koszt i/o, wypisane wartości) zwracany jest
+# jako obiekt, więc wiele programów można ocenić w jednym procesie.
+#
+# Różnica względem mw.cc: gdy zabraknie danych wejściowych, mw.cc wykonuje
+# program dalej (nieudany odczyt cin zapisuje 0), a tutaj GET zgłasza
+# MachineError - w testach brak danych to zwykle błąd samego testu.
+#
+import re
+import sys
+from enum import IntEnum
+
+
+class Instructions(IntEnum):
+    GET = 0
+    PUT = 1
+    LOAD = 2
+    STORE = 3
+    LOADI = 4
+    STOREI = 5
+    ADD = 6
+    SUB = 7
+    ADDI = 8
+    SUBI = 9
+    SET = 10
+    HALF = 11
+    JUMP = 12
+    JPOS = 13
+    JZERO = 14
+    JNEG = 15
+    RTRN = 16
+    HALT = 17
+
+
+GET, PUT, LOAD, STORE, LOADI, STOREI, ADD, SUB, ADDI, SUBI, SET, HALF, JUMP, JPOS, JZERO, JNEG, RTRN, HALT = Instructions
+
+COSTS = [0] * len(Instructions)
+COSTS[GET] = 100
+COSTS[PUT] = 100
+COSTS[LOAD] = 10
+COSTS[STORE] = 10
+COSTS[LOADI] = 20
+COSTS[STOREI] = 20
+COSTS[ADD] = 10
+COSTS[SUB] = 10
+COSTS[ADDI] = 20
+COSTS[SUBI] = 12
+COSTS[SET] = 50
+COSTS[HALF] = 5
+COSTS[JUMP] = 1
+COSTS[JPOS] = 1
+COSTS[JZERO] = 1
+COSTS[JNEG] = 1
+COSTS[RTRN] = 10
+COSTS[HALT] = 0
+
+NO_ARGUMENT = {HALF, HALT}
+JUMPS = {JUMP, JPOS, JZERO, JNEG}
+# rozkazy, dla których mw.cc nie sprawdza znaku argumentu
+UNCHECKED = {SET, JUMP, JPOS, JZERO, JNEG}
+# komórki o adresach ujemnych lub większych trafiają do słownika
+DENSE_LIMIT = 1 << 22
+
+
+class MachineError(Exception):
+    pass
+
+
+class RunResult:
+    def __init__(self, cost, io_cost, outputs, steps):
+        self.cost = cost
+        self.io_cost = io_cost
+        self.outputs = outputs
+        self.steps = steps
+
+    def as_dict(self):
+        return {"cost": self.cost, "io_cost": self.io_cost, "outputs": list(self.outputs), "steps": self.steps}
+
+    def __str__(self):
+        return f"Run finished (cost: {self.cost}; io: {self.io_cost}; steps: {self.steps}; outputs: {self.outputs})"
+
+
+_TOKEN = re.compile(r'(?P<comment>#[^\n]*)|(?P<space>[ \t\r]+)|(?P<newline>\n)'
+                    r'|(?P<op>' + '|'.join(sorted((i.name for i in Instructions), key=len, reverse=True)) + r')'
+                    r'|(?P<num>-?[0-9]+)|(?P<error>.)')
+
+
+def parse_program(text):
+    # Zwraca listę par (rozkaz, argument) oraz komentarze przypisane rozkazom,
+    # które rozpoczynają się w tej samej linii co komentarz.
+    program = []
+    comments = []
+    line = 1
+    line_start = 0
+    pending = None
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == "newline":
+            line += 1
+            line_start = len(program)
+        elif kind == "comment":
+            for i in range(line_start, len(program)):
+                comments[i] = match.group()[1:].strip() if comments[i] is None else comments[i]
+        elif kind == "op":
+            if pending is not None:
+                raise MachineError(f"Linia {line}: Brak argumentu rozkazu {pending.name}")
+            op = Instructions[match.group()]
+            if op in NO_ARGUMENT:
+                program.append((op, 0))
+                comments.append(None)
+            else:
+                pending = op
+        elif kind == "num":
+            if pending is None:
+                raise MachineError(f"Linia {line}: Nieoczekiwana liczba {match.group()}")
+            program.append((pending, int(match.group())))
+            comments.append(None)
+            pending = None
+        elif kind == "error":
+            raise MachineError(f"Linia {line}: Nierozpoznany symbol")
+    if pending is not None:
+        raise MachineError(f"Linia {line}: Brak argumentu rozkazu {pending.name}")
+    return program, comments
+
+
+def load_program(path):
+    with open(path) as file:
+        return parse_program(file.read())[0]
+
+
+class Machine:
+    def __init__(self, program):
+        self.program = list(program)
+        size = 1
+        for op, arg in self.program:
+            if op not in UNCHECKED and arg >= size:
+                size = arg + 1
+        self.memory_size = size
+
+        handlers = [None] * len(Instructions)
+        handlers[GET] = self._get
+        handlers[PUT] = self._put
+        handlers[LOAD] = self._load
+        handlers[STORE] = self._store
+        handlers[LOADI] = self._loadi
+        handlers[STOREI] = self._storei
+        handlers[ADD] = self._add
+        handlers[SUB] = self._sub
+        handlers[ADDI] = self._addi
+        handlers[SUBI] = self._subi
+        handlers[SET] = self._set
+        handlers[HALF] = self._half
+        handlers[JUMP] = self._jump
+        handlers[JPOS] = self._jpos
+        handlers[JZERO] = self._jzero
+        handlers[JNEG] = self._jneg
+        handlers[RTRN] = self._rtrn
+        self.handlers = handlers
+
+        # Dekodowanie: skoki dostają od razu adres docelowy, a rozkazy z
+        # ujemnym adresem - procedurę zgłaszającą błąd w chwili wykonania.
+        n = len(self.program)
+        self.code = []
+        for lr, (op, arg) in enumerate(self.program):
+            if op not in UNCHECKED and arg < 0:
+                self.code.append((self._negative_address, arg, COSTS[op]))
+            elif op in JUMPS:
+                target = lr + arg
+                handler = handlers[op] if 0 <= target < n else self._bad_jump(handlers[op], target)
+                self.code.append((handler, target, COSTS[op]))
+            elif op == HALT:
+                self.code.append((None, 0, 0))
+            else:
+                self.code.append((handlers[op], arg, COSTS[op]))
+        self.code.append((self._past_end, n, 0))
+
+    def run(self, inputs=()):
+        self.p = [0] * self.memory_size
+        self.sparse = {}
+        self.inputs = iter(inputs)
+        self.outputs = []
+        self.io = 0
+        code = self.code
+        cost = 0
+        steps = 0
+        lr = 0
+        while True:
+            handler, arg, instruction_cost = code[lr]
+            if handler is None:
+                break
+            lr = handler(arg, lr)
+            cost += instruction_cost
+            steps += 1
+        return RunResult(cost, self.io, self.outputs, steps)
+
+    # dostęp do komórek spoza gęstej części pamięci
+    def _read(self, address):
+        if 0 <= address < len(self.p):
+            return self.p[address]
+        return self.sparse.get(address, 0)
+
+    def _write(self, address, value):
+        p = self.p
+        if address < 0 or address >= DENSE_LIMIT:
+            self.sparse[address] = value
+            return
+        if address >= len(p):
+            p.extend([0] * min(max(address + 1 - len(p), len(p)), DENSE_LIMIT - len(p)))
+        p[address] = value
+
+    def _get(self, arg, lr):
+        try:
+            value = int(next(self.inputs))
+        except StopIteration:
+            raise MachineError("Błąd: brak danych wejściowych.") from None
+        self.p[arg] = value
+        self.io += 100
+        return lr + 1
+
+    def _put(self, arg, lr):
+        self.outputs.append(self.p[arg])
+        self.io += 100
+        return lr + 1
+
+    def _load(self, arg, lr):
+        p = self.p
+        p[0] = p[arg]
+        return lr + 1
+
+    def _store(self, arg, lr):
+        p = self.p
+        p[arg] = p[0]
+        return lr + 1
+
+    def _loadi(self, arg, lr):
+        p = self.p
+        address = p[arg]
+        p[0] = p[address] if 0 <= address < len(p) else self._read(address)
+        return lr + 1
+
+    def _storei(self, arg, lr):
+        p = self.p
+        address = p[arg]
+        if 0 <= address < len(p):
+            p[address] = p[0]
+        else:
+            self._write(address, p[0])
+        return lr + 1
+
+    def _add(self, arg, lr):
+        p = self.p
+        p[0] += p[arg]
+        return lr + 1
+
+    def _sub(self, arg, lr):
+        p = self.p
+        p[0] -= p[arg]
+        return lr + 1
+
+    def _addi(self, arg, lr):
+        p = self.p
+        address = p[arg]
+        p[0] += p[address] if 0 <= address < len(p) else self._read(address)
+        return lr + 1
+
+    def _subi(self, arg, lr):
+        p = self.p
+        address = p[arg]
+        p[0] -= p[address] if 0 <= address < len(p) else self._read(address)
+        return lr + 1
+
+    def _set(self, arg, lr):
+        self.p[0] = arg
+        return lr + 1
+
+    def _half(self, arg, lr):
+        self.p[0] >>= 1
+        return lr + 1
+
+    def _jump(self, target, lr):
+        return target
+
+    def _jpos(self, target, lr):
+        return target if self.p[0] > 0 else lr + 1
+
+    def _jzero(self, target, lr):
+        return target if self.p[0] == 0 else lr + 1
+
+    def _jneg(self, target, lr):
+        return target if self.p[0] < 0 else lr + 1
+
+    def _rtrn(self, arg, lr):
+        target = self.p[arg]
+        if target < 0 or target >= len(self.program):
+            raise MachineError(f"Błąd: Wywołanie nieistniejącej instrukcji nr {target}.")
+        return target
+
+    def _bad_jump(self, handler, target):
+        def jump(arg, lr):
+            next_lr = handler(arg, lr)
+            if next_lr == target:
+                raise MachineError(f"Błąd: Wywołanie nieistniejącej instrukcji nr {target}.")
+            return next_lr
+        return jump
+
+    def _negative_address(self, arg, lr):
+        raise MachineError("Błąd: ujemny adres pamięci.")
+
+    def _past_end(self, arg, lr):
+        raise MachineError(f"Błąd: Wywołanie nieistniejącej instrukcji nr {arg}.")
+
+
+def run(program, inputs=()):
+    return Machine(program).run(inputs)
+
+
+def run_text(text, inputs=()):
+    return Machine(parse_program(text)[0]).run(inputs)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Sposób użycia programu: python mw.py kod", file=sys.stderr)
+        sys.exit(-1)
+    try:
+        program = load_program(sys.argv[1])
+    except OSError:
+        print(f"Błąd: Nie można otworzyć pliku {sys.argv[1]}", file=sys.stderr)
+        sys.exit(-1)
+    except MachineError as e:
+        print(e, file=sys.stderr)
+        sys.exit(-1)
+    print(f"Skończono czytanie kodu (liczba rozkazów: {len(program)}).")
+    try:
+        result = run(program, sys.stdin.read().split())
+    except MachineError as e:
+        print(e, file=sys.stderr)
+        sys.exit(-1)
+    for value in result.outputs:
+        print(f"> {value}")
+    print(f"Skończono program (koszt: {result.cost:,}; w tym i/o: {result.io_cost:,}).")
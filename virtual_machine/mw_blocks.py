@@ -0,0 +1,299 @@
+#
+# Symulator maszyny wirtualnej tłumaczący bloki podstawowe na kod Pythona
+#
+# Program dzielony jest na bloki podstawowe (początki: adres 0, cele skoków,
+# rozkazy po JUMP/JPOS/JZERO/JNEG/RTRN/HALT). Każdy blok zamieniany jest na
+# fragment kodu Pythona, a bloki jednej pętli (silnie spójnej składowej grafu
+# skoków) trafiają do wspólnej funkcji, więc pętla wykonuje się bez powrotu
+# do pętli głównej symulatora. Koszt bloku jest stałą: symulator liczy tylko
+# wejścia do bloków, a koszt to suma liczba_wejść * koszt_bloku. Bloki
+# zaczynające się w miejscu, do którego prowadzi tylko RTRN, tłumaczone są
+# leniwie.
+#
+import sys
+
+from mw import (COSTS, JUMPS, UNCHECKED, DENSE_LIMIT, MachineError, RunResult, load_program,
+                GET, PUT, LOAD, STORE, LOADI, STOREI, ADD, SUB, ADDI, SUBI, SET, HALF, JUMP, JPOS, JZERO, JNEG, RTRN, HALT)
+
+TERMINATORS = JUMPS | {RTRN, HALT}
+
+_CONDITIONS = {JPOS: "a > 0", JZERO: "a == 0", JNEG: "a < 0"}
+_INDIRECT = {LOADI: "=", ADDI: "+=", SUBI: "-="}
+
+
+class Block:
+    def __init__(self, start, end, cost, io_cost, successors, fault=None):
+        self.start = start
+        self.end = end
+        self.cost = cost
+        self.io_cost = io_cost
+        self.successors = successors
+        self.fault = fault
+        self.length = end - start
+
+    def __str__(self):
+        return f"Block [{self.start}:{self.end}) cost {self.cost}"
+
+
+class BlockMachine:
+    def __init__(self, program):
+        self.program = list(program)
+        n = len(self.program)
+        size = 1
+        leaders = {0}
+        for lr, (op, arg) in enumerate(self.program):
+            if op not in UNCHECKED and arg >= size:
+                size = arg + 1
+            if op in TERMINATORS:
+                leaders.add(lr + 1)
+            if op in JUMPS and 0 <= lr + arg < n:
+                leaders.add(lr + arg)
+        leaders.discard(n)
+        self.memory_size = size
+        self.leaders = leaders
+        self.blocks = [None] * n
+        self.entries = [None] * n
+        self.sources = {}
+        for start in leaders:
+            self.blocks[start] = self._scan(start)
+        for region in self._regions():
+            self._compile(region)
+
+    def _scan(self, start):
+        # Wyznacza granice, koszt i następniki bloku zaczynającego się w start.
+        program = self.program
+        n = len(program)
+        cost = io_cost = 0
+        lr = start
+        while lr < n:
+            if lr != start and lr in self.leaders:
+                return Block(start, lr, cost, io_cost, [lr])
+            op, arg = program[lr]
+            if op not in UNCHECKED and arg < 0:
+                return Block(start, lr, cost, io_cost, [], "Błąd: ujemny adres pamięci.")
+            cost += COSTS[op]
+            if op in (GET, PUT):
+                io_cost += 100
+            if op == JUMP:
+                return Block(start, lr + 1, cost, io_cost, [lr + arg])
+            if op in _CONDITIONS:
+                return Block(start, lr + 1, cost, io_cost, [lr + arg, lr + 1])
+            if op in (RTRN, HALT):
+                return Block(start, lr + 1, cost, io_cost, [])
+            lr += 1
+        return Block(start, lr, cost, io_cost, [], f"Błąd: Wywołanie nieistniejącej instrukcji nr {n}.")
+
+    def _regions(self):
+        # Silnie spójne składowe grafu bloków (algorytm Tarjana, iteracyjnie).
+        n = len(self.program)
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        regions = []
+        counter = 0
+        for root in sorted(self.leaders):
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                successors = [s for s in self.blocks[node].successors if 0 <= s < n]
+                if child < len(successors):
+                    work.append((node, child + 1))
+                    successor = successors[child]
+                    if successor not in index:
+                        work.append((successor, 0))
+                    elif successor in on_stack:
+                        low[node] = min(low[node], index[successor])
+                    continue
+                if low[node] == index[node]:
+                    region = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        region.append(member)
+                        if member == node:
+                            break
+                    regions.append(sorted(region))
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+        return regions
+
+    def _compile(self, region):
+        members = set(region)
+        order = {start: position for position, start in enumerate(region)}
+        n = len(self.program)
+        program = self.program
+        name = f"region_{region[0]}"
+        lines = [f"def {name}(p, m, out, lr):", "    a = p[0]"]
+        lines.append("    " + " = ".join(f"n_{start}" for start in region) + " = 0")
+        lines.append("    while True:")
+
+        def operand(x):
+            return "a" if x == 0 else f"p[{x}]"
+
+        def branch(current, target, indent):
+            # Skok w przód w obrębie regionu przechodzi do kolejnych bloków,
+            # skok wstecz wraca na początek pętli, a wyjście kończy funkcję.
+            if not 0 <= target < n:
+                return [f"{indent}m.bad_jump({target})"]
+            if target in members:
+                if order[target] > order[current]:
+                    return [f"{indent}lr = {target}"]
+                return [f"{indent}lr = {target}", f"{indent}continue"]
+            return [f"{indent}lr = {target}", f"{indent}break"]
+
+        for start in region:
+            block = self.blocks[start]
+            body = [f"        if lr == {start}:", f"            n_{start} += 1"]
+            emit = body.append
+            indent = "            "
+            for lr in range(block.start, block.end):
+                op, arg = program[lr]
+                if op == GET:
+                    emit(f"{indent}{operand(arg)} = m.get()")
+                elif op == PUT:
+                    emit(f"{indent}out({operand(arg)})")
+                elif op == LOAD:
+                    if arg != 0:
+                        emit(f"{indent}a = p[{arg}]")
+                elif op == STORE:
+                    if arg != 0:
+                        emit(f"{indent}p[{arg}] = a")
+                elif op in _INDIRECT:
+                    emit(f"{indent}p[0] = a")
+                    emit(f"{indent}i = {operand(arg)}")
+                    emit(f"{indent}a {_INDIRECT[op]} (p[i] if -1 < i < len(p) else m.read(i))")
+                elif op == STOREI:
+                    emit(f"{indent}p[0] = a")
+                    emit(f"{indent}i = {operand(arg)}")
+                    emit(f"{indent}if -1 < i < len(p): p[i] = a")
+                    emit(f"{indent}else: m.write(i, a)")
+                elif op == ADD:
+                    emit(f"{indent}a += {operand(arg)}")
+                elif op == SUB:
+                    emit(f"{indent}a -= {operand(arg)}")
+                elif op == SET:
+                    emit(f"{indent}a = {arg}")
+                elif op == HALF:
+                    emit(f"{indent}a >>= 1")
+                elif op == JUMP:
+                    body.extend(branch(start, lr + arg, indent))
+                elif op in _CONDITIONS:
+                    emit(f"{indent}if {_CONDITIONS[op]}:")
+                    body.extend(branch(start, lr + arg, indent + "    "))
+                    emit(f"{indent}else:")
+                    body.extend(branch(start, lr + 1, indent + "    "))
+                elif op == RTRN:
+                    emit(f"{indent}lr = {operand(arg)}")
+                    emit(f"{indent}if lr < 0 or lr >= {n}: m.bad_jump(lr)")
+                    emit(f"{indent}break")
+                elif op == HALT:
+                    emit(f"{indent}lr = -1")
+                    emit(f"{indent}break")
+            if block.fault is not None:
+                emit(f"{indent}raise MachineError({block.fault!r})")
+            elif block.end == block.start or program[block.end - 1][0] not in TERMINATORS:
+                body.extend(branch(start, block.end, indent))
+            lines.extend(body)
+        lines.append("    p[0] = a")
+        lines.append("    counts = m.counts")
+        for start in region:
+            lines.append(f"    counts[{start}] += n_{start}")
+        lines.append("    return lr")
+
+        source = "\n".join(lines) + "\n"
+        namespace = {"MachineError": MachineError}
+        exec(compile(source, f"<{name}>", "exec"), namespace)
+        function = namespace[name]
+        for start in region:
+            self.entries[start] = function
+            self.sources[start] = source
+        return function
+
+    def entry(self, start):
+        # Wejście w środek bloku (np. przez RTRN) - osobny blok tłumaczony leniwie.
+        function = self.entries[start]
+        if function is None:
+            self.leaders.add(start)
+            self.blocks[start] = self._scan(start)
+            function = self._compile([start])
+        return function
+
+    def run(self, inputs=(), profile=None):
+        state = _State(self.memory_size, inputs, len(self.program))
+        p = state.p
+        out = state.outputs.append
+        entries = self.entries
+        lr = 0
+        while lr >= 0:
+            lr = (entries[lr] or self.entry(lr))(p, state, out, lr)
+        cost = io_cost = steps = 0
+        for start, count in enumerate(state.counts):
+            if count:
+                block = self.blocks[start]
+                cost += count * block.cost
+                io_cost += count * block.io_cost
+                steps += count * block.length
+                if profile is not None:
+                    profile[start] = profile.get(start, 0) + count
+        # HALT nie jest liczony jako wykonany rozkaz
+        return RunResult(cost, io_cost, state.outputs, steps - 1)
+
+
+class _State:
+    def __init__(self, memory_size, inputs, program_size):
+        self.p = [0] * memory_size
+        self.sparse = {}
+        self.inputs = iter(inputs)
+        self.outputs = []
+        self.counts = [0] * program_size
+
+    def get(self):
+        try:
+            return int(next(self.inputs))
+        except StopIteration:
+            raise MachineError("Błąd: brak danych wejściowych.") from None
+
+    def read(self, address):
+        return self.sparse.get(address, 0)
+
+    def write(self, address, value):
+        p = self.p
+        if address < 0 or address >= DENSE_LIMIT:
+            self.sparse[address] = value
+            return
+        p.extend([0] * min(max(address + 1 - len(p), len(p)), DENSE_LIMIT - len(p)))
+        p[address] = value
+
+    def bad_jump(self, target):
+        raise MachineError(f"Błąd: Wywołanie nieistniejącej instrukcji nr {target}.")
+
+
+def run(program, inputs=()):
+    return BlockMachine(program).run(inputs)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Sposób użycia programu: python mw_blocks.py kod", file=sys.stderr)
+        sys.exit(-1)
+    try:
+        program = load_program(sys.argv[1])
+        result = run(program, sys.stdin.read().split())
+    except OSError:
+        print(f"Błąd: Nie można otworzyć pliku {sys.argv[1]}", file=sys.stderr)
+        sys.exit(-1)
+    except MachineError as e:
+        print(e, file=sys.stderr)
+        sys.exit(-1)
+    for value in result.outputs:
+        print(f"> {value}")
+    print(f"Skończono program (koszt: {result.cost:,}; w tym i/o: {result.io_cost:,}).")
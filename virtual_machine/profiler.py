@@ -0,0 +1,150 @@
+#
+# Profiler kosztu programów maszyny wirtualnej
+#
+# Kompilator opisuje każdy rozkaz komentarzem "# @zakres:linia" (zakres to
+# nazwa procedury albo PROGRAM). Profiler uruchamia program w symulatorze
+# blokowym, z liczników wejść do bloków wylicza liczbę wykonań każdego
+# rozkazu i sumuje je dla linii źródła oraz procedur: liczbę wykonań, koszt
+# i rozbicie na rodzaje rozkazów. Raport jest dostępny jako tekst i JSON.
+#
+import json
+import re
+import sys
+
+from mw import COSTS, Instructions, MachineError, parse_program
+from mw_blocks import BlockMachine
+
+ANNOTATION = re.compile(r'@(?P<scope>[^\s:]+):(?P<line>\d+|-)')
+UNKNOWN_SCOPE = "?"
+
+
+class Entry:
+    def __init__(self, scope, line=None):
+        self.scope = scope
+        self.line = line
+        # największa liczba wykonań pojedynczego rozkazu linii
+        self.executions = 0
+        self.instructions = 0
+        self.cost = 0
+        self.kinds = {}
+
+    def add(self, op, count):
+        cost = count * COSTS[op]
+        self.executions = max(self.executions, count)
+        self.instructions += count
+        self.cost += cost
+        kind = self.kinds.setdefault(Instructions(op).name, {"count": 0, "cost": 0})
+        kind["count"] += count
+        kind["cost"] += cost
+
+    def as_dict(self):
+        entry = {"scope": self.scope}
+        if self.line is not None:
+            entry["line"] = self.line
+        entry.update({"executions": self.executions, "instructions": self.instructions,
+                      "cost": self.cost, "kinds": self.kinds})
+        return entry
+
+
+class Profile:
+    def __init__(self, result, lines, procedures):
+        self.result = result
+        self.lines = lines
+        self.procedures = procedures
+
+    def as_dict(self):
+        return {
+            "cost": self.result.cost,
+            "io_cost": self.result.io_cost,
+            "outputs": list(self.result.outputs),
+            "lines": [entry.as_dict() for entry in self.lines],
+            "procedures": [entry.as_dict() for entry in self.procedures],
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2, ensure_ascii=False)
+
+    def report(self, source_lines=None, limit=None):
+        total = self.result.cost or 1
+        out = [f"Koszt: {self.result.cost:,} (w tym i/o: {self.result.io_cost:,})", ""]
+        out.append(f"{'koszt':>14} {'%':>6} {'wykonania':>10}  {'linia':<20} rozkazy")
+        for entry in self.lines[:limit]:
+            where = f"{entry.scope}:{'-' if entry.line is None else entry.line}"
+            kinds = ", ".join(f"{name} {kind['count']}"
+                              for name, kind in sorted(entry.kinds.items(), key=lambda item: -item[1]["cost"]))
+            out.append(f"{entry.cost:>14,} {100 * entry.cost / total:>5.1f}% {entry.executions:>10,}  {where:<20} {kinds}")
+            if source_lines and entry.line is not None and 0 < entry.line <= len(source_lines):
+                out.append(f"{'':>34}| {source_lines[entry.line - 1].strip()}")
+        out.append("")
+        out.append(f"{'koszt':>14} {'%':>6} {'rozkazy':>10}  procedura")
+        for entry in self.procedures:
+            out.append(f"{entry.cost:>14,} {100 * entry.cost / total:>5.1f}% {entry.instructions:>10,}  {entry.scope}")
+        return "\n".join(out) + "\n"
+
+
+def annotation(comment):
+    match = ANNOTATION.search(comment or "")
+    if not match:
+        return UNKNOWN_SCOPE, None
+    line = match.group("line")
+    return match.group("scope"), None if line == "-" else int(line)
+
+
+def profile(program, comments, inputs=()):
+    machine = BlockMachine(program)
+    blocks = {}
+    result = machine.run(inputs, profile=blocks)
+
+    counts = [0] * len(program)
+    for start, count in blocks.items():
+        block = machine.blocks[start]
+        for lr in range(block.start, block.end):
+            counts[lr] += count
+
+    lines = {}
+    procedures = {}
+    for lr, (op, arg) in enumerate(program):
+        count = counts[lr]
+        if not count or op == Instructions.HALT:
+            continue
+        scope, line = annotation(comments[lr])
+        lines.setdefault((scope, line), Entry(scope, line)).add(op, count)
+        procedures.setdefault(scope, Entry(scope)).add(op, count)
+
+    by_cost = lambda entry: (-entry.cost, entry.scope, entry.line or 0)
+    return Profile(result, sorted(lines.values(), key=by_cost), sorted(procedures.values(), key=by_cost))
+
+
+def profile_text(text, inputs=()):
+    program, comments = parse_program(text)
+    return profile(program, comments, inputs)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    json_path = None
+    if "--json" in args and args.index("--json") + 1 < len(args):
+        position = args.index("--json")
+        json_path = args[position + 1]
+        del args[position:position + 2]
+    if len(args) not in (1, 2) or "--json" in args:
+        print("Sposób użycia programu: python profiler.py kod.mr [źródło.imp] [--json wynik.json] < dane",
+              file=sys.stderr)
+        sys.exit(-1)
+    try:
+        with open(args[0]) as file:
+            result = profile_text(file.read(), sys.stdin.read().split())
+        source_lines = None
+        if len(args) == 2:
+            with open(args[1]) as file:
+                source_lines = file.read().splitlines()
+    except OSError as e:
+        print(f"Błąd: Nie można otworzyć pliku {e.filename}", file=sys.stderr)
+        sys.exit(-1)
+    except MachineError as e:
+        print(e, file=sys.stderr)
+        sys.exit(-1)
+    print(result.report(source_lines), end="")
+    if json_path:
+        with open(json_path, "w") as file:
+            file.write(result.to_json())